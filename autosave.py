@@ -0,0 +1,627 @@
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import (QThread, QTimer, QStandardPaths, QLockFile,
+                          pyqtSignal)
+from image_buffer import pixel_array
+import numpy
+import os
+import struct
+import tempfile
+import zlib
+
+""" Autosave for the PyQt6 Paint Application.
+    Periodically appends the tiles of each layer changed
+    since the last checkpoint to a journal file on a worker
+    thread, and compacts the journal into one full snapshot
+    once the appended edits outgrow it. After a crash the journal is
+    replayed to recover the drawing. Each checkpoint costs
+    time in proportion to the tiles edited since the last
+    one rather than to the size of the document. A lock file
+    beside each journal keeps instances of the app running
+    at once off each other's journals.
+"""
+
+# Milliseconds between autosave checkpoints
+AUTOSAVE_INTERVAL = 30000
+
+# Journal is compacted once appended edits pass the size of
+# its snapshot and this many bytes
+COMPACT_BYTES = 1024 * 1024
+
+# Journal file header, format version, and record layouts
+JOURNAL_MAGIC = b'PAINTJNL'
+JOURNAL_VERSION = 2
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<4sI')
+DOCUMENT = struct.Struct('<IIIIIII')
+LAYER = struct.Struct('<fBBHH')
+TILE = struct.Struct('<iiI')
+CHECKSUM = struct.Struct('<I')
+
+# Added to a journal's path for its lock file
+LOCK_SUFFIX = '.lock'
+
+# Record kinds, one record per layer. A snapshot rebuilds
+# the layer, starting a new stack at layer 0, while an
+# edit only replaces the tiles it lists
+SNAPSHOT = b'SNAP'
+EDIT = b'EDIT'
+
+
+def journal_path(number=1):
+    """ Returns path of a document's autosave journal,
+        from the PAINT_AUTOSAVE_PATH environment variable
+        if set, otherwise in the app's local data directory,
+        with the document number added after the first
+    """
+    path = os.environ.get('PAINT_AUTOSAVE_PATH')
+    if path is None:
+        directory = QStandardPaths.writableLocation(
+            QStandardPaths.StandardLocation.AppLocalDataLocation)
+        path = os.path.join(directory, 'autosave.journal')
+    if number > 1:
+        base, extension = os.path.splitext(path)
+        path = f'{base}-{number}{extension}'
+    return path
+
+
+def journal_numbers():
+    """ Returns the sorted numbers of documents whose
+        autosave journals were left behind
+    """
+    directory, name = os.path.split(journal_path())
+    base, extension = os.path.splitext(name)
+    if not os.path.isdir(directory or '.'):
+        return []
+    numbers = []
+    for file_name in os.listdir(directory or '.'):
+        stem, file_extension = os.path.splitext(file_name)
+        if file_extension != extension:
+            continue
+        if stem == base:
+            numbers.append(1)
+        elif (stem.startswith(f'{base}-') and
+                stem[len(base) + 1:].isdigit() and
+                int(stem[len(base) + 1:]) > 1):
+            numbers.append(int(stem[len(base) + 1:]))
+    return sorted(numbers)
+
+
+def lock_journal(number=1):
+    """
+    Locks a document's autosave journal for as long as the
+    document is open, taking over a lock left by an
+    instance that has exited
+
+    Parameters
+    ----------
+    number : int
+        Number of the document
+
+    Returns
+    ----------
+    QLockFile
+        Lock on the journal, not held if the lock file
+        cannot be written, None if another running instance
+        holds it
+    """
+    path = journal_path(number)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    except OSError:
+        pass
+    lock = QLockFile(path + LOCK_SUFFIX)
+
+    # Held while the document is open however long that is,
+    # so only an owner that has exited leaves it stale
+    lock.setStaleLockTime(0)
+    if (not lock.tryLock(0) and
+            lock.error() == QLockFile.LockError.LockFailedError):
+        return None
+    return lock
+
+
+def claim_journals(open_numbers):
+    """
+    Locks every journal left behind by an instance that has
+    exited, passing over those of running instances
+
+    Parameters
+    ----------
+    open_numbers : set
+        Numbers of documents open in this instance, whose
+        journals it already holds
+
+    Returns
+    ----------
+    dict
+        Lock on each left behind journal keyed by document
+        number, None for documents open in this instance
+    """
+    locks = {}
+    for number in journal_numbers():
+        if number in open_numbers:
+            locks[number] = None
+        else:
+            lock = lock_journal(number)
+            if lock is not None:
+                locks[number] = lock
+    return locks
+
+
+def read_journal(path):
+    """
+    Yields every complete record in a journal, stopping at
+    a record cut short or damaged by a crash
+
+    Parameters
+    ----------
+    path : str
+        Path of the journal file
+
+    Yields
+    ----------
+    dict
+        Record 'kind' and 'tile_size', document 'size',
+        'active' layer index and 'file_path' or None, layer
+        'index', 'count', 'name', 'opacity', 'blend_mode',
+        'visible', and 'opaque', and 'tiles' holding
+        compressed pixels keyed by (column, row), empty
+        bytes for tiles that are blank
+    """
+    with open(path, 'rb') as journal:
+        header = journal.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return
+        magic, version, tile_size = HEADER.unpack(header)
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION:
+            return
+
+        while True:
+            record_header = journal.read(RECORD.size)
+            if len(record_header) < RECORD.size:
+                return
+            kind, length = RECORD.unpack(record_header)
+            payload = journal.read(length)
+            checksum = journal.read(CHECKSUM.size)
+            if (len(payload) < length or len(checksum) < CHECKSUM.size or
+                    CHECKSUM.unpack(checksum)[0] != zlib.crc32(payload)):
+                return
+
+            (width, height, active, index, count, tile_count,
+             path_length) = DOCUMENT.unpack_from(payload)
+            (opacity, visible, opaque, name_length,
+             mode_length) = LAYER.unpack_from(payload, DOCUMENT.size)
+            offset = DOCUMENT.size + LAYER.size
+            strings = []
+            for length in (path_length, name_length, mode_length):
+                strings.append(payload[offset:offset + length].decode())
+                offset += length
+            tiles = {}
+            for _ in range(tile_count):
+                column, row, size = TILE.unpack_from(payload, offset)
+                offset += TILE.size
+                tiles[(column, row)] = payload[offset:offset + size]
+                offset += size
+            yield {'kind': kind, 'tile_size': tile_size,
+                   'size': (width, height), 'active': active,
+                   'file_path': strings[0] or None, 'index': index,
+                   'count': count, 'name': strings[1], 'opacity': opacity,
+                   'blend_mode': strings[2], 'visible': bool(visible),
+                   'opaque': bool(opaque), 'tiles': tiles}
+
+
+class AutosaveWorker(QThread):
+    """ A class to represent an Autosave Worker
+
+        ...
+
+        Attributes
+        ----------
+        QThread : class
+            AutosaveWorker inherits from this PyQt6 class
+        path : str
+            Path of the journal file
+        kind : bytes
+            SNAPSHOT to rewrite the journal, EDIT to append
+        tile_size : int
+            Width and height in pixels of each tile
+        size : tuple
+            Document width and height
+        active : int
+            Index of the active layer
+        count : int
+            Number of layers
+        file_path : str
+            File the drawing was last saved to, or None
+        layers : list
+            Layer 'index', 'name', 'opacity', 'blend_mode',
+            'visible', 'opaque', and 'tiles' holding shallow
+            tile copies keyed by (column, row), None for
+            tiles that are blank
+        written : pyqtSignal
+            Emits bytes written once the record is on disk
+        failed : pyqtSignal
+            Emits error message if the record was not written
+
+        Methods
+        ----------
+        run():
+            Compresses tiles and writes the record
+        record(layer):
+            Returns the encoded journal record of a layer
+    """
+
+    written = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, kind, tile_size, size, active, count,
+                 file_path, layers, parent=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            path : str
+                Path of the journal file
+            kind : bytes
+                SNAPSHOT to rewrite the journal, EDIT to append
+            tile_size : int
+                Width and height in pixels of each tile
+            size : tuple
+                Document width and height
+            active : int
+                Index of the active layer
+            count : int
+                Number of layers
+            file_path : str
+                File the drawing was last saved to, or None
+            layers : list
+                Layer 'index', 'name', 'opacity',
+                'blend_mode', 'visible', 'opaque', and 'tiles'
+                of each layer written
+            parent : QObject
+                Owner of the worker thread
+        """
+        super().__init__(parent)
+        self.path = path
+        self.kind = kind
+        self.tile_size = tile_size
+        self.size = size
+        self.active = active
+        self.count = count
+        self.file_path = file_path
+        self.layers = layers
+
+    def run(self):
+        """
+        Compresses tiles and writes one record per layer,
+        appending edits and atomically replacing the
+        journal with snapshots
+        """
+        record = b''.join(self.record(layer) for layer in self.layers)
+        temp_path = None
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            if self.kind == SNAPSHOT:
+                handle, temp_path = tempfile.mkstemp(suffix='.tmp',
+                                                     dir=directory)
+                journal = os.fdopen(handle, 'wb')
+                journal.write(HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION,
+                                          self.tile_size))
+            else:
+                journal = open(self.path, 'ab')
+            with journal:
+                journal.write(record)
+                journal.flush()
+                os.fsync(journal.fileno())
+            if temp_path is not None:
+                os.replace(temp_path, self.path)
+        except OSError as error:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            self.failed.emit(str(error))
+            return
+        self.written.emit(len(record))
+
+    def record(self, layer):
+        """
+        Returns the encoded journal record of a layer
+
+        Parameters
+        ----------
+        layer : dict
+            Layer properties and tiles to write
+
+        Returns
+        ----------
+        bytes
+            Record header, payload, and payload checksum
+        """
+        file_path = (self.file_path or '').encode()
+        name = layer['name'].encode()
+        blend_mode = layer['blend_mode'].encode()
+        parts = [DOCUMENT.pack(self.size[0], self.size[1], self.active,
+                               layer['index'], self.count,
+                               len(layer['tiles']), len(file_path)),
+                 LAYER.pack(layer['opacity'], layer['visible'],
+                            layer['opaque'], len(name), len(blend_mode)),
+                 file_path, name, blend_mode]
+        for (column, row), tile in layer['tiles'].items():
+            if tile is None:
+                data = b''
+            elif isinstance(tile, bytes):
+                data = tile
+            else:
+                buffer = tile.constBits()
+                buffer.setsize(tile.sizeInBytes())
+                data = zlib.compress(bytes(buffer), 1)
+            parts.append(TILE.pack(column, row, len(data)))
+            parts.append(data)
+        payload = b''.join(parts)
+        return (RECORD.pack(self.kind, len(payload)) + payload +
+                CHECKSUM.pack(zlib.crc32(payload)))
+
+
+class Autosave:
+    """ A class to represent an Autosave
+
+        ...
+
+        Attributes
+        ----------
+        canvas : PaintCanvas
+            Canvas whose document is autosaved
+        path : str
+            Path of the journal file
+        lock : QLockFile
+            Lock held on the journal while the document is
+            open, None if not locked
+        timer : QTimer
+            Timer starting each checkpoint
+        worker : AutosaveWorker
+            Worker writing the current checkpoint, or None
+        pending_keys : dict
+            Keys of tiles in the checkpoint being written
+            keyed by layer tile store
+        revision : int
+            Layer stack revision the journal was written at
+        snapshot_bytes : int
+            Size of the journal's snapshot record, 0 until
+            the first snapshot of this session is written
+        edit_bytes : int
+            Size of edit records appended since the snapshot
+
+        Methods
+        ----------
+        start():
+            Starts periodic checkpoints
+        stop():
+            Stops checkpoints and waits for one being written
+        checkpoint():
+            Writes tiles changed since the last checkpoint
+        checkpoint_written(size, kind):
+            Records journal growth after a checkpoint
+        checkpoint_failed(message):
+            Reports autosave error and retries next time
+        has_journal():
+            Returns whether a journal was left behind
+        recover():
+            Replays the journal into the document
+        discard():
+            Stops checkpoints, deletes the journal, and
+            releases its lock
+    """
+
+    def __init__(self, canvas, path=None, interval=AUTOSAVE_INTERVAL,
+                 lock=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            canvas : PaintCanvas
+                Canvas whose document is autosaved
+            path : str
+                Path of the journal file, journal_path() if None
+            interval : int
+                Milliseconds between checkpoints
+            lock : QLockFile
+                Lock held on the journal, None if not locked
+        """
+        self.canvas = canvas
+        self.path = path or journal_path()
+        self.lock = lock
+        self.timer = QTimer(canvas)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.checkpoint)
+        self.worker = None
+        self.pending_keys = {}
+        self.revision = None
+        self.snapshot_bytes = 0
+        self.edit_bytes = 0
+
+    def start(self):
+        """
+        Starts periodic checkpoints
+        """
+        self.timer.start()
+
+    def stop(self):
+        """
+        Stops checkpoints and waits for one being written
+        """
+        self.timer.stop()
+        if self.worker is not None:
+            self.worker.wait()
+
+    def checkpoint(self):
+        """
+        Writes tiles changed since the last checkpoint,
+        compacting the journal into a snapshot once edits
+        outgrow the last snapshot or layers were changed
+        """
+        canvas = self.canvas
+        stack = canvas.layers
+        if (self.worker is not None or canvas.drawing_status or
+                canvas.image_loader is not None):
+            return
+
+        # Layer order and properties are only written in full
+        if (self.snapshot_bytes == 0 or self.revision != stack.revision or
+                self.edit_bytes > self.snapshot_bytes + COMPACT_BYTES):
+            kind = SNAPSHOT
+            changed = [(index, layer, layer.tiles.painted_keys())
+                       for index, layer in enumerate(stack.layers)]
+        else:
+            kind = EDIT
+            changed = [(index, layer, layer.tiles.dirty_keys)
+                       for index, layer in enumerate(stack.layers)
+                       if layer.tiles.dirty_keys]
+            if not changed:
+                return
+
+        # Shallow copies share pixels with the tiles until
+        # they are next painted, so taking them is cheap, and
+        # tiles opened from a project are written compressed
+        layers = []
+        for index, layer, keys in changed:
+            snapshot = {}
+            for key in keys:
+                tile = layer.tiles.tiles.get(key)
+                if tile is not None:
+                    snapshot[key] = QImage(tile)
+                elif key in layer.tiles.stored:
+                    snapshot[key] = bytes(layer.tiles.stored[key])
+                else:
+                    snapshot[key] = None
+            layers.append({'index': index, 'name': layer.name,
+                           'opacity': layer.opacity,
+                           'blend_mode': layer.blend_mode,
+                           'visible': layer.visible,
+                           'opaque': layer.opaque(), 'tiles': snapshot})
+        self.pending_keys = {layer.tiles: layer.tiles.dirty_keys
+                             for layer in stack.layers}
+        for layer in stack.layers:
+            layer.tiles.dirty_keys = set()
+        self.revision = stack.revision
+
+        self.worker = AutosaveWorker(self.path, kind, stack.tile_size,
+                                     (stack.width, stack.height),
+                                     stack.active, len(stack.layers),
+                                     canvas.current_file, layers, canvas)
+        self.worker.written.connect(
+            lambda size, kind=kind: self.checkpoint_written(size, kind))
+        self.worker.failed.connect(self.checkpoint_failed)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def checkpoint_written(self, size, kind):
+        """
+        Records journal growth after a checkpoint
+
+        Parameters
+        ----------
+        size : int
+            Bytes written by the checkpoint
+        kind : bytes
+            SNAPSHOT or EDIT
+        """
+        if kind == SNAPSHOT:
+            self.snapshot_bytes = size
+            self.edit_bytes = 0
+        else:
+            self.edit_bytes += size
+        self.pending_keys = {}
+        self.worker = None
+
+    def checkpoint_failed(self, message):
+        """
+        Reports autosave error and retries next time
+
+        Parameters
+        ----------
+        message : str
+            Reason the checkpoint was not written
+        """
+        # A partly appended record would hide later ones, so
+        # rewrite the journal as a snapshot next time
+        for tiles, keys in self.pending_keys.items():
+            tiles.dirty_keys |= keys
+        self.pending_keys = {}
+        self.snapshot_bytes = 0
+        self.worker = None
+        self.canvas.status_display.show_message(
+            f'Autosave failed: {message}', 5000)
+
+    def has_journal(self):
+        """
+        Returns whether a journal was left behind
+
+        Returns
+        ----------
+        bool
+            True if a journal file exists at the path
+        """
+        return os.path.exists(self.path)
+
+    def recover(self):
+        """
+        Replays the journal into the document
+
+        Returns
+        ----------
+        bool
+            True if at least one record was recovered
+        """
+        stack = self.canvas.layers
+        recovered = False
+        for record in read_journal(self.path):
+            index = record['index']
+            tile_size = record['tile_size']
+            if tile_size != stack.tile_size:
+                break
+            stack.resize(*record['size'])
+            if record['kind'] == SNAPSHOT and index <= len(stack.layers):
+                layer = stack.restore_layer(index, record['name'],
+                                            record['opaque'])
+            elif record['kind'] == EDIT and index < len(stack.layers):
+                layer = stack.layers[index]
+            else:
+                break
+            layer.opacity = record['opacity']
+            layer.blend_mode = record['blend_mode']
+            layer.visible = record['visible']
+
+            tiles = layer.tiles
+            for key, data in record['tiles'].items():
+                tiles.tiles.pop(key, None)
+                if data:
+                    image = QImage(tile_size, tile_size,
+                                   tiles.blank_tile.format())
+                    pixels = numpy.frombuffer(zlib.decompress(data),
+                                              numpy.uint32)
+                    pixel_array(image)[:] = pixels.reshape(tile_size,
+                                                           tile_size)
+                    tiles.tiles[key] = image
+            stack.active = min(record['active'], len(stack.layers) - 1)
+            self.canvas.current_file = record['file_path']
+            recovered = True
+
+        # Next checkpoint rewrites the journal from the result
+        for layer in stack.layers:
+            layer.tiles.dirty_keys = set()
+        stack.changed()
+        self.snapshot_bytes = 0
+        return recovered
+
+    def discard(self):
+        """
+        Stops checkpoints, deletes the journal, and releases
+        its lock
+        """
+        self.stop()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        if self.lock is not None:
+            self.lock.unlock()
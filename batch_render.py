@@ -0,0 +1,167 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+""" Batch renderer for the PyQt6 Paint Application.
+    Renders stroke scripts saved as JSON into image files
+    without opening any windows, spreading the scripts
+    across a pool of worker processes.
+"""
+
+# Scripts handed to a worker process at a time
+CHUNK_SIZE = 16
+
+
+def init_worker():
+    """ Create the QGuiApplication each worker process
+        needs before it can paint into images
+    """
+    global app
+    from PyQt6.QtGui import QGuiApplication
+
+    # Workers never show a window, so need no display
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QGuiApplication.instance() or QGuiApplication([])
+
+
+def output_paths(script_paths, output_dir, image_format):
+    """
+    Returns the image path of each script, keeping the
+    script's path relative to the folder all scripts share
+
+    Parameters
+    ----------
+    script_paths : list
+        Paths of the JSON stroke scripts
+    output_dir : str
+        Directory the images are written under
+    image_format : str
+        Image file extension such as 'png'
+
+    Returns
+    ----------
+    list
+        Image path of each script, so a/1.json and b/1.json
+        are written to a/1.png and b/1.png
+
+    Raises
+    ----------
+    ValueError
+        If two scripts would be written to the same image
+    """
+    paths = [os.path.abspath(path) for path in script_paths]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    outputs = [os.path.join(output_dir, os.path.splitext(
+                   os.path.relpath(path, root))[0] + f'.{image_format}')
+               for path in paths]
+    written = {}
+    for script_path, output_path in zip(script_paths, outputs):
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in written:
+            raise ValueError(f'{written[key]} and {script_path} would both ' +
+                             f'be written to {output_path}')
+        written[key] = script_path
+    return outputs
+
+
+def render_file(script_path, output_path, image_format, quality=-1):
+    """
+    Renders one stroke script into an image file,
+    reporting rather than raising any error so one bad
+    script never stops the batch
+
+    Parameters
+    ----------
+    script_path : str
+        Path of the JSON stroke script
+    output_path : str
+        Path the image is written to
+    image_format : str
+        Image file extension such as 'png'
+    quality : int
+        Encoder quality from 0 to 100, format default if -1
+
+    Returns
+    ----------
+    tuple
+        Output path, seconds spent rendering, and error
+        message or None if the image was written
+    """
+    from PyQt6.QtGui import QImage
+    from stroke_renderer import StrokeRenderer
+
+    start = time.perf_counter()
+    try:
+        with open(script_path) as script_file:
+            script = json.load(script_file)
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+        # Drawings are opaque, dropping alpha makes encoding faster
+        image = StrokeRenderer.render_script(script)
+        image = image.convertToFormat(QImage.Format.Format_RGB32)
+        if not image.save(output_path, image_format, quality):
+            raise OSError(f'Could not write {output_path}')
+    except Exception as error:
+        # Malformed scripts can fail anywhere while rendering
+        return output_path, time.perf_counter() - start, (
+            f'{type(error).__name__}: {error}')
+    return output_path, time.perf_counter() - start, None
+
+
+def main():
+    """ Parse command line arguments then render every
+        stroke script across a pool of worker processes,
+        print the throughput, and exit with status 1 if
+        any script failed
+    """
+    parser = argparse.ArgumentParser(
+        description='Render paint app stroke scripts to images')
+    parser.add_argument('scripts', nargs='+',
+                        help='JSON stroke scripts to render')
+    parser.add_argument('-o', '--output-dir', default='.',
+                        help='directory images are written to')
+    parser.add_argument('-f', '--format', default='png',
+                        help='image file extension to write')
+    parser.add_argument('-q', '--quality', type=int, default=-1,
+                        help='encoder quality from 0 to 100')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='number of worker processes')
+    args = parser.parse_args()
+    try:
+        outputs = output_paths(args.scripts, args.output_dir, args.format)
+    except ValueError as error:
+        parser.error(str(error))
+
+    # Spawned workers avoid inheriting Qt state through fork
+    start = time.perf_counter()
+    failures = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(args.jobs, mp_context=context,
+                             initializer=init_worker) as executor:
+        results = executor.map(render_file, args.scripts, outputs,
+                               [args.format] * len(args.scripts),
+                               [args.quality] * len(args.scripts),
+                               chunksize=CHUNK_SIZE)
+        for script_path, (output_path, seconds, error) in zip(args.scripts,
+                                                              results):
+            if error is None:
+                print(f'{output_path}: {seconds * 1000:.1f} ms')
+            else:
+                print(f'{script_path}: failed, {error}', file=sys.stderr)
+                failures.append(script_path)
+
+    elapsed = time.perf_counter() - start
+    rendered = len(args.scripts) - len(failures)
+    print(f'Rendered {rendered} scripts in {elapsed:.2f}s ' +
+          f'({rendered * 60 / elapsed:.0f} per minute)')
+    if failures:
+        print(f'{len(failures)} scripts failed', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
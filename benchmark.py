@@ -0,0 +1,1025 @@
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import (QMouseEvent, QColor)
+from PyQt6.QtCore import (Qt, QEvent, QPoint, QPointF, QRect)
+from paint_app import AppWindow
+from history import History
+from tile_store import TileStore
+from flood_fill import flood_fill
+from stroke_renderer import StrokeRenderer
+from stroke_smoother import SMOOTHING_LEVELS
+from brush_engine import BRUSH_PRESETS
+from layer_stack import LayerStack
+from project_file import (ProjectFile, ProjectWorker)
+from filter_engine import (FilterEngine, FilterPreview, FILTERS,
+                           FILTER_THREADS)
+from export_pipeline import (ExportWorker, EXPORT_PRESETS, EXPORT_THREADS,
+                             export_path)
+import argparse
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+""" Benchmarks for the PyQt6 Paint Application.
+    Feeds synthetic mouse events into the canvas under the
+    offscreen Qt platform and reports events per second,
+    per-event latency, repainted pixels, and peak memory
+    for each drawing scenario.
+"""
+
+# Tool and size tier for each stroke scenario, matching
+# the sizes offered in the tool menus
+STROKE_SCENARIOS = [
+    ('Pencil 2px long strokes', 'Pencil', 1),
+    ('Pencil 8px long strokes', 'Pencil', 4),
+    ('Brush 4px', 'Brush', 2),
+    ('Brush 16px', 'Brush', 8),
+    ('Spray 2px', 'Spray', 1),
+    ('Spray 4px', 'Spray', 2),
+    ('Spray 6px', 'Spray', 3),
+    ('Spray 8px', 'Spray', 4),
+    ('Eraser 16px sweeps', 'Eraser', 4),
+    ('Eraser 40px sweeps', 'Eraser', 10),
+]
+
+# Window sizes cycled through by the resize scenario
+RESIZE_SIZES = [(500, 500), (800, 600), (1200, 900), (640, 480)]
+
+# Width and height of the square regions bucket filled
+FILL_SIZES = [256, 1000, 2000, 4000]
+
+# Fresh app processes started to time the first paint
+STARTUP_RUNS = 5
+
+# Width and height in pixels of the project save benchmark
+PROJECT_SIZE = 4000
+
+# Width and height of the layer filtered, and the slider
+# values each filter is timed with
+FILTER_SIZE = 2048
+FILTER_VALUES = {
+    'Gaussian Blur': [8],
+    'Sharpen': [2, 100],
+    'Brightness / Contrast': [20, 30],
+    'Hue Shift': [90],
+    'Invert': [],
+}
+
+# Width and height of the drawing exported with every preset
+EXPORT_SIZE = (4000, 3000)
+
+# Documents opened, their size, and the memory budget
+# they share when measuring spilling
+DOCUMENT_COUNT = 8
+DOCUMENT_SIZE = 2000
+DOCUMENT_BUDGET = 64 * 2 ** 20
+
+# Width and height of the drawing selections are dragged
+# across, and the sides of the square selections dragged
+SELECTION_DOCUMENT = 4096
+SELECTION_SIZES = [256, 1024, 4096]
+
+# Mouse positions per second the brush has to keep up with
+BRUSH_INPUT_RATE = 1000
+
+
+def mouse_move_event(x, y):
+    """
+    Builds a mouse move event with no buttons pressed
+
+    Parameters
+    ----------
+    x : int
+        Horizontal mouse position on canvas
+    y : int
+        Vertical mouse position on canvas
+
+    Returns
+    ----------
+    QMouseEvent
+        Synthetic mouse move event
+    """
+    position = QPointF(x, y)
+    return QMouseEvent(QEvent.Type.MouseMove, position, position,
+                       Qt.MouseButton.NoButton, Qt.MouseButton.NoButton,
+                       Qt.KeyboardModifier.NoModifier)
+
+
+def mouse_event(event_type, x, y, button, buttons):
+    """
+    Builds a mouse event of any type
+
+    Parameters
+    ----------
+    event_type : QEvent.Type
+        Press, move, or release event type
+    x : float
+        Horizontal mouse position on canvas
+    y : float
+        Vertical mouse position on canvas
+    button : Qt.MouseButton
+        Button that caused the event
+    buttons : Qt.MouseButton
+        Buttons held during the event
+
+    Returns
+    ----------
+    QMouseEvent
+        Synthetic mouse event
+    """
+    position = QPointF(x, y)
+    return QMouseEvent(event_type, position, position, button, buttons,
+                       Qt.KeyboardModifier.NoModifier)
+
+
+def stroke_path(count, width, height):
+    """
+    Returns points of a long looping stroke that
+    covers most of the canvas
+
+    Parameters
+    ----------
+    count : int
+        Number of points in the stroke
+    width : int
+        Canvas width in pixels
+    height : int
+        Canvas height in pixels
+
+    Returns
+    ----------
+    list
+        (x, y) positions a few pixels apart
+    """
+    return [(width * (0.5 + 0.45 * math.sin(i / 97)),
+             height * (0.5 + 0.45 * math.sin(i / 61)))
+            for i in range(count)]
+
+
+def stroke_events(path):
+    """
+    Builds left button press, move, and release events
+    following a path
+
+    Parameters
+    ----------
+    path : list
+        (x, y) positions of the stroke
+
+    Returns
+    ----------
+    list
+        Synthetic mouse events for the whole stroke
+    """
+    left = Qt.MouseButton.LeftButton
+    none = Qt.MouseButton.NoButton
+    return ([mouse_event(QEvent.Type.MouseButtonPress, *path[0], left, left)] +
+            [mouse_event(QEvent.Type.MouseMove, x, y, none, left)
+             for x, y in path[1:]] +
+            [mouse_event(QEvent.Type.MouseButtonRelease, *path[-1], left,
+                         none)])
+
+
+def percentile(samples, fraction):
+    """
+    Returns sample below which a fraction of samples fall
+
+    Parameters
+    ----------
+    samples : list
+        Sorted measurements
+    fraction : float
+        Fraction between 0 and 1
+
+    Returns
+    ----------
+    float
+        Nearest-rank percentile of the samples
+    """
+    index = min(len(samples) - 1, math.ceil(fraction * len(samples)) - 1)
+    return samples[max(index, 0)]
+
+
+def peak_rss():
+    """
+    Returns peak resident memory of the process
+
+    Returns
+    ----------
+    int
+        Largest resident set size so far in bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_scenario(app, canvas, steps):
+    """
+    Times each step, including the repaints and timers
+    it triggers, and returns the scenario metrics
+
+    Parameters
+    ----------
+    app : QApplication
+        Application whose pending events are processed
+        after each step
+    canvas : PaintCanvas
+        Canvas whose repainted pixels are counted
+    steps : list
+        Functions each delivering one event
+
+    Returns
+    ----------
+    dict
+        Events per second, latency percentiles in
+        milliseconds, repainted pixels, and peak RSS
+    """
+    app.processEvents()
+    repainted = canvas.repainted_pixels
+    latencies = []
+    start = time.perf_counter()
+    for step in steps:
+        step_start = time.perf_counter()
+        step()
+        app.processEvents()
+        latencies.append(time.perf_counter() - step_start)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'events': len(steps),
+        'events_per_second': len(steps) / elapsed,
+        'latency_ms': {name: percentile(latencies, fraction) * 1000
+                       for name, fraction in (('p50', 0.5), ('p95', 0.95),
+                                              ('p99', 0.99), ('max', 1))},
+        'repainted_pixels': canvas.repainted_pixels - repainted,
+        'peak_rss_bytes': peak_rss(),
+    }
+
+
+def benchmark_scenarios(app, window, count=2000):
+    """
+    Runs every stroke scenario and the window resize
+    scenario against a fresh document
+
+    Parameters
+    ----------
+    app : QApplication
+        Application delivering the events
+    window : AppWindow
+        App window whose canvas receives the events
+    count : int
+        Number of events in each stroke
+
+    Returns
+    ----------
+    dict
+        Scenario metrics keyed by scenario name
+    """
+    canvas = window.canvas()
+    path = stroke_path(count, canvas.tiles.width, canvas.tiles.height)
+    events = stroke_events(path)
+
+    results = {}
+    for name, tool, size in STROKE_SCENARIOS:
+        canvas.tiles.clear()
+        canvas.mipmaps.clear()
+        canvas.history = canvas.layers.history = History()
+        for layer in canvas.layers.layers:
+            layer.tiles.history = canvas.history
+        canvas.select_tool_size(tool, size)
+        canvas.renderer.spray_engine.seed(0)
+        steps = [lambda event=event: app.sendEvent(canvas, event)
+                 for event in events]
+        results[name] = run_scenario(app, canvas, steps)
+
+    sizes = [RESIZE_SIZES[i % len(RESIZE_SIZES)] for i in range(count // 20)]
+    steps = [lambda size=size: window.resize(*size) for size in sizes]
+    results['Window resize'] = run_scenario(app, canvas, steps)
+    window.resize(*RESIZE_SIZES[0])
+    return results
+
+
+def compare_results(before, after):
+    """
+    Prints change in events per second and p95 latency
+    for scenarios found in both result sets
+
+    Parameters
+    ----------
+    before : dict
+        Scenario metrics from an earlier run
+    after : dict
+        Scenario metrics from this run
+    """
+    for name, metrics in after.items():
+        if name not in before:
+            continue
+        rate = (metrics['events_per_second'] /
+                before[name]['events_per_second'])
+        latency = (metrics['latency_ms']['p95'] /
+                   max(before[name]['latency_ms']['p95'], 1e-9))
+        print(f'{name}: {rate:.2f}x events/sec, {latency:.2f}x p95 latency')
+
+
+def events_per_second(handler, events):
+    """
+    Times handler over every event and returns the rate
+
+    Parameters
+    ----------
+    handler : function
+        Event handler called once per event
+    events : list
+        Synthetic events passed to handler
+
+    Returns
+    ----------
+    float
+        Number of events handled per second
+    """
+    start = time.perf_counter()
+    for event in events:
+        handler(event)
+    return len(events) / (time.perf_counter() - start)
+
+
+def benchmark_status_updates(window, count=2000):
+    """
+    Compares status bar cost per mouse move event before
+    and after moving updates into the status display
+
+    Parameters
+    ----------
+    window : AppWindow
+        App window whose canvas receives the events
+    count : int
+        Number of mouse move events to time
+
+    Returns
+    ----------
+    dict
+        Events per second for each status bar approach
+    """
+    canvas = window.canvas()
+    status_bar = window.statusBar
+    events = [mouse_move_event(i % 400, i % 300) for i in range(count)]
+
+    # Per-event status bar update the canvas used previously
+    def legacy_status_update(event):
+        mouse_position = event.pos()
+        mouse_text = (f'     Mouse at {mouse_position.x()}, ' +
+                      f'{mouse_position.y()}     ')
+        canvas.status_display.mouse_label.setText(mouse_text)
+        status_bar.addPermanentWidget(canvas.status_display.mouse_label)
+
+        tool_text = (f'     Tool: {canvas.renderer.tool_selected}, ' +
+                     f'Size: {canvas.renderer.pen_width}px, ' +
+                     f'Color: {canvas.renderer.color_selected}     ')
+        canvas.status_display.tool_label.setText(tool_text)
+        status_bar.addWidget(canvas.status_display.tool_label)
+
+    return {
+        'before': events_per_second(legacy_status_update, events),
+        'after': events_per_second(canvas.mouseMoveEvent, events),
+    }
+
+
+def benchmark_tool_batches(window, count=2000):
+    """
+    Compares draw cost per batch for the pencil and
+    each spray size along the same stroke
+
+    Parameters
+    ----------
+    window : AppWindow
+        App window whose canvas draws the batches
+    count : int
+        Number of batches drawn per tool
+
+    Returns
+    ----------
+    dict
+        Batches per second keyed by tool and size
+    """
+    canvas = window.canvas()
+    batches = [[QPoint(100 + (i * 4 + n) % 600, 100 + (i * 3 + n) % 400)
+                for n in range(4)] for i in range(count)]
+    tools = [('Pencil', 4)] + [('Spray', size) for size in range(1, 5)]
+
+    results = {}
+    for tool, size in tools:
+        canvas.select_tool_size(tool, size)
+        canvas.renderer.spray_engine.seed(0)
+        canvas.renderer.begin_stroke(batches[0][0])
+        results[f'{tool} {2 * size}px'] = events_per_second(canvas.draw,
+                                                            batches)
+    canvas.tiles.clear()
+    canvas.mipmaps.clear()
+    return results
+
+
+def benchmark_smoothing(count=2000, batch_size=4):
+    """
+    Compares line segments drawn and draw time for the
+    same pencil stroke at each smoothing level
+
+    Parameters
+    ----------
+    count : int
+        Number of mouse positions in the stroke
+    batch_size : int
+        Mouse positions drawn per batch
+
+    Returns
+    ----------
+    dict
+        Line segments, points kept, and milliseconds
+        keyed by smoothing level
+    """
+    path = [QPoint(round(x), round(y))
+            for x, y in stroke_path(count, 800, 600)]
+    results = {}
+    for level, tolerance in SMOOTHING_LEVELS.items():
+        renderer = StrokeRenderer(TileStore(800, 600))
+        renderer.smoothing = tolerance
+        start = time.perf_counter()
+        renderer.begin_stroke(path[0])
+        for index in range(1, count, batch_size):
+            renderer.draw(path[index:index + batch_size])
+        renderer.end_stroke()
+        milliseconds = (time.perf_counter() - start) * 1000
+
+        # Without smoothing every mouse position is a vertex
+        smoother = renderer.smoother
+        if tolerance > 0:
+            results[level] = {'segments': smoother.segments,
+                              'points_kept': smoother.points_kept,
+                              'milliseconds': milliseconds}
+        else:
+            results[level] = {'segments': count - 1, 'points_kept': count,
+                              'milliseconds': milliseconds}
+    return results
+
+
+def benchmark_brushes(count=2000, size=8):
+    """
+    Times each brush preset drawing one mouse position at
+    a time, as it would at a high input rate
+
+    Parameters
+    ----------
+    count : int
+        Number of mouse positions in the stroke
+    size : int
+        Brush size tier as listed in the brush menu
+
+    Returns
+    ----------
+    dict
+        Mouse positions per second and dab cache hits and
+        misses keyed by brush preset
+    """
+    path = [QPoint(round(x), round(y))
+            for x, y in stroke_path(count, 800, 600)]
+    results = {}
+    for preset in BRUSH_PRESETS:
+        renderer = StrokeRenderer(TileStore(800, 600))
+        renderer.select_tool_size('Brush', size)
+        renderer.brush_engine.select(preset)
+        renderer.begin_stroke(path[0])
+        cache = renderer.brush_engine.cache
+        rate = events_per_second(lambda point: renderer.draw([point]),
+                                 path[1:])
+        results[preset] = {'events_per_second': rate, 'hits': cache.hits,
+                           'misses': cache.misses}
+    return results
+
+
+def benchmark_flood_fill(sizes=FILL_SIZES):
+    """
+    Times bucket fills of square regions, both blank and
+    crossed by diagonal lines so the fill has to follow
+    their edges
+
+    Parameters
+    ----------
+    sizes : list
+        Width and height of each region in pixels
+
+    Returns
+    ----------
+    dict
+        Milliseconds per fill keyed by region description
+    """
+    def draw_lines(painter, size):
+        painter.setPen(QColor(0, 0, 0))
+        for offset in range(0, size, 37):
+            painter.drawLine(offset, 0, size, size - offset)
+
+    results = {}
+    for size in sizes:
+        for name, tolerance in (('blank', 0), ('lines', 16)):
+            tiles = TileStore(size, size)
+            if name == 'lines':
+                tiles.paint(tiles.rect(),
+                            lambda painter: draw_lines(painter, size))
+            start = time.perf_counter()
+            flood_fill(tiles, QPoint(1, size - 2), QColor(255, 0, 0),
+                       tolerance)
+            results[f'{size}x{size} {name}'] = ((time.perf_counter() -
+                                                 start) * 1000)
+    return results
+
+
+def benchmark_project(size=PROJECT_SIZE):
+    """
+    Times saving a drawing painted all over as a project,
+    saving it again after a small edit, and opening it
+    to show a window sized view
+
+    Parameters
+    ----------
+    size : int
+        Width and height of the drawing in pixels
+
+    Returns
+    ----------
+    dict
+        Milliseconds and bytes written for each save,
+        and milliseconds to open and show the view
+    """
+    def draw_lines(painter):
+        painter.setPen(QColor(0, 0, 0))
+        for offset in range(0, 2 * size, 37):
+            painter.drawLine(offset, 0, 0, offset)
+
+    def save(stack, project, path):
+        start = time.perf_counter()
+        before = os.path.getsize(path) if os.path.exists(path) else 0
+        job = project.snapshot(stack, path, {})
+        ProjectWorker(job).run()
+        project.saved(job)
+        return ((time.perf_counter() - start) * 1000,
+                os.path.getsize(path) - before)
+
+    stack = LayerStack(size, size, History())
+    stack.active_layer().tiles.paint(stack.rect(), draw_lines)
+    project = ProjectFile()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.qpaint')
+        results['full_save'] = save(stack, project, path)
+        stack.active_layer().tiles.paint(QRect(10, 10, 20, 20), draw_lines)
+        results['edit_save'] = save(stack, project, path)
+
+        start = time.perf_counter()
+        opened = LayerStack(800, 600, History())
+        ProjectFile().open(path, opened)
+        results['open_ms'] = (time.perf_counter() - start) * 1000
+        for key in opened.tile_keys(QRect(0, 0, 1200, 800)):
+            opened.tile(key)
+        results['view_ms'] = (time.perf_counter() - start) * 1000
+        tiles = opened.active_layer().tiles
+        results['decoded_tiles'] = len(tiles.tiles)
+        results['stored_tiles'] = len(tiles.stored)
+    return results
+
+
+def benchmark_filters(size=FILTER_SIZE):
+    """
+    Times applying each filter to a layer painted all
+    over with a doubling number of threads, and times
+    its preview
+
+    Parameters
+    ----------
+    size : int
+        Width and height of the layer in pixels
+
+    Returns
+    ----------
+    dict
+        Milliseconds keyed by filter then by thread
+        count, and 'preview' for the preview
+    """
+    def draw_lines(painter):
+        painter.setPen(QColor(200, 40, 40))
+        for offset in range(0, 2 * size, 37):
+            painter.drawLine(offset, 0, 0, offset)
+
+    threads = [1]
+    while threads[-1] * 2 <= FILTER_THREADS:
+        threads.append(threads[-1] * 2)
+    if threads[-1] != FILTER_THREADS:
+        threads.append(FILTER_THREADS)
+
+    results = {name: {} for name in FILTERS}
+    for count in threads:
+        engine = FilterEngine(count)
+        for name in FILTERS:
+            stack = LayerStack(size, size)
+            tiles = stack.active_layer().tiles
+            tiles.paint(stack.rect(), draw_lines)
+            start = time.perf_counter()
+            engine.apply(tiles, name, FILTER_VALUES[name])
+            results[name][count] = (time.perf_counter() - start) * 1000
+            if count == FILTER_THREADS:
+                preview = FilterPreview(stack, engine, name)
+                start = time.perf_counter()
+                preview.render(FILTER_VALUES[name])
+                results[name]['preview'] = ((time.perf_counter() - start) *
+                                            1000)
+        engine.pool.shutdown()
+    return results
+
+
+def benchmark_export(size=EXPORT_SIZE):
+    """
+    Times exporting a drawing with every export preset
+    one at a time and then on the thread pool
+
+    Parameters
+    ----------
+    size : tuple
+        Width and height of the drawing in pixels
+
+    Returns
+    ----------
+    dict
+        Milliseconds for each preset and in total, one
+        thread at a time and pooled
+    """
+    width, height = size
+
+    def draw_lines(painter):
+        painter.setPen(QColor(0, 0, 0))
+        for offset in range(0, width + height, 37):
+            painter.drawLine(offset, 0, 0, offset)
+
+    stack = LayerStack(width, height, History())
+    stack.active_layer().tiles.paint(stack.rect(), draw_lines)
+    image = stack.to_image()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for threads in (1, EXPORT_THREADS):
+            jobs = [(export_path(os.path.join(directory, 'benchmark'),
+                                 preset[0], preset[1]), preset)
+                    for preset in EXPORT_PRESETS.values()]
+            worker = ExportWorker(image, jobs, threads)
+            milliseconds = {}
+            worker.exported.connect(
+                lambda file_path, elapsed: milliseconds.update(
+                    {file_path: elapsed}),
+                Qt.ConnectionType.DirectConnection)
+            worker.run()
+            results[threads] = {
+                'total_ms': worker.milliseconds,
+                'presets_ms': {name: milliseconds[file_path]
+                               for name, (file_path, _) in
+                               zip(EXPORT_PRESETS, jobs)}}
+    return results
+
+
+def benchmark_documents(app, window, count=DOCUMENT_COUNT,
+                        size=DOCUMENT_SIZE, budget=DOCUMENT_BUDGET):
+    """
+    Opens documents painted all over within a small
+    memory budget, then times focusing the first again
+
+    Parameters
+    ----------
+    app : QApplication
+        Application processing paint events
+    window : AppWindow
+        App window the documents open in
+    count : int
+        Number of documents opened
+    size : int
+        Width and height of each document in pixels
+    budget : int
+        Bytes of pixels the documents may hold
+
+    Returns
+    ----------
+    dict
+        Bytes held with and without spilling, spills,
+        and milliseconds to show the first document
+    """
+    def draw_lines(painter):
+        painter.setPen(QColor(0, 0, 0))
+        for offset in range(0, 2 * size, 37):
+            painter.drawLine(offset, 0, 0, offset)
+
+    memory = window.memory
+    previous_budget, memory.budget = memory.budget, budget
+    spills = memory.spills
+    documents = []
+    results = {'resident_bytes': 0, 'unbounded_bytes': 0}
+    for _ in range(count):
+        canvas = window.new_document()
+        canvas.layers.resize(size, size)
+        canvas.tiles.paint(canvas.layers.rect(), draw_lines)
+        app.processEvents()
+        documents.append(canvas)
+        memory.enforce()
+
+        # Spills run on a worker and each one finished checks
+        # the budget again, until no more are needed
+        while memory.worker is not None:
+            app.processEvents()
+        results['resident_bytes'] = max(results['resident_bytes'],
+                                        memory.resident_bytes())
+        results['unbounded_bytes'] += size * size * 4
+    results['spills'] = memory.spills - spills
+
+    start = time.perf_counter()
+    window.tabs.setCurrentWidget(documents[0])
+    documents[0].repaint()
+    results['refocus_ms'] = (time.perf_counter() - start) * 1000
+
+    for canvas in documents:
+        memory.remove(canvas)
+        window.tabs.removeTab(window.tabs.indexOf(canvas))
+        canvas.deleteLater()
+    memory.budget = previous_budget
+    app.processEvents()
+    return results
+
+
+def benchmark_selection(app, window, count=200,
+                        document=SELECTION_DOCUMENT, sizes=SELECTION_SIZES):
+    """
+    Drags square selections of growing size across a
+    drawing shown to fit the window
+
+    Parameters
+    ----------
+    app : QApplication
+        Application processing paint events
+    window : AppWindow
+        App window the drawing opens in
+    count : int
+        Mouse moves of each drag
+    document : int
+        Width and height of the drawing in pixels
+    sizes : list
+        Side in pixels of each selection
+
+    Returns
+    ----------
+    dict
+        Drag metrics as returned by run_scenario and
+        milliseconds to lift and to drop the selection,
+        keyed by selection side
+    """
+    def draw_lines(painter):
+        painter.setPen(QColor(0, 0, 0))
+        for offset in range(0, 2 * document, 37):
+            painter.drawLine(offset, 0, 0, offset)
+
+    def send(event_type, x, y, buttons):
+        # Document position to the widget position over it
+        rect = canvas.view.to_widget_rect(QRect(x, y, 1, 1))
+        event = mouse_event(event_type, rect.center().x(),
+                            rect.center().y(), Qt.MouseButton.LeftButton,
+                            buttons)
+        if event_type == QEvent.Type.MouseButtonPress:
+            canvas.mousePressEvent(event)
+        elif event_type == QEvent.Type.MouseMove:
+            canvas.mouseMoveEvent(event)
+        else:
+            canvas.mouseReleaseEvent(event)
+
+    canvas = window.new_document()
+    canvas.layers.resize(document, document)
+    canvas.tiles.paint(canvas.layers.rect(), draw_lines)
+    canvas.view.fit(canvas.layers.rect().size(), canvas.size())
+    canvas.select_tool_size('Select', 0)
+    app.processEvents()
+
+    results = {}
+    held = Qt.MouseButton.LeftButton
+    for size in sizes:
+        send(QEvent.Type.MouseButtonPress, 0, 0, held)
+        send(QEvent.Type.MouseMove, size, size, held)
+        send(QEvent.Type.MouseButtonRelease, size, size,
+             Qt.MouseButton.NoButton)
+
+        start = time.perf_counter()
+        send(QEvent.Type.MouseButtonPress, size // 2, size // 2, held)
+        lift_ms = (time.perf_counter() - start) * 1000
+        steps = [lambda step=step: send(
+                     QEvent.Type.MouseMove, size // 2 + step * 7,
+                     size // 2 + step * 5, held)
+                 for step in range(count)]
+        metrics = run_scenario(app, canvas, steps)
+        start = time.perf_counter()
+        send(QEvent.Type.MouseButtonRelease, size // 2 + count * 7,
+             size // 2 + count * 5, Qt.MouseButton.NoButton)
+        metrics['lift_ms'] = lift_ms
+        metrics['drop_ms'] = (time.perf_counter() - start) * 1000
+        results[size] = metrics
+        canvas.undo()
+
+    window.memory.remove(canvas)
+    window.tabs.removeTab(window.tabs.indexOf(canvas))
+    canvas.deleteLater()
+    app.processEvents()
+    return results
+
+
+def first_paint():
+    """
+    Starts the app window in this process and waits for
+    its canvas to paint
+
+    Returns
+    ----------
+    dict
+        Wall clock time of the first canvas paint, and
+        milliseconds spent building the window
+    """
+    app = QApplication([])
+    start = time.perf_counter()
+    window = AppWindow()
+    window_ms = (time.perf_counter() - start) * 1000
+
+    # Instance attribute shadows the canvas paintEvent
+    canvas = window.canvas()
+    painted = []
+    paint_event = canvas.paintEvent
+
+    def record_paint(event):
+        paint_event(event)
+        if not painted:
+            painted.append(time.time())
+
+    canvas.paintEvent = record_paint
+    window.show()
+    while not painted:
+        app.processEvents()
+    return {'painted': painted[0], 'window_ms': window_ms}
+
+
+def benchmark_startup(runs=STARTUP_RUNS):
+    """
+    Times fresh app processes from launch to the first
+    paint of the canvas
+
+    Parameters
+    ----------
+    runs : int
+        Number of processes started
+
+    Returns
+    ----------
+    dict
+        Median and fastest time to first paint, and median
+        window build time, in milliseconds
+    """
+    first_paints = []
+    window_builds = []
+    for _ in range(runs):
+        start = time.time()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__),
+                                 '--first-paint'], capture_output=True,
+                                text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        first_paints.append((result['painted'] - start) * 1000)
+        window_builds.append(result['window_ms'])
+    first_paints.sort()
+    window_builds.sort()
+    return {'first_paint_ms': first_paints[runs // 2],
+            'fastest_first_paint_ms': first_paints[0],
+            'window_ms': window_builds[runs // 2]}
+
+
+def main():
+    """ Parse command line arguments, create instance of
+        QApplication class and instance of AppWindow class
+        then run each benchmark, print the results, and
+        save them as JSON
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark paint app drawing performance')
+    parser.add_argument('-n', '--events', type=int, default=2000,
+                        help='mouse events per stroke scenario')
+    parser.add_argument('-o', '--output', default='benchmark_results.json',
+                        help='JSON file results are saved to')
+    parser.add_argument('-c', '--compare',
+                        help='JSON results of an earlier run to compare')
+    parser.add_argument('--first-paint', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Read when the QApplication is created, and inherited by
+    # the child processes started by benchmark_startup
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    # Child process started by benchmark_startup
+    if args.first_paint:
+        print(json.dumps(first_paint()))
+        return
+
+    results = benchmark_startup()
+    print(f'Startup: {results["first_paint_ms"]:.0f} ms to first paint, ' +
+          f'fastest {results["fastest_first_paint_ms"]:.0f} ms, ' +
+          f'window built in {results["window_ms"]:.1f} ms')
+
+    app = QApplication([])
+    window = AppWindow()
+    window.show()
+    app.processEvents()
+
+    # Scenarios run first as peak RSS only ever grows and the
+    # legacy status bar comparison below uses a lot of memory
+    scenarios = benchmark_scenarios(app, window, args.events)
+    for name, metrics in scenarios.items():
+        latency = metrics['latency_ms']
+        print(f'{name}: {metrics["events_per_second"]:.0f} events/sec, ' +
+              f'p50 {latency["p50"]:.3f} ms, p95 {latency["p95"]:.3f} ms, ' +
+              f'p99 {latency["p99"]:.3f} ms, ' +
+              f'{metrics["repainted_pixels"]} px repainted, ' +
+              f'peak RSS {metrics["peak_rss_bytes"] / 2 ** 20:.0f} MiB')
+
+    for tool, rate in benchmark_tool_batches(window).items():
+        print(f'{tool}: {rate:.0f} batches/sec')
+
+    for level, metrics in benchmark_smoothing().items():
+        print(f'Smoothing {level}: {metrics["segments"]} segments through ' +
+              f'{metrics["points_kept"]} kept points, ' +
+              f'{metrics["milliseconds"]:.1f} ms')
+
+    for preset, metrics in benchmark_brushes().items():
+        status = ('keeps up' if metrics['events_per_second'] >=
+                  BRUSH_INPUT_RATE else 'falls behind')
+        print(f'Brush 16px {preset}: ' +
+              f'{metrics["events_per_second"]:.0f} events/sec ' +
+              f'({status} at {BRUSH_INPUT_RATE} Hz), ' +
+              f'{metrics["hits"]} dab cache hits, ' +
+              f'{metrics["misses"]} misses')
+
+    for region, milliseconds in benchmark_flood_fill().items():
+        print(f'Bucket fill {region}: {milliseconds:.1f} ms')
+
+    results = benchmark_project()
+    for name, label in (('full_save', 'saved'),
+                        ('edit_save', 'saved after a small edit')):
+        milliseconds, written = results[name]
+        print(f'Project {PROJECT_SIZE}x{PROJECT_SIZE} {label}: ' +
+              f'{milliseconds:.0f} ms, {written / 1024:.0f} KiB written')
+    print(f'Project opened in {results["open_ms"]:.1f} ms, view shown ' +
+          f'after {results["view_ms"]:.1f} ms decoding ' +
+          f'{results["decoded_tiles"]} tiles, ' +
+          f'{results["stored_tiles"]} left compressed')
+
+    for name, timings in benchmark_filters().items():
+        single = timings[1]
+        scaling = ', '.join(f'{count} threads {milliseconds:.0f} ms ' +
+                            f'({single / milliseconds:.1f}x)'
+                            for count, milliseconds in timings.items()
+                            if count != 'preview')
+        print(f'{name} {FILTER_SIZE}x{FILTER_SIZE}: {scaling}, ' +
+              f'preview {timings["preview"]:.0f} ms')
+
+    for threads, metrics in benchmark_export().items():
+        presets = ', '.join(f'{name} {milliseconds:.0f} ms' for name,
+                            milliseconds in metrics['presets_ms'].items())
+        print(f'Export {EXPORT_SIZE[0]}x{EXPORT_SIZE[1]} on {threads} ' +
+              f'threads: {metrics["total_ms"]:.0f} ms ({presets})')
+
+    results = benchmark_documents(app, window)
+    print(f'{DOCUMENT_COUNT} documents {DOCUMENT_SIZE}x{DOCUMENT_SIZE}: ' +
+          f'{results["resident_bytes"] / 2 ** 20:.0f} MiB held of ' +
+          f'{results["unbounded_bytes"] / 2 ** 20:.0f} MiB painted, ' +
+          f'{results["spills"]} spills, first refocused in ' +
+          f'{results["refocus_ms"]:.1f} ms')
+
+    for size, metrics in benchmark_selection(app, window).items():
+        latency = metrics['latency_ms']
+        print(f'Selection {size}x{size} drag: p50 {latency["p50"]:.2f} ms, ' +
+              f'p95 {latency["p95"]:.2f} ms, lifted in ' +
+              f'{metrics["lift_ms"]:.0f} ms, dropped in ' +
+              f'{metrics["drop_ms"]:.0f} ms')
+
+    results = benchmark_status_updates(window)
+    print(f'Status updates: {results["before"]:.0f} events/sec before, ' +
+          f'{results["after"]:.0f} events/sec after')
+
+    with open(args.output, 'w') as output_file:
+        json.dump(scenarios, output_file, indent=2)
+    print(f'Results saved to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as compare_file:
+            compare_results(json.load(compare_file), scenarios)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import (QPoint, QRect)
+from image_buffer import pixel_array
+from collections import OrderedDict
+import math
+import numpy
+
+""" Brush engine for the PyQt6 Paint Application.
+    Paints brush strokes as round dabs stamped along the
+    path at a fixed spacing. Each dab is rendered once per
+    shape, size, color, and hardness into a premultiplied
+    image and kept in a least recently used cache with a
+    memory cap, so stamping a dab is a plain image blit.
+"""
+
+# Shape and hardness of each brush offered in the brush menu
+BRUSH_PRESETS = {
+    'Hard Round': ('round', 0.9),
+    'Soft Round': ('round', 0.2),
+    'Textured': ('textured', 0.6),
+}
+
+# Distance between dabs as a fraction of the brush size
+DAB_SPACING = 0.25
+
+# Most bytes of dab images kept in the cache
+DAB_CACHE_BYTES = 8 * 2 ** 20
+
+# Fraction of a textured dab's pixels covered by bristles,
+# and the alpha left between them
+TEXTURE_COVERAGE = 0.6
+TEXTURE_FLOOR = 0.15
+
+
+def render_dab(shape, size, rgba, hardness):
+    """
+    Renders a dab image
+
+    Parameters
+    ----------
+    shape : str
+        'round' or 'textured'
+    size : int
+        Diameter in pixels
+    rgba : tuple
+        Red, green, blue, and alpha values of the color
+    hardness : float
+        Fraction of the radius painted at full strength
+        before the edge fades out
+
+    Returns
+    ----------
+    QImage
+        Premultiplied ARGB32 dab image
+    """
+    # Alpha fades from the hard core to the edge, and always
+    # over at least a pixel so hard dabs are antialiased
+    radius = size / 2
+    offsets = numpy.arange(size) + 0.5 - radius
+    distance = numpy.hypot(offsets[None, :], offsets[:, None]) / radius
+    fade = max(1 - hardness, 1 / radius)
+    alpha = numpy.clip((1 - distance) / fade, 0, 1)
+    alpha = alpha * alpha * (3 - 2 * alpha)
+
+    # Texture is seeded by size so strokes render the same
+    # every time
+    if shape == 'textured':
+        grain = numpy.random.default_rng(size).random((size, size))
+        alpha *= numpy.where(grain < TEXTURE_COVERAGE, 1, TEXTURE_FLOOR)
+
+    red, green, blue, opacity = rgba
+    alpha = alpha * (opacity / 255)
+    image = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    pixel_array(image)[:] = (
+        (numpy.rint(alpha * 255).astype(numpy.uint32) << 24) |
+        (numpy.rint(alpha * red).astype(numpy.uint32) << 16) |
+        (numpy.rint(alpha * green).astype(numpy.uint32) << 8) |
+        numpy.rint(alpha * blue).astype(numpy.uint32))
+    return image
+
+
+class DabCache:
+    """ A class to represent a Dab Cache
+
+        ...
+
+        Attributes
+        ----------
+        max_bytes : int
+            Most bytes of dab images kept
+        images : OrderedDict
+            Dab images keyed by (shape, size, rgba,
+            hardness), least recently used first
+        bytes : int
+            Bytes of dab images kept
+        hits : int
+            Dabs found in the cache
+        misses : int
+            Dabs rendered because they were not cached
+
+        Methods
+        ----------
+        dab(shape, size, rgba, hardness):
+            Returns a dab image, rendering it if it is not
+            cached
+        clear():
+            Drops every cached dab
+    """
+
+    def __init__(self, max_bytes=DAB_CACHE_BYTES):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            max_bytes : int
+                Most bytes of dab images kept
+        """
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def dab(self, shape, size, rgba, hardness):
+        """
+        Returns a dab image, rendering it if it is not
+        cached
+
+        Parameters
+        ----------
+        shape : str
+            'round' or 'textured'
+        size : int
+            Diameter in pixels
+        rgba : tuple
+            Red, green, blue, and alpha values of the color
+        hardness : float
+            Fraction of the radius painted at full strength
+
+        Returns
+        ----------
+        QImage
+            Premultiplied ARGB32 dab image
+        """
+        key = (shape, size, rgba, hardness)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return image
+
+        self.misses += 1
+        image = render_dab(shape, size, rgba, hardness)
+        self.images[key] = image
+        self.bytes += image.sizeInBytes()
+
+        # Evict least recently used dabs, never the new one
+        while self.bytes > self.max_bytes and len(self.images) > 1:
+            _, evicted = self.images.popitem(last=False)
+            self.bytes -= evicted.sizeInBytes()
+        return image
+
+    def clear(self):
+        """
+        Drops every cached dab
+        """
+        self.images = OrderedDict()
+        self.bytes = 0
+
+
+class BrushEngine:
+    """ A class to represent a Brush Engine
+
+        ...
+
+        Attributes
+        ----------
+        cache : DabCache
+            Dab images shared by every brush
+        preset : str
+            Name of the selected brush in BRUSH_PRESETS
+        spacing : float
+            Distance between dabs as a fraction of the size
+        distance_left : float
+            Distance along the path to the next dab
+
+        Methods
+        ----------
+        select(preset):
+            Selects a brush preset
+        begin_stroke():
+            Places the next dab at the start of the path
+        dab(size, color):
+            Returns the dab of the selected brush
+        dab_positions(path, size, carry):
+            Returns the centres of dabs along a path
+        stamp(tiles, path, size, color):
+            Stamps dabs along a path into tiles
+        draw(painter, path, size, color):
+            Stamps dabs along a path with a painter without
+            moving on the stroke
+    """
+
+    def __init__(self, cache=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            cache : DabCache
+                Dab images shared by every brush, a new
+                cache if None
+        """
+        self.cache = DabCache() if cache is None else cache
+        self.preset = 'Hard Round'
+        self.spacing = DAB_SPACING
+        self.distance_left = 0
+
+    def select(self, preset):
+        """
+        Selects a brush preset
+
+        Parameters
+        ----------
+        preset : str
+            Name of the brush in BRUSH_PRESETS
+        """
+        self.preset = preset
+
+    def begin_stroke(self):
+        """
+        Places the next dab at the start of the path
+        """
+        self.distance_left = 0
+
+    def dab(self, size, color):
+        """
+        Returns the dab of the selected brush
+
+        Parameters
+        ----------
+        size : int
+            Diameter in pixels
+        color : QColor
+            Color of the dab
+
+        Returns
+        ----------
+        QImage
+            Cached dab image
+        """
+        shape, hardness = BRUSH_PRESETS[self.preset]
+        return self.cache.dab(shape, max(size, 1), color.getRgb(), hardness)
+
+    def dab_positions(self, path, size, carry=True):
+        """
+        Returns the centres of dabs along a path
+
+        Parameters
+        ----------
+        path : list
+            QPoint or QPointF positions the path runs
+            through
+        size : int
+            Diameter in pixels
+        carry : bool
+            Whether to continue the spacing from the last
+            path and keep it for the next one
+
+        Returns
+        ----------
+        list
+            (x, y) dab centres in document pixels
+        """
+        step = max(size * self.spacing, 1)
+        distance_left = self.distance_left if carry else 0
+        positions = []
+        previous = (path[0].x(), path[0].y())
+        if distance_left == 0:
+            positions.append(previous)
+            distance_left = step
+        for point in path[1:]:
+            point = (point.x(), point.y())
+            length = math.dist(previous, point)
+            travelled = distance_left
+            while travelled <= length:
+                t = travelled / length
+                positions.append((previous[0] + (point[0] - previous[0]) * t,
+                                  previous[1] + (point[1] - previous[1]) * t))
+                travelled += step
+            distance_left = travelled - length
+            previous = point
+        if carry:
+            self.distance_left = distance_left
+        return positions
+
+    def stamp(self, tiles, path, size, color):
+        """
+        Stamps dabs along a path into tiles
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Tiles the dabs are painted into
+        path : list
+            QPoint or QPointF positions continuing the
+            stroke from the last path
+        size : int
+            Diameter in pixels
+        color : QColor
+            Color of the dabs
+
+        Returns
+        ----------
+        QRect
+            Document area changed, empty if no dab fell on
+            this part of the path
+        """
+        positions = self.dab_positions(path, size)
+        if not positions:
+            return QRect()
+        dab = self.dab(size, color)
+        corners = [QPoint(round(x - size / 2), round(y - size / 2))
+                   for x, y in positions]
+        xs = [corner.x() for corner in corners]
+        ys = [corner.y() for corner in corners]
+        dirty_rect = QRect(QPoint(min(xs), min(ys)),
+                           QPoint(max(xs) + dab.width() - 1,
+                                  max(ys) + dab.height() - 1))
+
+        # Group dabs by the tiles they touch, so each tile is
+        # painted once with only the dabs that land on it
+        keys = tiles.tile_keys(dirty_rect)
+        if len(keys) == 1:
+            tile_corners = {keys[0]: corners}
+        else:
+            tile_size = tiles.tile_size
+            tile_corners = {}
+            for corner, x, y in zip(corners, xs, ys):
+                if x >= tiles.width or y >= tiles.height:
+                    continue
+                columns = range(max(x, 0) // tile_size,
+                                (min(x + dab.width(), tiles.width) - 1) //
+                                tile_size + 1)
+                rows = range(max(y, 0) // tile_size,
+                             (min(y + dab.height(), tiles.height) - 1) //
+                             tile_size + 1)
+                for row in rows:
+                    for column in columns:
+                        tile_corners.setdefault((column, row),
+                                                []).append(corner)
+
+        for key, corners in tile_corners.items():
+            def paint_dabs(painter, corners=corners):
+                for corner in corners:
+                    painter.drawImage(corner, dab)
+
+            tiles.paint_tile(key, paint_dabs)
+        return dirty_rect
+
+    def draw(self, painter, path, size, color):
+        """
+        Stamps dabs along a path with a painter without
+        moving on the stroke
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter in document coordinates
+        path : list
+            QPoint or QPointF positions the path runs
+            through
+        size : int
+            Diameter in pixels
+        color : QColor
+            Color of the dabs
+        """
+        dab = self.dab(size, color)
+        for x, y in self.dab_positions(path, size, carry=False):
+            painter.drawImage(QPoint(round(x - size / 2), round(y - size / 2)),
+                              dab)
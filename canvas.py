@@ -1,9 +1,42 @@
 from PyQt6.QtWidgets import (QLabel, QFileDialog, QMessageBox, QSizePolicy,
-                             QColorDialog)
-from PyQt6.QtGui import (QMouseEvent, QPixmap, QPainter, QPaintEvent,
-                         QResizeEvent, QPen, QColor)
-from PyQt6.QtCore import (Qt, QPoint, QRect)
-import random
+                             QColorDialog, QDialog)
+from PyQt6.QtGui import (QMouseEvent, QPainter, QPaintEvent,
+                         QResizeEvent, QWheelEvent, QRegion)
+from PyQt6.QtCore import (Qt, QPointF, QRect, QRectF, QSize, QTimer)
+from stroke_engine import StrokeEngine
+from stroke_renderer import StrokeRenderer
+from stroke_smoother import SMOOTHING_LEVELS
+from layer_stack import LayerStack
+from history import History
+from save_worker import SaveWorker
+from export_pipeline import (ExportWorker, EXPORT_PRESETS, export_path)
+from project_file import (ProjectFile, ProjectWorker, PROJECT_FILTER,
+                          is_project)
+from image_loader import ImageLoader
+from mipmap_cache import MipmapCache
+from view_transform import ViewTransform
+from profiler import Profiler
+from autosave import (Autosave, journal_path)
+from filter_engine import (FILTERS, FilterPreview)
+from filter_dialog import FilterDialog
+from selection_tool import (SelectionTool, SELECTION_MODES)
+import os
+import time
+
+# Size in pixels of a new blank document
+DOCUMENT_WIDTH = 800
+DOCUMENT_HEIGHT = 600
+
+# Zoom factor applied per wheel notch or zoom action
+ZOOM_STEP = 1.25
+
+# Smoothing level pencil and brush strokes start with
+DEFAULT_SMOOTHING = 'Medium'
+
+# File dialog filters of the formats that can be opened and
+# saved
+FILE_FILTERS = (f'All Files(*);; {PROJECT_FILTER};; PNG Files(*.png);; ' +
+                'JPG Files(*.jpg)')
 
 
 class PaintCanvas(QLabel):
@@ -25,40 +58,167 @@ class PaintCanvas(QLabel):
             while maintaining user drawing on canvas
         mouseMoveEvent(event: QMouseEvent):
             Event handler tracks mouse movement on canvas,
-            updates location in status bar, and calls
-            draw function
+            updates location in status bar, pans the view,
+            reshapes or drags the selection, and queues
+            mouse location for the stroke engine
         mousePressEvent(event: QMouseEvent):
             Event handler updates drawing status and last
-            mouse location on canvas when mouse pressed
+            mouse location on canvas when mouse pressed,
+            fills when the bucket is selected, or selects
+            when the select tool is
+        wheelEvent(event: QWheelEvent):
+            Event handler zooms the view around the mouse
+            with Ctrl held, otherwise pans the view
+        zoom_view(factor, anchor):
+            Zooms the view keeping anchor point fixed
+        reset_view():
+            Returns view to actual size with no pan
         mouseReleaseEvent(event: QMouseEvent):
-            Event handler updates drawing status when
-            mouse released
+            Event handler updates drawing status and flushes
+            queued stroke, or drops a dragged selection into
+            the layer, when mouse released
         draw(points):
-            Handles mouse location input to generate drawing
-            on canvas based on drawing status, eraser status,
-            and tool type selected
+            Draws batch of mouse locations with the stroke
+            renderer and marks the changed area for repaint
+        record_stroke(point):
+            Starts recording a stroke for the project file
+        add_damage(rect):
+            Merges rectangle into damage region to be
+            repainted on next frame
+        add_view_damage(rect):
+            Repaints document area on next frame without
+            invalidating cached tiles
+        update_preview():
+            Repaints the part of a smoothed stroke not
+            drawn into the tiles yet
+        flush_damage():
+            Schedules repaint of damage region accumulated
+            since last frame
         paintEvent(event: QPaintEvent):
-            Event handler updates pixmap to render drawing
-            on canvas
+            Event handler renders document tiles inside
+            the damaged area of the canvas
         select_tool_size(self, tool, size):
-            Sets variables for eraser status, tool type,
+            Sets stroke renderer eraser status, tool type,
             pen width, and tool color based on user selection
             then updates status bar
-        new_file():
-            Generates new blank canvas after prompting user
-            to save existing drawing
-        open_file():
-            Allows user to open existing image file
+        press_selection(point, modifiers):
+            Starts dragging the selection, or drawing a
+            new one
+        release_selection():
+            Resamples the dragged selection into the layer
+        deselect():
+            Drops the selection
+        set_smoothing(level):
+            Sets how much pencil and brush strokes are
+            smoothed
+        select_brush(preset):
+            Selects the brush tool with a brush preset
+        refresh_layers():
+            Paints into the active layer and repaints the
+            document after layers change
+        layers_locked():
+            Returns whether the active layer must stay put
+        add_layer():
+            Adds an empty layer above the active layer
+        delete_layer():
+            Removes the active layer unless it is the last
+        move_layer(offset):
+            Moves the active layer up or down the stack
+        select_layer(offset):
+            Makes the layer above or below the active
+            layer active
+        toggle_layer_visibility():
+            Shows or hides the active layer
+        set_layer_opacity(opacity):
+            Sets the active layer's opacity
+        set_layer_blend_mode(blend_mode):
+            Sets the active layer's blend mode
+        open_filter(name):
+            Previews a filter on the active layer while its
+            parameters change, applying it once accepted
+        preview_filter(values):
+            Shows the downscaled document with the filter
+            previewed
+        apply_filter(name, values):
+            Filters the active layer at full resolution
+        end_filter():
+            Stops previewing a filter
+        undo():
+            Restores tiles changed by the last stroke
+        redo():
+            Restores tiles changed by the last undone stroke
+        refresh_tiles(tiles, keys):
+            Repaints tiles restored from history
+        document_name():
+            Returns the name shown on the document's tab
+        untouched():
+            Returns whether the document is still the blank
+            drawing it started as
+        open_file(file_path):
+            Allows user to open existing image or project
+            file
+        open_project(file_path):
+            Replaces the document with a project file
+        load_header(size):
+            Sizes document for image being opened
+        load_preview(image):
+            Shows downscaled preview of image being opened
+        load_band(top, image):
+            Copies full detail band into document
+        load_finished():
+            Finishes opening image
+        load_failed(message):
+            Reports image could not be opened
+        cancel_load():
+            Stops image still being opened
         save_file_as():
             Allows user to save drawing not previously saved
         save_file():
             Allows user to update saving a previously
             saved drawing
-        exit_programs():
-            Exits app after prompting user to save drawing
+        start_save(file_path):
+            Snapshots drawing and saves it in the background,
+            queueing it if a save is already running
+        run_save(image, file_path):
+            Starts a worker thread saving an image or the
+            project
+        save_progress(percent):
+            Shows save progress in status bar
+        save_finished(file_path):
+            Reports save completed and starts queued save
+        save_failed(file_path, message):
+            Reports save error and starts queued save
+        start_pending_save():
+            Starts queued save once the running save is done
+        export_file():
+            Allows user to export drawing with every export
+            preset
+        start_export(file_path, presets):
+            Snapshots drawing and exports it in the
+            background, queueing it if an export is running
+        run_export(image, jobs):
+            Starts a worker thread exporting a snapshot
+        export_progress(percent):
+            Shows export progress in status bar
+        export_finished(file_path, milliseconds):
+            Reports a file exported and the time it took
+        export_failed(file_path, message):
+            Logs a file could not be exported
+        export_done(worker):
+            Reports time taken by an export and starts
+            queued export
+        wait_for_saves():
+            Blocks until running and queued saves and
+            exports finish
+        recover_autosave():
+            Restores drawing from the autosave journal left
+            behind by a crash
+        close_document():
+            Closes the document after prompting user to
+            save drawing
     """
 
-    def __init__(self, parent):
+    def __init__(self, parent, number=1, journal_lock=None):
         """
         Constructs all the attributes for the object
 
@@ -67,9 +227,17 @@ class PaintCanvas(QLabel):
             parent : class
                 Attributes and methods of the parent class
                 'AppWindow' in which the object instance is created
+            number : int
+                Number of the document among those open,
+                naming it until saved and its autosave journal
+            journal_lock : QLockFile
+                Lock held on the autosave journal, None if
+                not locked
         """
         super().__init__(parent)
         self.parent_window = parent
+        self.number = number
+        self.journal_lock = journal_lock
         self.init_UI()
 
     def init_UI(self):
@@ -77,26 +245,86 @@ class PaintCanvas(QLabel):
         Sets up initial state of the object
         """
 
-        # Set up and configure pixmap
-        self.pixmap = QPixmap(400, 400)
-        self.pixmap.fill(Qt.GlobalColor.white)
-        self.setPixmap(self.pixmap)
+        # Set up undo history recording tiles before each stroke
+        self.history = History()
+
+        # Set up layers, each allocating tiles only once painted,
+        # with the active layer's tiles painted into
+        self.layers = LayerStack(DOCUMENT_WIDTH, DOCUMENT_HEIGHT,
+                                 self.history)
+        self.tiles = self.layers.active_layer().tiles
         self.setMinimumSize(10, 10)
+
+        # Set up zoom / pan view and downscaled cache of the
+        # composited layers
+        self.view = ViewTransform()
+        self.mipmaps = MipmapCache(self.layers)
+        self.pan_position = None
         self.setMouseTracking(True)
 
         # Set initial variables & statuses
-        self.eraser_status = False
         self.drawing_status = False
-        self.eraser_size = 4
-        self.last_mouse_position = QPoint()
-        self.mouse_label = QLabel()
-        self.tool_label = QLabel()
-        self.tool_selected = 'Pencil'
-        self.pen_color = QColor(0, 0, 0)
-        self.color_selected = self.pen_color.getRgb()
-        self.pen_width = 2
         self.current_file = None
 
+        # Set up project file state, recording strokes and the
+        # tiles already saved
+        self.project = ProjectFile()
+        self.recorded_stroke = None
+
+        # Set up renderer holding tool state and drawing strokes,
+        # with the part of a smoothed stroke still being shaped
+        # drawn over the tiles
+        self.renderer = StrokeRenderer(self.tiles)
+        self.renderer.smoothing = SMOOTHING_LEVELS[DEFAULT_SMOOTHING]
+        self.preview_rect = QRect()
+
+        # Set up background save and open state
+        self.save_worker = None
+        self.pending_save = None
+        self.export_worker = None
+        self.pending_export = None
+        self.image_loader = None
+        self.preview_image = None
+        self.loaded_height = 0
+
+        # Set up filter preview, shown in place of the document
+        # while a filter's parameters change
+        self.filter_preview = None
+        self.filter_image = None
+
+        # Set up selection, lifted out of the active layer and
+        # drawn from a downscaled proxy while dragged
+        self.selection = SelectionTool()
+
+        # Set up stroke engine batching mouse input per frame
+        self.stroke_engine = StrokeEngine(self)
+
+        # Share status bar labels showing mouse and tool state with
+        # the window's other documents
+        self.status_display = self.parent_window.status_display
+        self.status_display.set_tool(self.renderer.tool_selected,
+                                     self.renderer.pen_width,
+                                     self.renderer.color_selected)
+
+        # Set up damage region merged once per frame
+        self.damage_region = QRegion()
+        self.damage_timer = QTimer(self)
+        self.damage_timer.setSingleShot(True)
+        self.damage_timer.setInterval(0)
+        self.damage_timer.timeout.connect(self.flush_damage)
+        self.repainted_pixels = 0
+
+        # Set up profiler, only timing the canvas when asked to
+        self.profiler = Profiler(self)
+        if os.environ.get('PAINT_PROFILE'):
+            self.profiler.show_overlay(True)
+        if os.environ.get('PAINT_PROFILE_DUMP'):
+            self.profiler.start_dump(os.environ['PAINT_PROFILE_DUMP'])
+
+        # Set up autosave journaling tiles changed since last checkpoint
+        self.autosave = Autosave(self, journal_path(self.number),
+                                 lock=self.journal_lock)
+
     def resizeEvent(self, event: QResizeEvent):
         """
         Event handler allows window to be resized
@@ -108,21 +336,16 @@ class PaintCanvas(QLabel):
             Inherits from PyQt6 QResizeEvent method
             for handling window resize event
         """
-        old_img = self.pixmap
-        scaled = old_img.scaled(self.width(), self.height(),
-                                Qt.AspectRatioMode.IgnoreAspectRatio,
-                                Qt.TransformationMode.SmoothTransformation)
+        # The document keeps its own resolution, resizing
+        # only changes how much of the view is visible
         self.setSizePolicy(QSizePolicy.Policy.Preferred,
                            QSizePolicy.Policy.Preferred)
-        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.pixmap = scaled
-        self.setPixmap(self.pixmap)
 
     def mouseMoveEvent(self, event: QMouseEvent):
         """
         Event handler tracks mouse movement on canvas,
-        updates location in status bar, and calls
-        draw function
+        updates location in status bar, pans the view,
+        and calls draw function
 
         Parameters
         ----------
@@ -130,24 +353,28 @@ class PaintCanvas(QLabel):
             Inherits from PyQt6 QMouseEvent method
             for handling mouse events
         """
-        self.mouse_position = event.pos()
+        self.mouse_position = self.view.to_document(event.position())
+
+        # Pan view while middle button dragged
+        if self.pan_position is not None:
+            delta = event.position() - self.pan_position
+            self.pan_position = event.position()
+            self.view.pan(delta.x(), delta.y())
+            self.update()
 
         # Update status bar
-        mouse_text = (f'     Mouse at {self.mouse_position.x()}, ' +
-                      f'{self.mouse_position.y()}     ')
-        self.mouse_label.setText(mouse_text)
-        self.parent_window.statusBar.addPermanentWidget(self.mouse_label)
-
-        tool_text = (f'     Tool: {self.tool_selected}, ' +
-                     f'Size: {self.pen_width}px, ' +
-                     f'Color: {self.color_selected}     ')
-        self.tool_label.setText(tool_text)
-        self.parent_window.statusBar.addWidget(self.tool_label)
-
-        # Call draw method
-        if ((event.buttons() and Qt.MouseButton.LeftButton)
+        self.status_display.set_mouse_position(self.mouse_position.x(),
+                                               self.mouse_position.y())
+
+        # Transform or reshape the selection without touching
+        # pixels, otherwise queue point for the next batched draw
+        if self.selection.dragging:
+            self.add_view_damage(self.selection.drag(self.mouse_position))
+        elif self.selection.selecting:
+            self.add_view_damage(self.selection.extend(self.mouse_position))
+        elif ((event.buttons() and Qt.MouseButton.LeftButton)
                 and self.drawing_status):
-            self.draw(self.mouse_position)
+            self.stroke_engine.add_point(self.mouse_position)
 
     def mousePressEvent(self, event: QMouseEvent):
         """
@@ -160,14 +387,34 @@ class PaintCanvas(QLabel):
             Inherits from PyQt6 QMouseEvent method
             for handling mouse events
         """
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.last_mouse_position = self.mouse_position
+        if (event.button() == Qt.MouseButton.LeftButton and
+                self.image_loader is None and
+                self.renderer.tool_selected == 'Bucket'):
+            # Bucket fills once per click rather than stroking
+            point = self.view.to_document(event.position())
+            self.history.begin(self.tiles, self.record_stroke(point))
+            self.add_damage(self.renderer.fill(point))
+            self.history.end()
+        elif (event.button() == Qt.MouseButton.LeftButton and
+                self.image_loader is None and
+                self.renderer.tool_selected == 'Select'):
+            self.press_selection(self.view.to_document(event.position()),
+                                 event.modifiers())
+        elif (event.button() == Qt.MouseButton.LeftButton and
+                self.image_loader is None):
+            self.mouse_position = self.view.to_document(event.position())
+            stroke_id = self.record_stroke(self.mouse_position)
+            self.renderer.begin_stroke(self.mouse_position)
             self.drawing_status = True
+            self.history.begin(self.tiles, stroke_id)
+            self.stroke_engine.begin_stroke()
+        elif event.button() == Qt.MouseButton.MiddleButton:
+            self.pan_position = event.position()
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         """
-        Event handler updates drawing status when
-        mouse released
+        Event handler updates drawing status and flushes
+        queued stroke when mouse released
 
         Parameters
         ----------
@@ -175,54 +422,166 @@ class PaintCanvas(QLabel):
             Inherits from PyQt6 QMouseEvent method
             for handling mouse events
         """
-        if event.button() == Qt.MouseButton.LeftButton:
+        if (event.button() == Qt.MouseButton.LeftButton and
+                self.selection.dragging):
+            self.release_selection()
+        elif (event.button() == Qt.MouseButton.LeftButton and
+                self.selection.selecting):
+            self.add_view_damage(
+                self.selection.finish_select(self.layers.rect()))
+        elif event.button() == Qt.MouseButton.LeftButton:
+            self.stroke_engine.end_stroke()
+            self.add_damage(self.renderer.end_stroke())
+            self.update_preview()
+            self.history.end()
             self.drawing_status = False
+        elif event.button() == Qt.MouseButton.MiddleButton:
+            self.pan_position = None
 
-    def draw(self, points):
+    def wheelEvent(self, event: QWheelEvent):
         """
-        Handles mouse location input to generate drawing
-        on canvas based on drawing status, eraser status,
-        and tool type selected
+        Event handler zooms the view around the mouse
+        with Ctrl held, otherwise pans the view
 
         Parameters
         ----------
-        points : QPoint
-            Inherits from PyQt6 QPoint class
-            containing attributes and methods for mouse
-            position on canvas
+        event : QWheelEvent
+            Inherits from PyQt6 QWheelEvent method
+            for handling mouse wheel events
         """
-        painter = QPainter(self.pixmap)
+        delta = event.angleDelta()
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.zoom_view(ZOOM_STEP ** (delta.y() / 120), event.position())
+        else:
+            self.view.pan(delta.x() / 2, delta.y() / 2)
+            self.update()
 
-        # Set drawing type based on tool selected and
-        # eraser status
-        if (self.eraser_status is False and
-                self.tool_selected != 'Spray Paint'):
-            pen = QPen(self.pen_color, self.pen_width)
-            painter.setPen(pen)
-            painter.drawLine(self.last_mouse_position, points)
-            self.last_mouse_position = points
-        elif (self.eraser_status is False and
-                self.tool_selected == 'Spray Paint'):
-            pen = QPen(self.pen_color, 1)
-            painter.setPen(pen)
+    def zoom_view(self, factor, anchor=None):
+        """
+        Zooms the view keeping anchor point fixed
 
-            spray_particles = self.pen_width * 2
-            spray_diameter = self.pen_width
+        Parameters
+        ----------
+        factor : float
+            Amount to multiply the zoom by
+        anchor : QPointF
+            Widget position kept over the same document
+            point, centre of the canvas if None
+        """
+        if anchor is None:
+            anchor = QPointF(self.width() / 2, self.height() / 2)
+        self.view.zoom_at(factor, anchor)
+        self.update()
 
-            for n in range(spray_particles):
-                x_point = points.x() + round(random.gauss(0, spray_particles))
-                y_point = points.y() + round(random.gauss(0, spray_diameter))
-                painter.drawPoint(int(x_point), int(y_point))
-        else:
-            eraser = QRect(points.x(), points.y(),
-                           self.eraser_size, self.eraser_size)
-            painter.eraseRect(eraser)
+    def reset_view(self):
+        """
+        Returns view to actual size with no pan
+        """
+        self.view.reset()
         self.update()
 
+    def draw(self, points):
+        """
+        Draws batch of mouse locations with the stroke
+        renderer and marks the changed area for repaint
+
+        Parameters
+        ----------
+        points : list
+            List of PyQt6 QPoint objects containing mouse
+            positions on canvas queued since the last batch
+        """
+        self.add_damage(self.renderer.draw(points))
+        self.update_preview()
+        if self.recorded_stroke is not None:
+            self.project.add_points(self.recorded_stroke,
+                                    [[point.x(), point.y()]
+                                     for point in points])
+
+    def record_stroke(self, point):
+        """
+        Starts recording a stroke with the selected tool
+        for the project file, unless the drawing is saved
+        as an image, which keeps no strokes
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position the stroke starts from
+
+        Returns
+        ----------
+        int
+            Id of the stroke recorded, None if not recorded
+        """
+        self.recorded_stroke = None
+        if self.current_file is not None and not is_project(
+                self.current_file):
+            return None
+        stroke = self.renderer.stroke_record(point)
+        stroke['layer'] = self.layers.active_layer().id
+        self.project.add_stroke(stroke)
+        self.recorded_stroke = stroke
+        return stroke['id']
+
+    def add_damage(self, rect):
+        """
+        Merges rectangle into damage region to be
+        repainted on next frame
+
+        Parameters
+        ----------
+        rect : QRect or QRegion
+            Area of the document changed by a draw operation
+        """
+        rect = QRegion(rect).boundingRect()
+        if rect.isEmpty():
+            return
+        self.mipmaps.invalidate(rect)
+        self.add_view_damage(rect)
+
+    def add_view_damage(self, rect):
+        """
+        Repaints document area on next frame without
+        invalidating cached tiles
+
+        Parameters
+        ----------
+        rect : QRect
+            Area of the document to repaint
+        """
+        if rect.isEmpty():
+            return
+
+        # Pad by a pixel for smoothing at fractional zoom
+        widget_rect = self.view.to_widget_rect(rect).adjusted(-1, -1, 1, 1)
+        self.damage_region = self.damage_region.united(widget_rect)
+        if not self.damage_timer.isActive():
+            self.damage_timer.start()
+
+    def update_preview(self):
+        """
+        Repaints the part of a smoothed stroke not drawn
+        into the tiles yet, and where it was last frame
+        """
+        preview_rect = self.renderer.preview_rect()
+        self.add_view_damage(self.preview_rect)
+        self.add_view_damage(preview_rect)
+        self.preview_rect = preview_rect
+
+    def flush_damage(self):
+        """
+        Schedules repaint of damage region accumulated
+        since last frame
+        """
+        if not self.damage_region.isEmpty():
+            self.update(self.damage_region)
+            self.damage_region = QRegion()
+
     def paintEvent(self, event: QPaintEvent):
         """
-        Event handler updates pixmap to render drawing
-        on canvas
+        Event handler renders document tiles inside
+        the damaged area of the canvas
 
         Parameters
         ----------
@@ -232,14 +591,56 @@ class PaintCanvas(QLabel):
 
         """
         painter = QPainter(self)
-        target_rectangle = QRect()
         target_rectangle = event.rect()
-        painter.drawPixmap(target_rectangle, self.pixmap, target_rectangle)
+
+        # Only blit the damaged area rather than the whole canvas
+        painter.setClipRegion(event.region())
+        document_rect = self.view.to_widget_rect(self.layers.rect())
+        if not document_rect.contains(target_rectangle):
+            painter.fillRect(target_rectangle, self.palette().window())
+
+        # Draw from the mipmap level matching the zoom so
+        # downscaled views never resample full resolution tiles
+        painter.setTransform(self.view.transform())
+        painter.setClipRect(self.layers.rect(),
+                            Qt.ClipOperation.IntersectClip)
+        if self.view.zoom < 1:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        visible_rect = self.view.to_document_rect(target_rectangle)
+
+        # Preview covers rows of an opening image not loaded yet
+        if self.preview_image is not None:
+            painter.save()
+            painter.setClipRect(QRect(0, self.loaded_height,
+                                      self.layers.width, self.layers.height),
+                                Qt.ClipOperation.IntersectClip)
+            painter.drawImage(QRectF(self.layers.rect()), self.preview_image)
+            painter.restore()
+            visible_rect = visible_rect.intersected(
+                QRect(0, 0, self.layers.width, self.loaded_height))
+
+        # Filter preview stands in for the document until the
+        # filter is applied
+        if self.filter_image is not None:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(QRectF(self.layers.rect()), self.filter_image)
+        else:
+            self.mipmaps.render(painter, visible_rect, self.view.level())
+        self.renderer.draw_preview(painter)
+        self.selection.draw(painter)
+
+        # Profiling overlay stays fixed over the view
+        if self.profiler.overlay_visible:
+            painter.resetTransform()
+            painter.setClipping(False)
+            self.profiler.draw_overlay(painter)
         painter.end()
+        self.repainted_pixels += (target_rectangle.width() *
+                                  target_rectangle.height())
 
     def select_tool_size(self, tool, size):
         """
-        Sets variables for eraser status, tool type,
+        Sets stroke renderer eraser status, tool type,
         pen width, and tool color based on user selection
         then updates status bar
 
@@ -251,80 +652,505 @@ class PaintCanvas(QLabel):
             Tool size selected by user
 
         """
-        if tool == 'Spray':
-            self.eraser_status = False
-            self.tool_selected = 'Spray Paint'
-            self.pen_width = 2 * size
-        elif tool in ('Pencil', 'Brush'):
-            self.eraser_status = False
-            self.tool_selected = tool
-            self.pen_width = 2 * size
-        elif tool == 'Colors':
-            self.eraser_status = False
-            self.pen_color = QColorDialog.getColor()
-            self.color_selected = QColor.getRgb(self.pen_color)
-        elif tool == 'Eraser':
-            self.eraser_status = True
-            self.tool_selected = 'Eraser'
-            self.eraser_size = 4 * size
+        if tool == 'Colors':
+            color = QColorDialog.getColor()
+            if color.isValid():
+                self.renderer.set_color(color)
+        else:
+            self.renderer.select_tool_size(tool, size)
+        if tool == 'Select':
+            self.selection.mode = SELECTION_MODES[size]
+        elif tool != 'Colors':
+            self.deselect()
 
         # Update status bar with tool / size selection
-        tool_text = (f'     Tool: {self.tool_selected}, ' +
-                     f'Size: {self.pen_width}px, ' +
-                     f'Color: {self.color_selected}     ')
-        self.tool_label.setText(tool_text)
-        self.parent_window.statusBar.addWidget(self.tool_label)
+        self.status_display.set_tool(self.renderer.tool_selected,
+                                     self.renderer.pen_width,
+                                     self.renderer.color_selected)
 
-    def new_file(self):
-        """
-        Generates new blank canvas after prompting user
-        to save existing drawing
+    def press_selection(self, point, modifiers):
         """
-        message_text = 'Do you want to save before starting a new canvas?'
-        new_msg = QMessageBox.question(self, 'Save File', message_text,
-                                       QMessageBox.StandardButton.Save |
-                                       QMessageBox.StandardButton.Discard,
-                                       QMessageBox.StandardButton.Save)
+        Starts dragging the selection when pressed inside
+        it or with Shift or Ctrl held, otherwise starts
+        drawing a new selection
 
-        if new_msg == QMessageBox.StandardButton.Save:
-            print('Save File')
-            self.save_file()
+        Parameters
+        ----------
+        point : QPoint
+            Document position pressed
+        modifiers : Qt.KeyboardModifier
+            Keys held, Shift scaling and Ctrl rotating
+        """
+        if self.selection.grabs(point, modifiers):
+            # Lifting and dropping the selection is one undo step
+            self.drawing_status = True
+            self.history.begin(self.tiles)
+            self.add_damage(self.selection.begin_drag(point, modifiers,
+                                                      self.tiles))
+            self.add_view_damage(self.selection.bounds())
         else:
-            print('File Not Saved')
+            self.add_view_damage(self.selection.begin_select(point))
 
-        self.pixmap.fill(Qt.GlobalColor.white)
-        self.current_file = None
+    def release_selection(self):
+        """
+        Resamples the dragged selection into the layer at
+        full quality
+        """
+        start = time.perf_counter()
+        self.add_damage(self.selection.end_drag(self.tiles))
+        self.add_view_damage(self.selection.bounds())
+        self.history.end()
+        self.drawing_status = False
+        milliseconds = (time.perf_counter() - start) * 1000
+        self.status_display.show_message(
+            f'Selection resampled in {milliseconds:.0f} ms', 2000)
+
+    def deselect(self):
+        """
+        Drops the selection, leaving its pixels where they
+        were last dropped
+        """
+        if not self.selection.dragging:
+            self.add_view_damage(self.selection.clear())
+
+    def set_smoothing(self, level):
+        """
+        Sets how much pencil and brush strokes are
+        smoothed
+
+        Parameters
+        ----------
+        level : str
+            Name of the smoothing level
+        """
+        self.renderer.smoothing = SMOOTHING_LEVELS[level]
+        self.status_display.show_message(f'Stroke smoothing: {level}', 3000)
+
+    def select_brush(self, preset):
+        """
+        Selects the brush tool with a brush preset,
+        keeping the brush size
+
+        Parameters
+        ----------
+        preset : str
+            Name of the brush preset
+        """
+        self.renderer.brush_engine.select(preset)
+        if self.renderer.tool_selected != 'Brush':
+            self.select_tool_size('Brush',
+                                  max(self.renderer.pen_width // 2, 2))
+        self.status_display.show_message(f'Brush: {preset}', 3000)
+
+    def refresh_layers(self):
+        """
+        Paints into the active layer and repaints the
+        document after layers change
+        """
+        self.deselect()
+        self.tiles = self.layers.active_layer().tiles
+        self.renderer.tiles = self.tiles
+        self.mipmaps.clear()
         self.update()
 
-    def open_file(self):
+        # Count painters on the new active layer
+        if self.profiler.enabled:
+            self.profiler.disable()
+            self.profiler.enable()
+
+        layer = self.layers.active_layer()
+        hidden = '' if layer.visible else ', hidden'
+        self.status_display.show_message(
+            f'Layer {self.layers.active + 1} of {len(self.layers.layers)}: ' +
+            f'{layer.name} ({layer.blend_mode}, ' +
+            f'{round(layer.opacity * 100)}%{hidden})', 3000)
+
+    def layers_locked(self):
         """
-        Allows user to open existing image file
+        Returns whether the active layer must stay put
+
+        Returns
+        ----------
+        bool
+            True while a stroke is drawn or an image loads
+            into the active layer
         """
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, 'Open File', '',
-            'All Files(*);; PNG Files(*.png);; JPG Files(*.jpg)')
+        return self.drawing_status or self.image_loader is not None
 
-        if file_path:
-            new_img = QPixmap(file_path)
-            scaled = new_img.scaled(self.width(),
-                                    self.height(),
-                                    Qt.AspectRatioMode.KeepAspectRatio,
-                                    Qt.TransformationMode.SmoothTransformation)
-            self.pixmap = scaled
-            self.setPixmap(self.pixmap)
+    def add_layer(self):
+        """
+        Adds an empty layer above the active layer
+        """
+        if not self.layers_locked():
+            self.layers.add_layer()
+            self.refresh_layers()
+
+    def delete_layer(self):
+        """
+        Removes the active layer unless it is the last
+        """
+        if not self.layers_locked() and self.layers.delete_layer():
+            self.refresh_layers()
+
+    def move_layer(self, offset):
+        """
+        Moves the active layer up or down the stack
+
+        Parameters
+        ----------
+        offset : int
+            Positions to move, positive moves up
+        """
+        if not self.layers_locked() and self.layers.move_layer(offset):
+            self.refresh_layers()
+
+    def select_layer(self, offset):
+        """
+        Makes the layer above or below the active layer
+        active
+
+        Parameters
+        ----------
+        offset : int
+            Positions to move the selection, positive is up
+        """
+        if not self.layers_locked():
+            self.layers.set_active(self.layers.active + offset)
+            self.refresh_layers()
+
+    def toggle_layer_visibility(self):
+        """
+        Shows or hides the active layer
+        """
+        self.layers.set_visible(not self.layers.active_layer().visible)
+        self.refresh_layers()
+
+    def set_layer_opacity(self, opacity):
+        """
+        Sets the active layer's opacity
+
+        Parameters
+        ----------
+        opacity : float
+            Opacity from 0 to 1
+        """
+        self.layers.set_opacity(opacity)
+        self.refresh_layers()
+
+    def set_layer_blend_mode(self, blend_mode):
+        """
+        Sets the active layer's blend mode
+
+        Parameters
+        ----------
+        blend_mode : str
+            Name of the blend mode
+        """
+        self.layers.set_blend_mode(blend_mode)
+        self.refresh_layers()
+
+    def open_filter(self, name):
+        """
+        Previews a filter on the active layer while its
+        parameters change, applying it once accepted
+
+        Parameters
+        ----------
+        name : str
+            Key of FILTERS
+        """
+        if self.layers_locked():
+            return
+        if not FILTERS[name]:
+            # Nothing to adjust so apply straight away
+            self.apply_filter(name, [])
+            return
+
+        self.filter_preview = FilterPreview(
+            self.layers, self.parent_window.filters, name)
+        dialog = FilterDialog(self, name)
+        dialog.values_changed.connect(self.preview_filter)
+        accepted = dialog.exec() == QDialog.DialogCode.Accepted
+        self.end_filter()
+        if accepted:
+            self.apply_filter(name, dialog.values())
+
+    def preview_filter(self, values):
+        """
+        Shows the downscaled document with the filter
+        previewed on the active layer
+
+        Parameters
+        ----------
+        values : list
+            Slider values of the filter
+        """
+        if self.filter_preview is None:
+            return
+        self.filter_image = self.filter_preview.render(values)
+        self.add_view_damage(self.layers.rect())
+
+    def apply_filter(self, name, values):
+        """
+        Filters the active layer at full resolution as one
+        undoable step
+
+        Parameters
+        ----------
+        name : str
+            Key of FILTERS
+        values : list
+            Slider values of the filter
+        """
+        self.deselect()
+        start = time.perf_counter()
+        self.history.begin(self.tiles)
+        rect = self.parent_window.filters.apply(self.tiles, name, values)
+        self.history.end()
+        self.add_damage(rect)
+        milliseconds = (time.perf_counter() - start) * 1000
+        self.status_display.show_message(
+            f'{name} applied in {milliseconds:.0f} ms', 2000)
+
+    def end_filter(self):
+        """
+        Stops previewing a filter, showing the document
+        again
+        """
+        self.filter_preview = None
+        self.filter_image = None
+        self.add_view_damage(self.layers.rect())
+
+    def undo(self):
+        """
+        Restores tiles changed by the last stroke
+        """
+        self.deselect()
+        entries = self.history.undo_entries
+        if entries and entries[-1]['stroke'] is not None:
+            self.project.mark(entries[-1]['stroke'], 'undo')
+        self.refresh_tiles(*self.history.undo())
+
+    def redo(self):
+        """
+        Restores tiles changed by the last undone stroke
+        """
+        self.deselect()
+        entries = self.history.redo_entries
+        if entries and entries[-1]['stroke'] is not None:
+            self.project.mark(entries[-1]['stroke'], 'redo')
+        self.refresh_tiles(*self.history.redo())
+
+    def refresh_tiles(self, tiles, keys):
+        """
+        Repaints tiles restored from history
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Layer tiles restored, None if nothing was
+        keys : list
+            Column and row of each restored tile
+        """
+        if tiles is None:
+            return
+        if (tiles.width, tiles.height) != (self.layers.width,
+                                           self.layers.height):
+            # Restoring across an opened image resizes every layer
+            self.layers.resize(tiles.width, tiles.height)
+            self.mipmaps.clear()
+            self.update()
+            return
+        for key in keys:
+            # Restored layer may be cached below or above
+            self.layers.invalidate(tiles.tile_rect(key))
+            self.add_damage(tiles.tile_rect(key))
+
+    def document_name(self):
+        """
+        Returns the name shown on the document's tab
+
+        Returns
+        ----------
+        str
+            File name the drawing was opened from or saved
+            to, or Untitled and the document number
+        """
+        if self.current_file is None:
+            return f'Untitled {self.number}'
+        return os.path.basename(self.current_file)
+
+    def untouched(self):
+        """
+        Returns whether the document is still the blank
+        drawing it started as
+
+        Returns
+        ----------
+        bool
+            True if nothing was drawn, opened, or saved
+        """
+        return (self.current_file is None and self.image_loader is None and
+                len(self.layers.layers) == 1 and
+                not self.history.undo_entries and
+                not self.history.redo_entries)
+
+    def open_file(self, file_path=None):
+        """
+        Allows user to open existing image or project file
+
+        Parameters
+        ----------
+        file_path : str
+            File to open, asked for if None
+        """
+        if file_path is None:
+            file_path, _ = QFileDialog.getOpenFileName(
+                self, 'Open File', '', FILE_FILTERS)
+
+        if file_path and is_project(file_path):
+            self.cancel_load()
+            self.open_project(file_path)
+        elif file_path:
+            # Decode off the GUI thread, preview first then full
+            # detail band by band
+            self.cancel_load()
+            self.image_loader = ImageLoader(file_path,
+                                            self.size().expandedTo(
+                                                QSize(1, 1)), parent=self)
+            self.image_loader.header.connect(self.load_header)
+            self.image_loader.preview.connect(self.load_preview)
+            self.image_loader.band.connect(self.load_band)
+            self.image_loader.loaded.connect(self.load_finished)
+            self.image_loader.failed.connect(self.load_failed)
+            self.image_loader.start()
+
+    def open_project(self, file_path):
+        """
+        Replaces the document with the layers and tool
+        settings of a project file, decoding tiles only as
+        they come into view
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the project file
+        """
+        # Opening a project starts a new undo history
+        replaced = [layer.tiles for layer in self.layers.layers]
+        project = ProjectFile()
+        try:
+            settings = project.open(file_path, self.layers)
+        except (OSError, ValueError) as error:
+            print(f'File Not Opened: {error}')
+            QMessageBox.warning(self, 'Open File',
+                                f'Could not open {file_path}:\n{error}')
+            return
+        for tiles in replaced:
+            self.history.forget(tiles)
+        self.project = project
+        self.current_file = file_path
+
+        self.renderer.restore_tool_settings(settings)
+        self.status_display.set_tool(self.renderer.tool_selected,
+                                     self.renderer.pen_width,
+                                     self.renderer.color_selected)
+        self.view.fit(QSize(self.layers.width, self.layers.height),
+                      self.size())
+        self.refresh_layers()
+
+    def load_header(self, size):
+        """
+        Sizes document for image being opened
+
+        Parameters
+        ----------
+        size : QSize
+            Full size of the image
+        """
+        self.layers.flatten_to_background()
+        self.refresh_layers()
+        self.history.begin(self.tiles)
+        self.tiles.clear()
+        self.project = ProjectFile()
+        self.layers.resize(size.width(), size.height())
+        self.loaded_height = 0
+        self.view.fit(size, self.size())
+        self.update()
+
+    def load_preview(self, image):
+        """
+        Shows downscaled preview of image being opened
+
+        Parameters
+        ----------
+        image : QImage
+            Whole image decoded at window size
+        """
+        self.preview_image = image
+        self.update()
+
+    def load_band(self, top, image):
+        """
+        Copies full detail band into document
+
+        Parameters
+        ----------
+        top : int
+            Document row of the band's first line
+        image : QImage
+            Full width band of the image
+        """
+        self.tiles.load_band(top, image)
+        self.loaded_height = top + image.height()
+        self.add_damage(QRect(0, top, image.width(), image.height()))
+
+    def load_finished(self):
+        """
+        Finishes opening image
+        """
+        self.history.end()
+        self.image_loader = None
+        self.preview_image = None
+        self.update()
+
+    def load_failed(self, message):
+        """
+        Reports image could not be opened
+
+        Parameters
+        ----------
+        message : str
+            Reason the image could not be read
+        """
+        print(f'File Not Opened: {message}')
+        self.history.end()
+        self.image_loader = None
+        self.preview_image = None
+        self.update()
+
+    def cancel_load(self):
+        """
+        Stops image still being opened, keeping the
+        bands already loaded
+        """
+        if self.image_loader is None:
+            return
+        self.image_loader.requestInterruption()
+        self.image_loader.wait()
+        self.image_loader.disconnect()
+        self.load_finished()
 
     def save_file_as(self):
         """
         Allows user to save drawing not previously saved
         """
         file_path, _ = QFileDialog.getSaveFileName(
-            self, 'Save File', '',
-            'All Files(*);; PNG Files(*.png);; JPG Files(*.jpg)')
+            self, 'Save File', '', FILE_FILTERS)
 
         if file_path:
             self.current_file = file_path
-            self.pixmap.save(file_path)
-            print('File Saved')
+            self.start_save(file_path)
 
     def save_file(self):
         """
@@ -332,20 +1158,282 @@ class PaintCanvas(QLabel):
         saved drawing
         """
         if self.current_file is not None:
-            self.pixmap.save(self.current_file)
-            print('File Saved')
+            self.start_save(self.current_file)
         else:
             print('Save File As')
             self.save_file_as()
 
-    def exit_program(self):
+    def start_save(self, file_path):
+        """
+        Snapshots drawing and saves it in the background,
+        queueing it if a save is already running
+
+        Parameters
+        ----------
+        file_path : str
+            Path the drawing is saved to
+        """
+        # Image formats hold one layer so save the composite,
+        # projects are snapshotted once the running save is done
+        # as it moves the chunks they reuse
+        image = None if is_project(file_path) else self.layers.to_image()
+        if image is not None:
+            # Images keep no strokes, so stop logging them
+            self.project.clear_strokes()
+        if self.save_worker is not None and self.save_worker.isRunning():
+            # Only the newest queued snapshot is worth writing
+            self.pending_save = (image, file_path)
+        else:
+            self.run_save(image, file_path)
+
+    def run_save(self, image, file_path):
+        """
+        Starts a worker thread saving an image, or the
+        project if no image is given
+
+        Parameters
+        ----------
+        image : QImage
+            Snapshot of the drawing to save, None to save
+            the layers to a project file
+        file_path : str
+            Path the image is saved to
+        """
+        if image is None:
+            job = self.project.snapshot(self.layers, file_path,
+                                        self.renderer.tool_settings())
+            self.save_worker = ProjectWorker(job, self)
+
+            # Chunk positions are taken on the worker thread
+            # before it finishes, so a queued save started as
+            # soon as it is done reuses them
+            project = self.project
+            self.save_worker.saved.connect(
+                lambda _, job=job: project.saved(job),
+                Qt.ConnectionType.DirectConnection)
+            self.save_worker.failed.connect(
+                lambda *_, job=job: project.failed(job),
+                Qt.ConnectionType.DirectConnection)
+        else:
+            self.save_worker = SaveWorker(image, file_path, self)
+        self.save_worker.progress.connect(self.save_progress)
+        self.save_worker.saved.connect(self.save_finished)
+        self.save_worker.failed.connect(self.save_failed)
+        self.save_worker.start()
+
+    def save_progress(self, percent):
+        """
+        Shows save progress in status bar
+
+        Parameters
+        ----------
+        percent : int
+            Percent of the save completed
+        """
+        self.status_display.show_message(f'Saving... {percent}%')
+
+    def save_finished(self, file_path):
+        """
+        Reports save completed and starts queued save
+
+        Parameters
+        ----------
+        file_path : str
+            Path the drawing was saved to
+        """
+        print('File Saved')
+        self.status_display.show_message(f'Saved {file_path}', 2000)
+        self.start_pending_save()
+
+    def save_failed(self, file_path, message):
+        """
+        Reports save error and starts queued save
+
+        Parameters
+        ----------
+        file_path : str
+            Path the drawing was being saved to
+        message : str
+            Reason the save failed
+        """
+        print(f'File Not Saved: {message}')
+        QMessageBox.warning(self, 'Save File',
+                            f'Could not save {file_path}:\n{message}')
+        self.start_pending_save()
+
+    def start_pending_save(self):
+        """
+        Starts queued save once the running save is done
+        """
+        if (self.pending_save is not None and
+                not self.save_worker.isRunning()):
+            image, file_path = self.pending_save
+            self.pending_save = None
+            self.run_save(image, file_path)
+
+    def export_file(self):
+        """
+        Allows user to export drawing with every export
+        preset, each file named after the path chosen
+        """
+        name = os.path.splitext(self.current_file or '')[0]
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Export', name, 'All Files(*)')
+
+        if file_path:
+            self.start_export(file_path)
+
+    def start_export(self, file_path, presets=None):
+        """
+        Snapshots drawing and exports it in the background,
+        queueing it if an export is already running
+
+        Parameters
+        ----------
+        file_path : str
+            Path the exported files are named after
+        presets : dict
+            Presets keyed by name as in EXPORT_PRESETS,
+            EXPORT_PRESETS if None
+        """
+        if presets is None:
+            presets = EXPORT_PRESETS
+
+        # Every preset is resampled from the same snapshot
+        image = self.layers.to_image()
+        jobs = [(export_path(file_path, preset[0], preset[1]), preset)
+                for preset in presets.values()]
+        if self.export_worker is not None and self.export_worker.isRunning():
+            # Only the newest queued snapshot is worth writing
+            self.pending_export = (image, jobs)
+        else:
+            self.run_export(image, jobs)
+
+    def run_export(self, image, jobs):
+        """
+        Starts a worker thread exporting a snapshot
+
+        Parameters
+        ----------
+        image : QImage
+            Snapshot of the drawing to export
+        jobs : list
+            (file path, preset) pairs to export
+        """
+        self.export_worker = ExportWorker(image, jobs, parent=self)
+        self.export_worker.progress.connect(self.export_progress)
+        self.export_worker.exported.connect(self.export_finished)
+        self.export_worker.failed.connect(self.export_failed)
+        self.export_worker.finished.connect(
+            lambda worker=self.export_worker: self.export_done(worker))
+        self.export_worker.start()
+
+    def export_progress(self, percent):
+        """
+        Shows export progress in status bar
+
+        Parameters
+        ----------
+        percent : int
+            Percent of the files exported
+        """
+        self.status_display.show_message(f'Exporting... {percent}%')
+
+    def export_finished(self, file_path, milliseconds):
+        """
+        Reports a file exported and the time it took
+
+        Parameters
+        ----------
+        file_path : str
+            Path the file was exported to
+        milliseconds : float
+            Time spent resampling, encoding, and writing
+            the file
         """
-        Exits app after prompting user to save drawing
+        print(f'Exported {file_path} in {milliseconds:.0f} ms')
+
+    def export_failed(self, file_path, message):
+        """
+        Logs a file could not be exported, reported to the
+        user once the export is done
+
+        Parameters
+        ----------
+        file_path : str
+            Path the file was being exported to
+        message : str
+            Reason the export failed
+        """
+        print(f'File Not Exported: {message}')
+
+    def export_done(self, worker):
+        """
+        Reports time taken by an export and any files
+        that could not be exported, then starts queued
+        export
+
+        Parameters
+        ----------
+        worker : ExportWorker
+            Worker thread that finished
+        """
+        print(f'Export Finished in {worker.milliseconds:.0f} ms')
+        self.status_display.show_message(
+            f'Exported {len(worker.jobs) - len(worker.errors)} files in ' +
+            f'{worker.milliseconds:.0f} ms', 2000)
+        if worker.errors:
+            errors = '\n'.join(f'{file_path}: {message}'
+                               for file_path, message in worker.errors)
+            QMessageBox.warning(self, 'Export',
+                                f'Could not export:\n{errors}')
+        if self.pending_export is not None:
+            image, jobs = self.pending_export
+            self.pending_export = None
+            self.run_export(image, jobs)
+
+    def wait_for_saves(self):
+        """
+        Blocks until running and queued saves and exports
+        finish
+        """
+        while self.export_worker is not None:
+            self.export_worker.wait()
+            if self.pending_export is None:
+                break
+            image, jobs = self.pending_export
+            self.pending_export = None
+            self.run_export(image, jobs)
+        while self.save_worker is not None:
+            self.save_worker.wait()
+            if self.pending_save is None:
+                break
+            image, file_path = self.pending_save
+            self.pending_save = None
+            self.run_save(image, file_path)
+
+    def recover_autosave(self):
+        """
+        Restores drawing from the autosave journal left
+        behind by a crash
+        """
+        if self.autosave.recover():
+            self.view.reset()
+            self.refresh_layers()
+            self.status_display.show_message('Recovered autosaved drawing',
+                                             5000)
+        self.autosave.checkpoint()
+
+    def close_document(self):
+        """
+        Closes the document after prompting user to save
+        drawing
         """
         if self.current_file is not None:
             self.save_file()
         else:
-            message_text = 'Do you want to save before exiting?'
+            message_text = (f'Do you want to save {self.document_name()} ' +
+                            'before closing it?')
             exit_msg = QMessageBox.question(self, 'Save File', message_text,
                                             QMessageBox.StandardButton.Yes |
                                             QMessageBox.StandardButton.No,
@@ -357,5 +1445,14 @@ class PaintCanvas(QLabel):
             else:
                 print('File Not Saved')
 
-        print('Exiting File...')
-        self.parent_window.close()
+        # Let saves still in flight reach the disk
+        self.cancel_load()
+        self.wait_for_saves()
+        if self.profiler.dump_timer.isActive():
+            self.profiler.stop_dump()
+        if self.profiler.overlay_visible:
+            self.profiler.show_overlay(False)
+
+        # Nothing left to recover after a clean exit
+        self.autosave.discard()
+        print('Closing File...')
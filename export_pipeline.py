@@ -0,0 +1,208 @@
+from PyQt6.QtGui import QImageWriter
+from PyQt6.QtCore import (Qt, QThread, QBuffer, QByteArray, QIODevice,
+                          pyqtSignal)
+from concurrent.futures import (ThreadPoolExecutor, as_completed)
+from save_worker import UMASK
+import os
+import tempfile
+import time
+
+""" Export pipeline for the PyQt6 Paint Application.
+    Writes one snapshot of the drawing as several files at
+    once, each from a preset giving its format, size,
+    quality, and compression. The presets are resampled
+    and encoded in parallel on a pool of threads, as Qt
+    encodes without holding the Python interpreter lock,
+    and each file is renamed into place once written.
+"""
+
+# Format, longest side in pixels (None keeps full size),
+# quality from 0 to 100, and compression from 0 to 100 of
+# each file written by File > Export, -1 leaving the
+# format's default. Thumbnails are named after their size
+EXPORT_PRESETS = {
+    'Full Size PNG': ('png', None, -1, 50),
+    'Full Size JPEG': ('jpg', None, 90, -1),
+    'Thumbnail 512px': ('png', 512, -1, 50),
+    'Thumbnail 256px': ('png', 256, -1, 50),
+    'Thumbnail 128px': ('png', 128, -1, 50),
+}
+
+# Threads resampling and encoding at once
+EXPORT_THREADS = os.cpu_count() or 1
+
+
+def export_path(file_path, image_format, size):
+    """
+    Returns the path a preset is exported to
+
+    Parameters
+    ----------
+    file_path : str
+        Path chosen for the export, its extension is
+        replaced
+    image_format : str
+        Image file extension such as 'png'
+    size : int
+        Longest side in pixels, None for full size
+
+    Returns
+    ----------
+    str
+        Path such as drawing.jpg or drawing-256.png
+    """
+    base = os.path.splitext(file_path)[0]
+    if size is not None:
+        base = f'{base}-{size}'
+    return f'{base}.{image_format}'
+
+
+def export_image(image, file_path, image_format, size, quality,
+                 compression):
+    """
+    Resamples and encodes an image, then writes and
+    renames a temporary file into place
+
+    Parameters
+    ----------
+    image : QImage
+        Snapshot of the drawing, shared and never changed
+    file_path : str
+        Path the image is written to
+    image_format : str
+        Image file extension such as 'png'
+    size : int
+        Longest side in pixels, None for full size
+    quality : int
+        Encoder quality from 0 to 100, format default if -1
+    compression : int
+        Encoder compression from 0 to 100, format default
+        if -1
+
+    Returns
+    ----------
+    float
+        Seconds spent resampling, encoding, and writing
+    """
+    start = time.perf_counter()
+
+    # Only ever scale down, smooth scaling averages every
+    # pixel a thumbnail covers
+    if size is not None and max(image.width(), image.height()) > size:
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    writer = QImageWriter(buffer, image_format.encode())
+    writer.setQuality(quality)
+    writer.setCompression(compression)
+    if not writer.write(image):
+        raise OSError(writer.errorString())
+    buffer.close()
+
+    directory, name = os.path.split(os.path.abspath(file_path))
+    handle, temp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp',
+                                         dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            temp_file.write(data.data())
+        if os.path.exists(file_path):
+            mode = os.stat(file_path).st_mode & 0o777
+        else:
+            mode = 0o666 & ~UMASK
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return time.perf_counter() - start
+
+
+class ExportWorker(QThread):
+    """ A class to represent an Export Worker
+
+        ...
+
+        Attributes
+        ----------
+        QThread : class
+            ExportWorker inherits from this PyQt6 class
+        image : QImage
+            Snapshot of the drawing every preset is
+            exported from
+        jobs : list
+            (file path, preset) pairs to export, presets
+            as in EXPORT_PRESETS
+        threads : int
+            Threads resampling and encoding at once
+        milliseconds : float
+            Time taken to export every file, set once done
+        errors : list
+            (file path, error message) of each file that
+            could not be exported
+        progress : pyqtSignal
+            Emits percent of the files exported
+        exported : pyqtSignal
+            Emits file path and milliseconds spent on it
+            once the file is in place
+        failed : pyqtSignal
+            Emits file path and error message if the
+            file could not be exported
+
+        Methods
+        ----------
+        run():
+            Exports every file on a pool of threads
+    """
+
+    progress = pyqtSignal(int)
+    exported = pyqtSignal(str, float)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, image, jobs, threads=EXPORT_THREADS, parent=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            image : QImage
+                Snapshot of the drawing to export
+            jobs : list
+                (file path, preset) pairs to export
+            threads : int
+                Threads resampling and encoding at once
+            parent : QObject
+                Owner of the worker thread
+        """
+        super().__init__(parent)
+        self.image = image
+        self.jobs = jobs
+        self.threads = threads
+        self.milliseconds = 0
+        self.errors = []
+
+    def run(self):
+        """
+        Exports every file on a pool of threads,
+        reporting each as it is done
+        """
+        start = time.perf_counter()
+        self.progress.emit(0)
+        with ThreadPoolExecutor(self.threads) as pool:
+            futures = {pool.submit(export_image, self.image, file_path,
+                                   *preset): file_path
+                       for file_path, preset in self.jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                file_path = futures[future]
+                try:
+                    seconds = future.result()
+                except OSError as error:
+                    self.errors.append((file_path, str(error)))
+                    self.failed.emit(file_path, str(error))
+                else:
+                    self.exported.emit(file_path, seconds * 1000)
+                self.progress.emit(100 * done // len(futures))
+        self.milliseconds = (time.perf_counter() - start) * 1000
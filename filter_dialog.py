@@ -0,0 +1,102 @@
+from PyQt6.QtWidgets import (QDialog, QDialogButtonBox, QFormLayout,
+                             QHBoxLayout, QLabel, QSlider)
+from PyQt6.QtCore import (Qt, QTimer, pyqtSignal)
+from filter_engine import FILTERS
+
+""" Filter dialog for the PyQt6 Paint Application.
+    Shows a slider for each parameter of a filter and asks
+    for a preview once per event loop pass while they are
+    dragged, so previews never queue up behind the mouse.
+"""
+
+
+class FilterDialog(QDialog):
+    """ A class to represent a Filter Dialog
+
+        ...
+
+        Attributes
+        ----------
+        QDialog : class
+            FilterDialog inherits from this PyQt6 class
+        sliders : list
+            Slider of each filter parameter
+        preview_timer : QTimer
+            Zero interval timer coalescing slider changes
+            into one preview
+        values_changed : pyqtSignal
+            Emits slider values once they stop changing
+            for an event loop pass
+
+        Methods
+        ----------
+        values():
+            Returns the value of every slider
+        emit_values():
+            Emits the slider values for a preview
+    """
+
+    values_changed = pyqtSignal(list)
+
+    def __init__(self, parent, name):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            parent : QWidget
+                Widget the dialog is shown over
+            name : str
+                Key of FILTERS whose parameters are shown
+        """
+        super().__init__(parent)
+        self.setWindowTitle(name)
+        layout = QFormLayout(self)
+
+        # Preview once the slider changes of this pass are in
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(0)
+        self.preview_timer.timeout.connect(self.emit_values)
+
+        self.sliders = []
+        for label, minimum, maximum, value in FILTERS[name]:
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.setRange(minimum, maximum)
+            slider.setValue(value)
+            value_label = QLabel(str(value))
+            value_label.setMinimumWidth(30)
+            slider.valueChanged.connect(
+                lambda value, value_label=value_label:
+                value_label.setText(str(value)))
+            slider.valueChanged.connect(lambda: self.preview_timer.start())
+            row = QHBoxLayout()
+            row.addWidget(slider)
+            row.addWidget(value_label)
+            layout.addRow(label, row)
+            self.sliders.append(slider)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok |
+                                   QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+        self.preview_timer.start()
+
+    def values(self):
+        """
+        Returns the value of every slider
+
+        Returns
+        ----------
+        list
+            Slider values in the order of the filter's
+            parameters
+        """
+        return [slider.value() for slider in self.sliders]
+
+    def emit_values(self):
+        """
+        Emits the slider values for a preview
+        """
+        self.values_changed.emit(self.values())
@@ -0,0 +1,623 @@
+from PyQt6.QtGui import (QImage, QPainter)
+from PyQt6.QtCore import (Qt, QPoint)
+from concurrent.futures import ThreadPoolExecutor
+from image_buffer import pixel_array
+from layer_stack import BLEND_MODES
+from tile_store import TILE_FORMAT
+import math
+import os
+import numpy
+
+""" Filter engine for the PyQt6 Paint Application.
+    Adjusts the pixels of the active layer with numpy array
+    math on premultiplied channels. Each tile is filtered
+    on a pool of threads, as numpy works on whole arrays
+    without holding the Python interpreter lock, reading
+    a margin of pixels from the tiles around it so blurs
+    run seamlessly across tile edges. Gaussian blur is
+    three box blurs of running sums, costing the same at
+    any radius. While parameters change, a downscaled copy
+    of the layers is filtered instead to preview the result.
+"""
+
+# Label, minimum, maximum, and starting value of each slider
+# of the filters offered in the filter menu
+FILTERS = {
+    'Gaussian Blur': [('Radius', 1, 50, 4)],
+    'Sharpen': [('Radius', 1, 10, 2), ('Amount %', 0, 300, 100)],
+    'Brightness / Contrast': [('Brightness', -100, 100, 0),
+                              ('Contrast', -100, 100, 0)],
+    'Hue Shift': [('Degrees', -180, 180, 0)],
+    'Invert': [],
+}
+
+# Threads filtering tiles at once
+FILTER_THREADS = os.cpu_count() or 1
+
+# Longest side in pixels of the preview filtered while
+# parameters change
+PREVIEW_SIZE = 768
+
+# Rows of the preview filtered by one thread at a time
+PREVIEW_BAND = 64
+
+
+def to_channels(pixels):
+    """
+    Returns premultiplied ARGB32 pixels as channels
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        uint32 array of shape (height, width)
+
+    Returns
+    ----------
+    numpy.ndarray
+        float32 array of shape (height, width, 4) holding
+        blue, green, red, and alpha from 0 to 255
+    """
+    pixels = numpy.ascontiguousarray(pixels)
+    return pixels.view(numpy.uint8).reshape(
+        pixels.shape + (4,)).astype(numpy.float32)
+
+
+def to_pixels(channels):
+    """
+    Returns channels as premultiplied ARGB32 pixels
+
+    Parameters
+    ----------
+    channels : numpy.ndarray
+        float32 array of shape (height, width, 4) holding
+        blue, green, red, and alpha
+
+    Returns
+    ----------
+    numpy.ndarray
+        uint32 array of shape (height, width), colors
+        clipped to stay within alpha
+    """
+    # Clipped and rounded in place, channels are always a
+    # filter's own result
+    alpha = channels[..., 3:]
+    numpy.clip(alpha, 0, 255, out=alpha)
+    numpy.clip(channels[..., :3], 0, alpha, out=channels[..., :3])
+    channels += 0.5
+    return channels.astype(numpy.uint8).view(numpy.uint32)[..., 0]
+
+
+def box_radii(sigma):
+    """
+    Returns radii of three box blurs adding up to a
+    Gaussian blur
+
+    Parameters
+    ----------
+    sigma : float
+        Standard deviation of the Gaussian in pixels
+
+    Returns
+    ----------
+    list
+        Radius in pixels of each box blur
+    """
+    # Box widths whose variances sum to the Gaussian's,
+    # mixing the odd widths either side of the ideal one
+    ideal = math.sqrt(4 * sigma * sigma + 1)
+    lower = int(ideal)
+    if lower % 2 == 0:
+        lower -= 1
+    upper = lower + 2
+    count = round((12 * sigma * sigma - 3 * lower * lower -
+                   12 * lower - 9) / (-4 * lower - 4))
+    return [(lower if index < count else upper) // 2 for index in range(3)]
+
+
+def blur_margin(sigma):
+    """
+    Returns pixels a Gaussian blur reads beyond each edge
+
+    Parameters
+    ----------
+    sigma : float
+        Standard deviation of the Gaussian in pixels
+
+    Returns
+    ----------
+    int
+        Margin in pixels
+    """
+    return sum(box_radii(sigma)) if sigma > 0 else 0
+
+
+def box_blur(channels, radius, axis):
+    """
+    Sums channels over a box along one axis
+
+    Parameters
+    ----------
+    channels : numpy.ndarray
+        float32 array of shape (height, width, 4)
+    radius : int
+        Pixels averaged either side of each pixel
+    axis : int
+        0 to blur columns, 1 to blur rows
+
+    Returns
+    ----------
+    numpy.ndarray
+        Box sums, not yet divided by the box width, radius
+        pixels shorter at both ends of the axis
+    """
+    if radius == 0:
+        return channels
+
+    # Each box sum is the running sum at its end less the
+    # running sum just before its start
+    width = 2 * radius + 1
+    sums = numpy.cumsum(channels, axis=axis, dtype=numpy.float32)
+    ends = [slice(None)] * 3
+    starts = [slice(None)] * 3
+    later = [slice(None)] * 3
+    ends[axis] = slice(width - 1, None)
+    starts[axis] = slice(None, -width)
+    later[axis] = slice(1, None)
+    boxes = sums[tuple(ends)].copy()
+    boxes[tuple(later)] -= sums[tuple(starts)]
+    return boxes
+
+
+def gaussian_blur(channels, sigma):
+    """
+    Blurs channels with three box blurs each way
+
+    Parameters
+    ----------
+    channels : numpy.ndarray
+        float32 array of shape (height, width, 4) padded
+        by blur_margin(sigma) on every side
+    sigma : float
+        Standard deviation of the Gaussian in pixels
+
+    Returns
+    ----------
+    numpy.ndarray
+        Blurred channels without the margin
+    """
+    if sigma <= 0:
+        return channels
+    area = 1
+    for radius in box_radii(sigma):
+        channels = box_blur(box_blur(channels, radius, 0), radius, 1)
+        area *= (2 * radius + 1) ** 2
+    return channels * numpy.float32(1 / area)
+
+
+def filter_margin(name, values, scale=1):
+    """
+    Returns pixels a filter reads beyond each edge
+
+    Parameters
+    ----------
+    name : str
+        Key of FILTERS
+    values : list
+        Slider values of the filter
+    scale : float
+        Size of the filtered image relative to the
+        document
+
+    Returns
+    ----------
+    int
+        Margin in pixels
+    """
+    if name in ('Gaussian Blur', 'Sharpen'):
+        return blur_margin(values[0] * scale)
+    return 0
+
+
+def apply_filter(channels, name, values, scale=1):
+    """
+    Filters channels
+
+    Parameters
+    ----------
+    channels : numpy.ndarray
+        float32 array of shape (height, width, 4) padded
+        by filter_margin() on every side
+    name : str
+        Key of FILTERS
+    values : list
+        Slider values of the filter
+    scale : float
+        Size of the filtered image relative to the
+        document, shrinking blur radii to match
+
+    Returns
+    ----------
+    numpy.ndarray
+        Filtered channels without the margin
+    """
+    if name == 'Gaussian Blur':
+        return gaussian_blur(channels, values[0] * scale)
+
+    if name == 'Sharpen':
+        # Unsharp mask pushes pixels away from their blur
+        margin = filter_margin(name, values, scale)
+        blurred = gaussian_blur(channels, values[0] * scale)
+        if margin:
+            channels = channels[margin:-margin, margin:-margin]
+        return channels + (channels - blurred) * (values[1] / 100)
+
+    alpha = channels[..., 3:]
+    if name == 'Brightness / Contrast':
+        # Contrast scales colors about middle gray, both
+        # applied to premultiplied colors so no pixel is
+        # divided by its alpha
+        brightness, contrast = values
+        factor = (100 + contrast) / 100
+        offset = (128 * (1 - factor) + brightness) / 255
+        colors = channels[..., :3] * factor + alpha * offset
+        return numpy.concatenate((colors, alpha), axis=2)
+
+    if name == 'Hue Shift':
+        # Rotate colors about the gray axis, keeping
+        # luminance, as in the SVG hueRotate matrix
+        angle = math.radians(values[0])
+        cos, sin = math.cos(angle), math.sin(angle)
+        matrix = numpy.array(
+            [[0.213 + cos * 0.787 - sin * 0.213,
+              0.715 - cos * 0.715 - sin * 0.715,
+              0.072 - cos * 0.072 + sin * 0.928],
+             [0.213 - cos * 0.213 + sin * 0.143,
+              0.715 + cos * 0.285 + sin * 0.140,
+              0.072 - cos * 0.072 - sin * 0.283],
+             [0.213 - cos * 0.213 - sin * 0.787,
+              0.715 - cos * 0.715 + sin * 0.715,
+              0.072 + cos * 0.928 + sin * 0.072]], numpy.float32)
+
+        # Channels hold blue, green, red so reverse both
+        # sides of the RGB matrix
+        colors = channels[..., :3] @ matrix[::-1, ::-1].T
+        return numpy.concatenate((colors, alpha), axis=2)
+
+    if name == 'Invert':
+        return numpy.concatenate((alpha - channels[..., :3], alpha), axis=2)
+    raise ValueError(f'Unknown filter {name}')
+
+
+def filter_image(image, name, values, scale=1, pool=None):
+    """
+    Returns a filtered copy of an image, filtering bands
+    of rows on a pool of threads
+
+    Parameters
+    ----------
+    image : QImage
+        Premultiplied ARGB32 image
+    name : str
+        Key of FILTERS
+    values : list
+        Slider values of the filter
+    scale : float
+        Size of the image relative to the document
+    pool : ThreadPoolExecutor
+        Threads filtering bands, one thread if None
+
+    Returns
+    ----------
+    QImage
+        Filtered image
+    """
+    margin = filter_margin(name, values, scale)
+    source = numpy.pad(pixel_array(image, writable=False),
+                       margin, mode='edge')
+    result = QImage(image.size(), TILE_FORMAT)
+    pixels = pixel_array(result)
+
+    def filter_band(top):
+        bottom = min(top + PREVIEW_BAND, image.height())
+        band = source[top:bottom + 2 * margin]
+        pixels[top:bottom] = to_pixels(
+            apply_filter(to_channels(band), name, values, scale))
+
+    tops = range(0, image.height(), PREVIEW_BAND)
+    if pool is None:
+        for top in tops:
+            filter_band(top)
+    else:
+        list(pool.map(filter_band, tops))
+    return result
+
+
+class FilterEngine:
+    """ A class to represent a Filter Engine
+
+        ...
+
+        Attributes
+        ----------
+        threads : int
+            Threads filtering tiles at once
+        pool : ThreadPoolExecutor
+            Threads kept for every filter applied
+
+        Methods
+        ----------
+        region(tiles, sources, rect):
+            Returns pixels of a document area, repeating
+            the edge pixels outside the document
+        apply(tiles, name, values):
+            Filters every tile of a layer
+        preview(image, name, values, scale):
+            Returns a filtered copy of a downscaled image
+    """
+
+    def __init__(self, threads=FILTER_THREADS):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            threads : int
+                Threads filtering tiles at once
+        """
+        self.threads = threads
+        self.pool = ThreadPoolExecutor(threads)
+
+    def region(self, tiles, sources, rect):
+        """
+        Returns pixels of a document area, repeating the
+        edge pixels outside the document
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Tiles of the layer
+        sources : dict
+            Tile images keyed by (column, row), read only
+        rect : QRect
+            Document area, may reach past the document
+
+        Returns
+        ----------
+        numpy.ndarray
+            uint32 array of shape (height, width)
+        """
+        inside = rect.intersected(tiles.rect())
+        pixels = numpy.empty((inside.height(), inside.width()), numpy.uint32)
+        for key in tiles.tile_keys(inside):
+            part = tiles.tile_rect(key).intersected(inside)
+            origin = tiles.tile_rect(key).topLeft()
+            tile = pixel_array(sources[key], writable=False)
+            pixels[part.top() - inside.top():part.bottom() + 1 - inside.top(),
+                   part.left() - inside.left():
+                   part.right() + 1 - inside.left()] = tile[
+                part.top() - origin.y():part.bottom() + 1 - origin.y(),
+                part.left() - origin.x():part.right() + 1 - origin.x()]
+        return numpy.pad(pixels, ((inside.top() - rect.top(),
+                                   rect.bottom() - inside.bottom()),
+                                  (inside.left() - rect.left(),
+                                   rect.right() - inside.right())),
+                         mode='edge')
+
+    def apply(self, tiles, name, values):
+        """
+        Filters every tile of a layer, each on the pool
+        from the unfiltered tiles around it
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Tiles of the layer, recorded for undo before
+            they change
+        name : str
+            Key of FILTERS
+        values : list
+            Slider values of the filter
+
+        Returns
+        ----------
+        QRect
+            Document area changed
+        """
+        # Tiles are decoded here, as decoding changes the
+        # store, and only read by the threads
+        keys = tiles.tile_keys(tiles.rect())
+        sources = {key: tiles.tile(key) for key in keys}
+        margin = filter_margin(name, values)
+
+        def filter_tile(key):
+            rect = tiles.tile_rect(key).adjusted(-margin, -margin,
+                                                 margin, margin)
+            return to_pixels(apply_filter(
+                to_channels(self.region(tiles, sources, rect)),
+                name, values))
+
+        # Tiles with nothing painted within the margin all
+        # filter to the same image, filtered only once
+        blank_keys = {key for key in keys if not any(
+            tiles.painted(near) for near in tiles.tile_keys(
+                tiles.tile_rect(key).adjusted(-margin, -margin,
+                                              margin, margin)))}
+        painted_keys = [key for key in keys if key not in blank_keys]
+        results = dict(zip(painted_keys,
+                           self.pool.map(filter_tile, painted_keys)))
+        if blank_keys:
+            blank = QImage(tiles.blank_tile)
+            pixel_array(blank)[:] = to_pixels(apply_filter(
+                to_channels(numpy.pad(pixel_array(tiles.blank_tile, False),
+                                      margin, mode='edge')), name, values))
+
+            # Blurs leave blank tiles as they are
+            if blank == tiles.blank_tile:
+                keys = painted_keys
+
+        for key in keys:
+            tiles.record(key)
+            if key in blank_keys:
+                # Blank results share pixels until painted
+                tiles.tiles[key] = QImage(blank)
+            else:
+                pixel_array(tiles.allocate(key))[:] = results[key]
+        return tiles.rect()
+
+    def preview(self, image, name, values, scale):
+        """
+        Returns a filtered copy of a downscaled image
+
+        Parameters
+        ----------
+        image : QImage
+            Premultiplied ARGB32 image
+        name : str
+            Key of FILTERS
+        values : list
+            Slider values of the filter
+        scale : float
+            Size of the image relative to the document
+
+        Returns
+        ----------
+        QImage
+            Filtered image
+        """
+        return filter_image(image, name, values, scale, self.pool)
+
+
+class FilterPreview:
+    """ A class to represent a Filter Preview
+
+        ...
+
+        Attributes
+        ----------
+        engine : FilterEngine
+            Engine filtering the downscaled active layer
+        name : str
+            Key of FILTERS being previewed
+        scale : float
+            Size of the preview relative to the document
+        below : QImage
+            Downscaled layers below the active layer over
+            white paper
+        active : QImage
+            Downscaled active layer
+        opacity : float
+            Opacity of the active layer
+        blend_mode : str
+            Blend mode of the active layer
+        above : list
+            (image, opacity, blend mode) of each visible
+            layer above the active layer, downscaled
+
+        Methods
+        ----------
+        downscale(layers, keys, fill):
+            Draws downscaled layers into a new image
+        render(values):
+            Returns the downscaled document with the active
+            layer filtered
+    """
+
+    def __init__(self, layers, engine, name, size=PREVIEW_SIZE):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            layers : LayerStack
+                Layers of the document
+            engine : FilterEngine
+                Engine filtering the downscaled active layer
+            name : str
+                Key of FILTERS being previewed
+            size : int
+                Longest side in pixels of the preview
+        """
+        self.engine = engine
+        self.name = name
+        self.scale = min(1, size / max(layers.width, layers.height))
+        active = layers.active_layer()
+        self.below = self.downscale(layers, layers.layers[:layers.active],
+                                    Qt.GlobalColor.white)
+        self.active = self.downscale(layers, [], active.tiles.fill_color)
+        painter = QPainter(self.active)
+        painter.scale(self.scale, self.scale)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        active.tiles.render(painter, layers.rect())
+        painter.end()
+        self.opacity = active.opacity if active.visible else 0
+        self.blend_mode = active.blend_mode
+        self.above = [(self.downscale(layers, [layer],
+                                      Qt.GlobalColor.transparent),
+                       layer.opacity, layer.blend_mode)
+                      for layer in layers.layers[layers.active + 1:]
+                      if layer.visible]
+
+    def downscale(self, layers, composited, fill):
+        """
+        Draws downscaled layers into a new image
+
+        Parameters
+        ----------
+        layers : LayerStack
+            Layers of the document
+        composited : list
+            Layers composited into the image, in order
+        fill : QColor
+            Color the image starts as
+
+        Returns
+        ----------
+        QImage
+            Image of the document scaled by the preview
+            scale
+        """
+        image = QImage(max(1, round(layers.width * self.scale)),
+                       max(1, round(layers.height * self.scale)),
+                       TILE_FORMAT)
+        image.fill(fill)
+        painter = QPainter(image)
+        painter.scale(self.scale, self.scale)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for layer in composited:
+            for key in layers.tile_keys(layers.rect()):
+                painter.save()
+                painter.translate(layers.tile_rect(key).topLeft())
+                layer.draw(painter, key)
+                painter.restore()
+        painter.end()
+        return image
+
+    def render(self, values):
+        """
+        Returns the downscaled document with the active
+        layer filtered
+
+        Parameters
+        ----------
+        values : list
+            Slider values of the filter
+
+        Returns
+        ----------
+        QImage
+            Composited preview, shown stretched over the
+            document
+        """
+        filtered = self.engine.preview(self.active, self.name, values,
+                                       self.scale)
+        image = self.below.copy()
+        painter = QPainter(image)
+        painter.setOpacity(self.opacity)
+        painter.setCompositionMode(BLEND_MODES[self.blend_mode])
+        painter.drawImage(QPoint(0, 0), filtered)
+        for layer_image, opacity, blend_mode in self.above:
+            painter.setOpacity(opacity)
+            painter.setCompositionMode(BLEND_MODES[blend_mode])
+            painter.drawImage(QPoint(0, 0), layer_image)
+        painter.end()
+        return image
@@ -0,0 +1,247 @@
+from PyQt6.QtCore import QRect
+from image_buffer import (pixel_array, premultiplied)
+from collections import deque
+import numpy
+
+""" Flood fill for the PyQt6 Paint Application.
+    Fills the region of similar color around a point by
+    working straight on tile pixel memory. Within a tile
+    every horizontal and vertical run of matching pixels is
+    labelled once, then the fill spreads a whole scanline
+    run at a time with numpy, alternating rows and columns
+    until it stops growing, before handing its edges on to
+    neighbouring tiles.
+"""
+
+
+def match_mask(pixels, target, tolerance):
+    """
+    Returns which pixels are close to a target color
+
+    Parameters
+    ----------
+    pixels : numpy.ndarray
+        uint32 pixel array of a tile
+    target : int
+        Premultiplied ARGB32 pixel value to match
+    tolerance : int
+        Largest difference allowed in any channel
+
+    Returns
+    ----------
+    numpy.ndarray
+        bool array, True where the pixel matches
+    """
+    if tolerance == 0:
+        return pixels == target
+
+    # Shifting each channel so its range starts at 0 lets one
+    # wrapping uint8 compare check both ends of the range
+    channels = pixels.view(numpy.uint8).reshape(pixels.shape + (4,))
+    target = numpy.array([target], numpy.uint32).view(numpy.uint8)
+    match = None
+    for channel in range(4):
+        low = max(int(target[channel]) - tolerance, 0)
+        high = min(int(target[channel]) + tolerance, 255)
+        inside = channels[..., channel] - numpy.uint8(low) <= high - low
+        match = inside if match is None else match & inside
+    return match
+
+
+def run_labels(mask):
+    """
+    Numbers every horizontal run of True pixels
+
+    Parameters
+    ----------
+    mask : numpy.ndarray
+        bool array of matching pixels
+
+    Returns
+    ----------
+    tuple
+        int32 array holding each pixel's run number, 0 for
+        pixels outside any run, and the number of runs
+    """
+    starts = mask.copy()
+    starts[:, 1:] &= ~mask[:, :-1]
+    labels = numpy.cumsum(starts, dtype=numpy.int32).reshape(mask.shape)
+    labels *= mask
+    return labels, int(labels.max())
+
+
+def grow(labels, count, region):
+    """
+    Extends region to cover every run it touches
+
+    Parameters
+    ----------
+    labels : numpy.ndarray
+        Run numbers from run_labels
+    count : int
+        Number of runs
+    region : numpy.ndarray
+        bool array of pixels already in the region
+
+    Returns
+    ----------
+    numpy.ndarray
+        bool array of pixels in the grown region
+    """
+    hit = numpy.zeros(count + 1, bool)
+    hit[labels[region]] = True
+    hit[0] = False
+    return hit[labels]
+
+
+def spread(state, seeds):
+    """
+    Fills the parts of a tile reachable from seed pixels
+
+    Parameters
+    ----------
+    state : dict
+        Tile 'match' mask, 'filled' mask, and run labels
+        once computed
+    seeds : numpy.ndarray
+        bool array of pixels the fill reaches the tile at
+
+    Returns
+    ----------
+    numpy.ndarray
+        bool array of pixels newly filled, None if the
+        seeds added nothing
+    """
+    region = seeds & state['match'] & ~state['filled']
+    if not region.any():
+        return None
+
+    # A tile matching everywhere is one region, most blank
+    # areas are filled this way
+    if state['full']:
+        region = state['match']
+    else:
+        if 'rows' not in state:
+            state['rows'] = run_labels(state['match'])
+            labels, count = run_labels(state['match'].T)
+            state['columns'] = (labels.T, count)
+        total = numpy.count_nonzero(region)
+        while True:
+            region = grow(*state['rows'], region)
+            region = grow(*state['columns'], region)
+            grown = numpy.count_nonzero(region)
+            if grown == total:
+                break
+            total = grown
+    state['filled'] |= region
+    return region
+
+
+def flood_fill(tiles, point, color, tolerance=0):
+    """
+    Fills region of similar color around a point
+
+    Parameters
+    ----------
+    tiles : TileStore
+        Document tiles to fill
+    point : QPoint
+        Document position the fill starts from
+    color : QColor
+        Opaque color the region is filled with
+    tolerance : int
+        Largest difference from the starting pixel's
+        color allowed in any channel
+
+    Returns
+    ----------
+    QRect
+        Bounding rectangle of the pixels filled, empty if
+        nothing changed
+    """
+    if not tiles.rect().contains(point):
+        return QRect()
+    size = tiles.tile_size
+    columns = -(-tiles.width // size)
+    rows = -(-tiles.height // size)
+    start = (point.x() // size, point.y() // size)
+    start_pixels = pixel_array(tiles.tile(start), False)
+    target = int(start_pixels[point.y() % size, point.x() % size])
+    value = premultiplied(color)
+    if target == value and tolerance == 0:
+        return QRect()
+
+    # Unpainted tiles share the blank tile so share its mask
+    blank_match = match_mask(pixel_array(tiles.blank_tile, False),
+                             target, tolerance)
+    states = {}
+
+    def tile_state(key):
+        state = states.get(key)
+        if state is None:
+            tile = tiles.decode(key)
+            if tile is None:
+                match = blank_match
+            else:
+                match = match_mask(pixel_array(tile, False), target,
+                                   tolerance)
+
+            # Tiles along the document edge hang past it
+            width = min(size, tiles.width - key[0] * size)
+            height = min(size, tiles.height - key[1] * size)
+            if width < size or height < size:
+                match = match.copy()
+                match[:, width:] = False
+                match[height:, :] = False
+            state = {'match': match, 'full': bool(match.all()),
+                     'filled': numpy.zeros((size, size), bool)}
+            states[key] = state
+        return state
+
+    seeds = numpy.zeros((size, size), bool)
+    seeds[point.y() % size, point.x() % size] = True
+    pending = {start: seeds}
+    queue = deque([start])
+    while queue:
+        key = queue.popleft()
+        region = spread(tile_state(key), pending.pop(key))
+        if region is None:
+            continue
+
+        # Pass filled edge pixels to the facing edge of each
+        # neighbouring tile
+        column, row = key
+        for neighbour, edge, target_edge in (
+                ((column, row - 1), region[0], (size - 1, slice(None))),
+                ((column, row + 1), region[-1], (0, slice(None))),
+                ((column - 1, row), region[:, 0], (slice(None), size - 1)),
+                ((column + 1, row), region[:, -1], (slice(None), 0))):
+            if (not 0 <= neighbour[0] < columns or
+                    not 0 <= neighbour[1] < rows or not edge.any()):
+                continue
+            neighbour_seeds = pending.get(neighbour)
+            if neighbour_seeds is None:
+                neighbour_seeds = numpy.zeros((size, size), bool)
+                pending[neighbour] = neighbour_seeds
+                queue.append(neighbour)
+            neighbour_seeds[target_edge] |= edge
+
+    # Write the color into every tile the fill reached
+    bounds = QRect()
+    for key, state in states.items():
+        filled = state['filled']
+        filled_rows = numpy.flatnonzero(filled.any(axis=1))
+        if not len(filled_rows):
+            continue
+        filled_columns = numpy.flatnonzero(filled.any(axis=0))
+        pixels = pixel_array(tiles.allocate(key))
+        if state['full']:
+            pixels[:] = value
+        else:
+            pixels[filled] = value
+        bounds = bounds.united(QRect(
+            key[0] * size + int(filled_columns[0]),
+            key[1] * size + int(filled_rows[0]),
+            int(filled_columns[-1] - filled_columns[0]) + 1,
+            int(filled_rows[-1] - filled_rows[0]) + 1))
+    return bounds
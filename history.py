@@ -0,0 +1,344 @@
+from PyQt6.QtGui import QImage
+from image_buffer import pixel_array
+import numpy
+import zlib
+
+""" Undo history for the PyQt6 Paint Application.
+    Records, for each stroke, only the tiles the stroke
+    changed as they were before it started. Older entries
+    are compressed and the oldest are dropped once the
+    memory budget is full, so undo and redo cost grows with
+    a stroke's footprint rather than the document size or
+    the length of the history.
+    Compressed snapshots may also be views into a memory
+    mapped spill file.
+"""
+
+# Maximum bytes held by undo and redo entries
+HISTORY_BUDGET = 256 * 1024 * 1024
+
+# Number of newest entries kept uncompressed
+UNCOMPRESSED_ENTRIES = 4
+
+
+class History:
+    """ A class to represent a History
+
+        ...
+
+        Attributes
+        ----------
+        budget : int
+            Maximum bytes held by undo and redo entries
+        undo_entries : list
+            Finished entries, oldest first
+        redo_entries : list
+            Undone entries, most recently undone last
+        entry : dict
+            Entry being recorded, None between strokes
+        total_bytes : int
+            Bytes held by undo and redo entries, kept as
+            entries are added, compressed, and dropped
+
+        Methods
+        ----------
+        begin(tiles, stroke):
+            Starts recording an entry
+        record(key, tile):
+            Stores tile as it was before the entry
+        end():
+            Finishes entry and trims history to budget
+        undo():
+            Restores tiles from the newest entry
+        redo():
+            Restores tiles from the newest undone entry
+        push(entries, entry):
+            Adds an entry to the undo or redo entries
+        settle(entries):
+            Compresses the entry leaving the uncompressed
+            window and trims history to budget
+        swap(entry):
+            Exchanges entry tiles with the tiles they
+            were recorded from
+        forget(tiles):
+            Drops entries recorded from a tile store
+        compress(entry):
+            Compresses entry tile snapshots
+        measure(entry):
+            Updates the bytes counted for an entry
+        entry_bytes(entry):
+            Returns memory held by an entry
+        trim():
+            Drops oldest entries until within budget
+        used_bytes():
+            Returns memory held by all entries
+    """
+
+    def __init__(self, budget=HISTORY_BUDGET):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            budget : int
+                Maximum bytes held by undo and redo entries
+        """
+        self.budget = budget
+        self.undo_entries = []
+        self.redo_entries = []
+        self.entry = None
+        self.total_bytes = 0
+
+    def begin(self, tiles, stroke=None):
+        """
+        Starts recording an entry
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Document tiles the entry will record
+        stroke : int
+            Id of the logged stroke the entry records,
+            None if it records something else
+        """
+        self.entry = {'store': tiles, 'size': (tiles.width, tiles.height),
+                      'tiles': {}, 'compressed': False, 'stroke': stroke,
+                      'bytes': 0}
+
+    def record(self, key, tile):
+        """
+        Stores tile as it was before the entry, keeping
+        only the first state seen for each tile
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+        tile : QImage
+            Tile about to be changed, None if unallocated
+        """
+        if self.entry is None or key in self.entry['tiles']:
+            return
+
+        # A shallow copy shares pixels until the tile is painted,
+        # at which point Qt detaches the tile from the snapshot
+        self.entry['tiles'][key] = None if tile is None else QImage(tile)
+
+    def end(self):
+        """
+        Finishes entry and trims history to budget
+        """
+        entry = self.entry
+        self.entry = None
+        if entry is None or not entry['tiles']:
+            return
+        for undone in self.redo_entries:
+            self.total_bytes -= undone['bytes']
+        self.redo_entries = []
+        self.push(self.undo_entries, entry)
+
+    def undo(self):
+        """
+        Restores tiles from the newest entry
+
+        Returns
+        ----------
+        tuple
+            Tile store restored and keys of tiles changed,
+            None and no keys if nothing to undo
+        """
+        if not self.undo_entries:
+            return None, []
+        entry = self.undo_entries.pop()
+        self.total_bytes -= entry['bytes']
+        entry = self.swap(entry)
+        self.push(self.redo_entries, entry)
+        return entry['store'], list(entry['tiles'])
+
+    def redo(self):
+        """
+        Restores tiles from the newest undone entry
+
+        Returns
+        ----------
+        tuple
+            Tile store restored and keys of tiles changed,
+            None and no keys if nothing to redo
+        """
+        if not self.redo_entries:
+            return None, []
+        entry = self.redo_entries.pop()
+        self.total_bytes -= entry['bytes']
+        entry = self.swap(entry)
+        self.push(self.undo_entries, entry)
+        return entry['store'], list(entry['tiles'])
+
+    def push(self, entries, entry):
+        """
+        Adds an entry to the undo or redo entries, then
+        settles them
+
+        Parameters
+        ----------
+        entries : list
+            undo_entries or redo_entries
+        entry : dict
+            Finished or swapped entry, newest of the list
+        """
+        entries.append(entry)
+        entry['bytes'] = self.entry_bytes(entry)
+        self.total_bytes += entry['bytes']
+        self.settle(entries)
+
+    def settle(self, entries):
+        """
+        Compresses the entry just pushed out of the newest
+        uncompressed entries, then trims history to budget
+
+        Parameters
+        ----------
+        entries : list
+            undo_entries or redo_entries, just added to
+        """
+        # Each push moves one entry out of the window, so the
+        # entries before it are already compressed
+        if len(entries) > UNCOMPRESSED_ENTRIES:
+            self.compress(entries[-UNCOMPRESSED_ENTRIES - 1])
+        self.trim()
+
+    def swap(self, entry):
+        """
+        Exchanges entry tiles with the tiles they were
+        recorded from
+
+        Parameters
+        ----------
+        entry : dict
+            Entry holding tiles to put back
+
+        Returns
+        ----------
+        dict
+            Entry holding the tiles that were replaced
+        """
+        tiles = entry['store']
+        swapped = {'store': tiles, 'size': (tiles.width, tiles.height),
+                   'tiles': {}, 'compressed': False,
+                   'stroke': entry['stroke'], 'bytes': 0}
+        for key, snapshot in entry['tiles'].items():
+            # A tile spilled or not yet decoded since opening
+            # is swapped out still compressed
+            if key in tiles.stored:
+                swapped['tiles'][key] = tiles.stored.pop(key)
+            else:
+                swapped['tiles'][key] = tiles.tiles.pop(key, None)
+            tiles.dirty_keys.add(key)
+            tiles.unsaved_keys.add(key)
+            if isinstance(snapshot, (bytes, memoryview)):
+                image = QImage(tiles.tile_size, tiles.tile_size,
+                               tiles.blank_tile.format())
+                pixels = numpy.frombuffer(zlib.decompress(snapshot),
+                                          numpy.uint32)
+                pixel_array(image)[:] = pixels.reshape(tiles.tile_size,
+                                                       tiles.tile_size)
+                snapshot = image
+            if snapshot is not None:
+                tiles.tiles[key] = snapshot
+        tiles.resize(*entry['size'])
+        return swapped
+
+    def forget(self, tiles):
+        """
+        Drops entries recorded from a tile store, such as
+        a deleted layer
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Tile store no longer in the document
+        """
+        self.undo_entries = [entry for entry in self.undo_entries
+                             if entry['store'] is not tiles]
+        self.redo_entries = [entry for entry in self.redo_entries
+                             if entry['store'] is not tiles]
+        self.total_bytes = sum(entry['bytes'] for entry in
+                               self.undo_entries + self.redo_entries)
+
+    def compress(self, entry):
+        """
+        Compresses entry tile snapshots
+
+        Parameters
+        ----------
+        entry : dict
+            Undo or redo entry whose snapshots are
+            compressed in place
+        """
+        if entry['compressed']:
+            return
+        for key, snapshot in entry['tiles'].items():
+            if isinstance(snapshot, QImage):
+                buffer = snapshot.constBits()
+                buffer.setsize(snapshot.sizeInBytes())
+                entry['tiles'][key] = zlib.compress(bytes(buffer), 1)
+        entry['compressed'] = True
+        self.measure(entry)
+
+    def measure(self, entry):
+        """
+        Updates the bytes counted for an entry after its
+        snapshots were replaced
+
+        Parameters
+        ----------
+        entry : dict
+            Undo or redo entry whose snapshots changed
+        """
+        size = self.entry_bytes(entry)
+        self.total_bytes += size - entry['bytes']
+        entry['bytes'] = size
+
+    def entry_bytes(self, entry):
+        """
+        Returns memory held by an entry
+
+        Parameters
+        ----------
+        entry : dict
+            Entry to measure
+
+        Returns
+        ----------
+        int
+            Bytes of snapshot data in the entry, not
+            counting snapshots spilled to disk
+        """
+        total = 0
+        for snapshot in entry['tiles'].values():
+            if isinstance(snapshot, bytes):
+                total += len(snapshot)
+            elif isinstance(snapshot, QImage):
+                total += snapshot.sizeInBytes()
+        return total
+
+    def trim(self):
+        """
+        Drops oldest entries until within budget, undo
+        entries first, then the redo entries furthest
+        from the current state
+        """
+        while self.total_bytes > self.budget and self.undo_entries:
+            self.total_bytes -= self.undo_entries.pop(0)['bytes']
+        while self.total_bytes > self.budget and self.redo_entries:
+            self.total_bytes -= self.redo_entries.pop(0)['bytes']
+
+    def used_bytes(self):
+        """
+        Returns memory held by all entries
+
+        Returns
+        ----------
+        int
+            Bytes of snapshot data in undo and redo entries
+        """
+        return self.total_bytes
@@ -0,0 +1,143 @@
+from PyQt6.QtGui import (QIcon, QImage, QPainter, QPixmap)
+from PyQt6.QtCore import (Qt, QRect)
+import os
+
+""" Icon atlas for the PyQt6 Paint Application.
+    Packs every menu icon side by side into one image, so
+    startup reads and decodes a single file rather than one
+    per icon, and cuts each icon out of it only the first
+    time it is asked for. Paths are resolved next to this
+    module so the app can be started from any directory.
+    Run this module to rebuild the atlas after changing
+    the icons.
+"""
+
+# Directory holding the icons and the atlas packed from them
+ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Icons')
+ATLAS_PATH = os.path.join(ICON_DIR, 'atlas.png')
+
+# Width and height in pixels of each icon
+ICON_SIZE = 48
+
+# Icons in the order they are packed, left to right
+ATLAS_ICONS = [
+    'open', 'new', 'save', 'save_as', 'exit', 'separator', 'colors',
+    'pencil', 'brush', 'spray', 'eraser', 'bucket', 'select',
+    '2px', '4px', '6px', '8px', '12px', '16px',
+    'S_2px', 'S_4px', 'S_6px', 'S_8px',
+    'E_16px', 'E_24px', 'E_32px', 'E_40px',
+]
+
+
+def icon_path(name):
+    """
+    Returns path of a single icon file
+
+    Parameters
+    ----------
+    name : str
+        Icon file name without the .png extension
+
+    Returns
+    ----------
+    str
+        Absolute path of the icon
+    """
+    return os.path.join(ICON_DIR, f'{name}.png')
+
+
+def build_atlas(path=ATLAS_PATH):
+    """
+    Packs the icons listed in ATLAS_ICONS into one image
+
+    Parameters
+    ----------
+    path : str
+        File the atlas is written to
+    """
+    atlas = QImage(ICON_SIZE * len(ATLAS_ICONS), ICON_SIZE,
+                   QImage.Format.Format_ARGB32)
+    atlas.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(atlas)
+    for index, name in enumerate(ATLAS_ICONS):
+        painter.drawImage(QRect(index * ICON_SIZE, 0, ICON_SIZE, ICON_SIZE),
+                          QImage(icon_path(name)))
+    painter.end()
+    atlas.save(path)
+
+
+class IconAtlas:
+    """ A class to represent an IconAtlas
+
+        ...
+
+        Attributes
+        ----------
+        path : str
+            Atlas image file
+        pixmap : QPixmap
+            Atlas image, None until the first icon is cut
+        icons : dict
+            Icons already cut out keyed by name
+
+        Methods
+        ----------
+        icon(name):
+            Returns an icon, cutting it out of the atlas
+            the first time
+    """
+
+    def __init__(self, path=ATLAS_PATH):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            path : str
+                Atlas image file
+        """
+        self.path = path
+        self.pixmap = None
+        self.icons = {}
+
+    def icon(self, name):
+        """
+        Returns an icon, cutting it out of the atlas the
+        first time
+
+        Parameters
+        ----------
+        name : str
+            Icon file name without the .png extension
+
+        Returns
+        ----------
+        QIcon
+            The icon, loaded from its own file when the
+            atlas is missing or does not hold it
+        """
+        icon = self.icons.get(name)
+        if icon is not None:
+            return icon
+
+        if self.pixmap is None:
+            self.pixmap = QPixmap(self.path)
+        if name in ATLAS_ICONS and not self.pixmap.isNull():
+            icon = QIcon(self.pixmap.copy(ATLAS_ICONS.index(name) * ICON_SIZE,
+                                          0, ICON_SIZE, ICON_SIZE))
+        else:
+            icon = QIcon(icon_path(name))
+        self.icons[name] = icon
+        return icon
+
+
+def main():
+    """ Pack the icons into the atlas image after they
+        are added or changed
+    """
+    build_atlas()
+    print(f'Packed {len(ATLAS_ICONS)} icons into {ATLAS_PATH}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import numpy
+
+""" Image buffer helpers for the PyQt6 Paint Application.
+    Exposes the pixel memory of 32-bit QImages as numpy
+    arrays so tools can read and write pixels in bulk
+    without copying the image.
+"""
+
+
+def pixel_array(image, writable=True):
+    """
+    Returns view of a 32-bit image's pixels
+
+    Parameters
+    ----------
+    image : QImage
+        Image in a 32 bits per pixel format
+    writable : bool
+        Whether the view may be written to, read-only
+        views never detach an image sharing its pixels
+
+    Returns
+    ----------
+    numpy.ndarray
+        uint32 array of shape (height, width) sharing
+        memory with the image
+    """
+    buffer = image.bits() if writable else image.constBits()
+    buffer.setsize(image.sizeInBytes())
+    pixels = numpy.frombuffer(buffer, numpy.uint32)
+    pixels = pixels.reshape(image.height(), image.bytesPerLine() // 4)
+    return pixels[:, :image.width()]
+
+
+def premultiplied(color):
+    """
+    Returns color as a premultiplied ARGB32 pixel value
+
+    Parameters
+    ----------
+    color : QColor
+        Color to convert
+
+    Returns
+    ----------
+    int
+        Pixel value for Format_ARGB32_Premultiplied
+    """
+    alpha = color.alpha()
+    return ((alpha << 24) |
+            ((color.red() * alpha // 255) << 16) |
+            ((color.green() * alpha // 255) << 8) |
+            (color.blue() * alpha // 255))
@@ -0,0 +1,211 @@
+from PyQt6.QtGui import (QImageReader, QImageIOHandler)
+from PyQt6.QtCore import (Qt, QThread, QRect, QSize, pyqtSignal)
+from tile_store import (TILE_SIZE, TILE_FORMAT)
+
+""" Background image opening for the PyQt6 Paint Application.
+    Reads the image header first, decodes a preview sized
+    for the window, then fills in full detail one band of
+    tile rows at a time, all off the GUI thread. Formats
+    that can decode part of an image are read a few bands
+    at a time, others are decoded whole once.
+"""
+
+# Largest image in megabytes Qt may allocate for one read,
+# room for a 256 megapixel image at 32 bits per pixel. Qt
+# rejects anything over 256 MB unless told otherwise
+ALLOCATION_LIMIT = 1024
+
+# Clip rectangle reads full detail is split into for formats
+# that can decode part of an image. Each read decodes the
+# file from its start, so more reads hold less at once but
+# decode more in total
+DECODE_PASSES = 4
+
+
+class ImageLoader(QThread):
+    """ A class to represent an Image Loader
+
+        ...
+
+        Attributes
+        ----------
+        QThread : class
+            ImageLoader inherits from this PyQt6 class
+        file_path : str
+            Path of the image to open
+        preview_size : QSize
+            Largest size the preview is decoded at
+        band_height : int
+            Height in pixels of each full detail band
+        header : pyqtSignal
+            Emits full image size once the header is read
+        preview : pyqtSignal
+            Emits downscaled preview of the whole image
+        band : pyqtSignal
+            Emits top row and image of each full detail band
+        loaded : pyqtSignal
+            Emits once every band has been sent
+        failed : pyqtSignal
+            Emits error message if the image cannot be read
+
+        Methods
+        ----------
+        run():
+            Reads header, preview, then full detail bands
+        reader():
+            Returns new image reader for the file
+        read_clipped(size):
+            Decodes full detail a few bands at a time
+        read_bands(image, top):
+            Emits full detail bands cut from a decoded
+            image
+    """
+
+    header = pyqtSignal(QSize)
+    preview = pyqtSignal(object)
+    band = pyqtSignal(int, object)
+    loaded = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, preview_size, band_height=TILE_SIZE,
+                 parent=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            file_path : str
+                Path of the image to open
+            preview_size : QSize
+                Largest size the preview is decoded at
+            band_height : int
+                Height in pixels of each full detail band
+            parent : QObject
+                Owner of the loader thread
+        """
+        super().__init__(parent)
+        self.file_path = file_path
+        self.preview_size = preview_size
+        self.band_height = band_height
+
+    def run(self):
+        """
+        Reads header, preview, then full detail bands,
+        emitting nothing more once interrupted
+        """
+        reader = self.reader()
+        size = reader.size()
+        if not size.isValid():
+            self.failed.emit(reader.errorString())
+            return
+        self.header.emit(size)
+        preview_size = size.scaled(size.boundedTo(self.preview_size),
+                                   Qt.AspectRatioMode.KeepAspectRatio)
+
+        # Formats such as JPEG decode straight to the smaller
+        # size, others decode once for both preview and bands
+        image = None
+        clips = reader.supportsOption(QImageIOHandler.ImageOption.ClipRect)
+        if reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize):
+            reader.setScaledSize(preview_size)
+            preview = reader.read()
+        else:
+            image = reader.read()
+            preview = image.scaled(preview_size,
+                                   Qt.AspectRatioMode.KeepAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+        if preview.isNull():
+            self.failed.emit(reader.errorString())
+            return
+        self.preview.emit(preview.convertToFormat(TILE_FORMAT))
+        if self.isInterruptionRequested():
+            return
+
+        if image is None and clips:
+            done = self.read_clipped(size)
+        else:
+            if image is None:
+                reader = self.reader()
+                image = reader.read()
+                if image.isNull():
+                    self.failed.emit(reader.errorString())
+                    return
+            done = self.read_bands(image, 0)
+        if done:
+            self.loaded.emit()
+
+    def reader(self):
+        """
+        Returns new image reader for the file
+
+        Returns
+        ----------
+        QImageReader
+            Reader positioned at the start of the file, with
+            the allocation limit raised to ALLOCATION_LIMIT
+        """
+        QImageReader.setAllocationLimit(ALLOCATION_LIMIT)
+        return QImageReader(self.file_path)
+
+    def read_clipped(self, size):
+        """
+        Decodes full detail a few bands at a time with clip
+        rectangle reads, emitting each band
+
+        Parameters
+        ----------
+        size : QSize
+            Full image size
+
+        Returns
+        ----------
+        bool
+            True if every band was emitted, False if
+            interrupted or the image could not be read
+        """
+        # Whole bands per read, so only DECODE_PASSES reads
+        # decode the file however many bands it has
+        bands = -(-size.height() // self.band_height)
+        rows = -(-bands // DECODE_PASSES) * self.band_height
+        for top in range(0, size.height(), rows):
+            if self.isInterruptionRequested():
+                return False
+            reader = self.reader()
+            reader.setClipRect(QRect(0, top, size.width(),
+                                     min(rows, size.height() - top)))
+            image = reader.read()
+            if image.isNull():
+                self.failed.emit(reader.errorString())
+                return False
+            if not self.read_bands(image, top):
+                return False
+        return True
+
+    def read_bands(self, image, top):
+        """
+        Emits full detail bands cut from a decoded image
+
+        Parameters
+        ----------
+        image : QImage
+            Full width rows of the image decoded at full
+            size
+        top : int
+            Image row of the decoded rows' first line
+
+        Returns
+        ----------
+        bool
+            True if every band was emitted, False if
+            interrupted first
+        """
+        # Converting band by band never holds a second copy
+        # of the decoded rows
+        for offset in range(0, image.height(), self.band_height):
+            if self.isInterruptionRequested():
+                return False
+            band = QRect(0, offset, image.width(),
+                         min(self.band_height, image.height() - offset))
+            self.band.emit(top + offset, image.copy(band).convertToFormat(
+                TILE_FORMAT))
+        return True
@@ -0,0 +1,650 @@
+from PyQt6.QtGui import (QImage, QPainter, QColor)
+from PyQt6.QtCore import (Qt, QPoint, QRect)
+from tile_store import (TileStore, TILE_SIZE, TILE_FORMAT)
+
+""" Layer stack for the PyQt6 Paint Application.
+    Keeps each layer in its own tile store and shows them
+    composited over white paper. The layers below and above
+    the active layer are each flattened into cached tiles,
+    so painting the active layer only ever composites three
+    images per tile however many layers there are. Caches
+    are dropped only where other layers change.
+"""
+
+# Blend modes offered for layers, by menu name
+BLEND_MODES = {
+    'Normal': QPainter.CompositionMode.CompositionMode_SourceOver,
+    'Multiply': QPainter.CompositionMode.CompositionMode_Multiply,
+    'Screen': QPainter.CompositionMode.CompositionMode_Screen,
+    'Overlay': QPainter.CompositionMode.CompositionMode_Overlay,
+    'Darken': QPainter.CompositionMode.CompositionMode_Darken,
+    'Lighten': QPainter.CompositionMode.CompositionMode_Lighten,
+    'Difference': QPainter.CompositionMode.CompositionMode_Difference,
+    'Add': QPainter.CompositionMode.CompositionMode_Plus,
+}
+
+
+class Layer:
+    """ A class to represent a Layer
+
+        ...
+
+        Attributes
+        ----------
+        tiles : TileStore
+            Tiles painted on the layer
+        name : str
+            Name shown for the layer
+        id : int
+            Number identifying the layer in its stack
+            however it is moved
+        opacity : float
+            Opacity from 0 to 1 the layer is composited at
+        blend_mode : str
+            Key of BLEND_MODES the layer is composited with
+        visible : bool
+            Whether the layer is composited at all
+
+        Methods
+        ----------
+        opaque():
+            Returns whether unpainted tiles are opaque
+        draw(painter, key):
+            Composites one tile of the layer with painter
+    """
+
+    def __init__(self, tiles, name, layer_id=0):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            tiles : TileStore
+                Tiles painted on the layer
+            name : str
+                Name shown for the layer
+            layer_id : int
+                Number identifying the layer in its stack
+        """
+        self.tiles = tiles
+        self.name = name
+        self.id = layer_id
+        self.opacity = 1.0
+        self.blend_mode = 'Normal'
+        self.visible = True
+
+    def opaque(self):
+        """
+        Returns whether unpainted tiles are opaque
+
+        Returns
+        ----------
+        bool
+            True for layers filled white like the background
+        """
+        return QColor(self.tiles.fill_color).alpha() == 255
+
+    def draw(self, painter, key):
+        """
+        Composites one tile of the layer with painter,
+        skipping unpainted transparent tiles as no blend
+        mode changes anything under them
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter whose origin is the tile's top left
+        key : tuple
+            Column and row of the tile
+        """
+        if not self.visible or (not self.tiles.painted(key) and
+                                not self.opaque()):
+            return
+        painter.setOpacity(self.opacity)
+        painter.setCompositionMode(BLEND_MODES[self.blend_mode])
+        painter.drawImage(QPoint(0, 0), self.tiles.tile(key))
+
+
+class LayerStack:
+    """ A class to represent a Layer Stack
+
+        ...
+
+        Attributes
+        ----------
+        width : int
+            Document width in pixels
+        height : int
+            Document height in pixels
+        layers : list
+            Layers from bottom to top
+        active : int
+            Index of the layer being painted
+        history : History
+            Undo history every layer's tiles report to
+        tile_size : int
+            Width and height in pixels of each tile
+        blank_tile : QImage
+            White paper tile shown where nothing is painted
+        below : dict
+            Cached composites of the layers below the
+            active layer keyed by (column, row)
+        above : dict
+            Cached composites of the layers above the
+            active layer keyed by (column, row)
+        revision : int
+            Counts changes to layer order and properties
+        created : int
+            Number of layers ever added, for naming
+
+        Methods
+        ----------
+        active_layer():
+            Returns the layer being painted
+        new_layer(name, fill_color, layer_id):
+            Returns a new empty layer sharing the history
+        add_layer():
+            Adds an empty layer above the active layer
+        delete_layer():
+            Removes the active layer
+        move_layer(offset):
+            Moves the active layer up or down the stack
+        set_active(index):
+            Selects the layer being painted
+        set_opacity(opacity):
+            Sets the active layer's opacity
+        set_blend_mode(blend_mode):
+            Sets the active layer's blend mode
+        set_visible(visible):
+            Shows or hides the active layer
+        flatten_to_background():
+            Removes every layer but the bottom one
+        restore_layer(index, name, opaque, layer_id):
+            Rebuilds a layer while replaying saved layers
+        changed():
+            Drops every cached composite after layer order
+            or properties change
+        invalidate(rect):
+            Drops cached composites covering a changed area
+        resize(width, height):
+            Resizes every layer
+        rect():
+            Returns rectangle covering the whole document
+        tile_keys(rect):
+            Returns keys of tiles intersecting a rectangle
+        tile_rect(key):
+            Returns document rectangle covered by a tile
+        tile(key):
+            Returns composite of every layer for a tile
+        below_tile(key):
+            Returns cached composite of the layers below
+        above_tile(key):
+            Returns cached composite of the layers above
+        render(painter, rect):
+            Draws composited document rectangle
+        to_image(rect):
+            Returns document rectangle flattened to an image
+        allocated_bytes():
+            Returns memory used by layer and cache tiles
+    """
+
+    def __init__(self, width, height, history=None, tile_size=TILE_SIZE):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            width : int
+                Document width in pixels
+            height : int
+                Document height in pixels
+            history : History
+                Undo history every layer's tiles report to
+            tile_size : int
+                Width and height in pixels of each tile
+        """
+        self.width = width
+        self.height = height
+        self.history = history
+        self.tile_size = tile_size
+        self.blank_tile = QImage(tile_size, tile_size, TILE_FORMAT)
+        self.blank_tile.fill(Qt.GlobalColor.white)
+        self.created = 0
+        self.layers = [self.new_layer('Background', Qt.GlobalColor.white)]
+        self.active = 0
+        self.below = {}
+        self.above = {}
+        self.revision = 0
+
+    def active_layer(self):
+        """
+        Returns the layer being painted
+
+        Returns
+        ----------
+        Layer
+            Layer at the active index
+        """
+        return self.layers[self.active]
+
+    def new_layer(self, name, fill_color=Qt.GlobalColor.transparent,
+                  layer_id=None):
+        """
+        Returns a new empty layer sharing the history
+
+        Parameters
+        ----------
+        name : str
+            Name shown for the layer
+        fill_color : QColor
+            Color of unpainted tiles
+        layer_id : int
+            Id of a layer being restored, a new id if None
+
+        Returns
+        ----------
+        Layer
+            Layer not yet in the stack
+        """
+        tiles = TileStore(self.width, self.height, self.tile_size,
+                          fill_color)
+        tiles.history = self.history
+        self.created += 1
+        if layer_id is None:
+            layer_id = self.created
+        self.created = max(self.created, layer_id)
+        return Layer(tiles, name, layer_id)
+
+    def add_layer(self):
+        """
+        Adds an empty layer above the active layer and
+        makes it active
+
+        Returns
+        ----------
+        Layer
+            The new layer
+        """
+        layer = self.new_layer(f'Layer {self.created}')
+        self.layers.insert(self.active + 1, layer)
+        self.active += 1
+        self.changed()
+        return layer
+
+    def delete_layer(self):
+        """
+        Removes the active layer, along with its undo
+        entries, unless it is the only layer
+
+        Returns
+        ----------
+        bool
+            True if the layer was removed
+        """
+        if len(self.layers) == 1:
+            return False
+        layer = self.layers.pop(self.active)
+        if self.history is not None:
+            self.history.forget(layer.tiles)
+        self.active = max(self.active - 1, 0)
+        self.changed()
+        return True
+
+    def move_layer(self, offset):
+        """
+        Moves the active layer up or down the stack
+
+        Parameters
+        ----------
+        offset : int
+            Positions to move, positive moves up
+
+        Returns
+        ----------
+        bool
+            True if the layer moved
+        """
+        index = self.active + offset
+        if not 0 <= index < len(self.layers) or offset == 0:
+            return False
+        layer = self.layers.pop(self.active)
+        self.layers.insert(index, layer)
+        self.active = index
+        self.changed()
+        return True
+
+    def set_active(self, index):
+        """
+        Selects the layer being painted
+
+        Parameters
+        ----------
+        index : int
+            Index of the layer, clamped to the stack
+        """
+        index = min(max(index, 0), len(self.layers) - 1)
+        if index != self.active:
+            self.active = index
+            self.below = {}
+            self.above = {}
+
+    def set_opacity(self, opacity):
+        """
+        Sets the active layer's opacity
+
+        Parameters
+        ----------
+        opacity : float
+            Opacity from 0 to 1
+        """
+        self.active_layer().opacity = opacity
+        self.changed()
+
+    def set_blend_mode(self, blend_mode):
+        """
+        Sets the active layer's blend mode
+
+        Parameters
+        ----------
+        blend_mode : str
+            Key of BLEND_MODES
+        """
+        self.active_layer().blend_mode = blend_mode
+        self.changed()
+
+    def set_visible(self, visible):
+        """
+        Shows or hides the active layer
+
+        Parameters
+        ----------
+        visible : bool
+            Whether the layer is composited
+        """
+        self.active_layer().visible = visible
+        self.changed()
+
+    def flatten_to_background(self):
+        """
+        Removes every layer but the bottom one, which
+        becomes active with default properties, ready for
+        a new or opened drawing
+        """
+        for layer in self.layers[1:]:
+            if self.history is not None:
+                self.history.forget(layer.tiles)
+        background = self.layers[0]
+        background.opacity = 1.0
+        background.blend_mode = 'Normal'
+        background.visible = True
+        self.layers = [background]
+        self.active = 0
+        self.changed()
+
+    def restore_layer(self, index, name, opaque, layer_id=None):
+        """
+        Rebuilds a layer while replaying saved layers,
+        index 0 starting a new stack
+
+        Parameters
+        ----------
+        index : int
+            Position of the layer, at most one past the top
+        name : str
+            Name shown for the layer
+        opaque : bool
+            Whether unpainted tiles are white rather than
+            transparent
+        layer_id : int
+            Id the layer was saved with, a new id if None
+
+        Returns
+        ----------
+        Layer
+            The rebuilt empty layer
+        """
+        fill_color = (Qt.GlobalColor.white if opaque else
+                      Qt.GlobalColor.transparent)
+        layer = self.new_layer(name, fill_color, layer_id)
+        if index == 0:
+            self.layers = []
+            self.active = 0
+        self.layers[index:index + 1] = [layer]
+        self.changed()
+        return layer
+
+    def changed(self):
+        """
+        Drops every cached composite after layer order
+        or properties change
+        """
+        self.below = {}
+        self.above = {}
+        self.revision += 1
+
+    def invalidate(self, rect):
+        """
+        Drops cached composites covering a changed area
+
+        Parameters
+        ----------
+        rect : QRect
+            Changed area in document coordinates
+        """
+        for key in self.tile_keys(rect):
+            self.below.pop(key, None)
+            self.above.pop(key, None)
+
+    def resize(self, width, height):
+        """
+        Resizes every layer
+
+        Parameters
+        ----------
+        width : int
+            New document width in pixels
+        height : int
+            New document height in pixels
+        """
+        self.width = width
+        self.height = height
+        for layer in self.layers:
+            layer.tiles.resize(width, height)
+        self.below = {}
+        self.above = {}
+
+    def rect(self):
+        """
+        Returns rectangle covering the whole document
+
+        Returns
+        ----------
+        QRect
+            Document rectangle with origin at (0, 0)
+        """
+        return QRect(0, 0, self.width, self.height)
+
+    def tile_keys(self, rect):
+        """
+        Returns keys of tiles intersecting a rectangle
+
+        Parameters
+        ----------
+        rect : QRect
+            Rectangle in document coordinates
+
+        Returns
+        ----------
+        list
+            (column, row) keys of tiles inside the document
+        """
+        return self.layers[0].tiles.tile_keys(rect)
+
+    def tile_rect(self, key):
+        """
+        Returns document rectangle covered by a tile
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QRect
+            Rectangle of the tile in document coordinates
+        """
+        return self.layers[0].tiles.tile_rect(key)
+
+    def tile(self, key):
+        """
+        Returns composite of every layer for a tile
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QImage
+            Composited tile, or the blank tile when no
+            visible layer has painted it
+        """
+        # A lone opaque layer needs no compositing
+        active = self.active_layer()
+        if (len(self.layers) == 1 and active.visible and
+                active.opacity == 1 and active.blend_mode == 'Normal' and
+                active.opaque()):
+            tile = active.tiles.decode(key)
+            return self.blank_tile if tile is None else tile
+        if not any(layer.tiles.painted(key)
+                   for layer in self.layers if layer.visible):
+            return self.blank_tile
+
+        # Only the active layer is composited afresh
+        image = self.below_tile(key).copy()
+        painter = QPainter(image)
+        active.draw(painter, key)
+        above = self.above_tile(key)
+        if above is not None:
+            painter.setOpacity(1)
+            painter.setCompositionMode(
+                QPainter.CompositionMode.CompositionMode_SourceOver)
+            painter.drawImage(QPoint(0, 0), above)
+        else:
+            for layer in self.layers[self.active + 1:]:
+                layer.draw(painter, key)
+        painter.end()
+        return image
+
+    def below_tile(self, key):
+        """
+        Returns cached composite of the layers below the
+        active layer over white paper
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QImage
+            Composited tile, shared by later calls
+        """
+        if self.active == 0:
+            return self.blank_tile
+        image = self.below.get(key)
+        if image is None:
+            image = self.blank_tile.copy()
+            painter = QPainter(image)
+            for layer in self.layers[:self.active]:
+                layer.draw(painter, key)
+            painter.end()
+            self.below[key] = image
+        return image
+
+    def above_tile(self, key):
+        """
+        Returns cached composite of the layers above the
+        active layer over transparency
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QImage
+            Composited tile, or None when the layers above
+            must be blended one at a time because one uses
+            a blend mode other than Normal
+        """
+        layers = [layer for layer in self.layers[self.active + 1:]
+                  if layer.visible]
+        if any(layer.blend_mode != 'Normal' for layer in layers):
+            return None
+        image = self.above.get(key)
+        if image is None:
+            image = QImage(self.tile_size, self.tile_size, TILE_FORMAT)
+            image.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(image)
+            for layer in layers:
+                layer.draw(painter, key)
+            painter.end()
+            self.above[key] = image
+        return image
+
+    def render(self, painter, rect):
+        """
+        Draws composited document rectangle
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter whose coordinates match the document
+        rect : QRect
+            Document area to draw
+        """
+        for key in self.tile_keys(rect):
+            painter.drawImage(self.tile_rect(key).topLeft(), self.tile(key))
+
+    def to_image(self, rect=None):
+        """
+        Returns document rectangle flattened to an image
+
+        Parameters
+        ----------
+        rect : QRect
+            Document area to copy, whole document if None
+
+        Returns
+        ----------
+        QImage
+            Image of every visible layer composited over
+            white paper
+        """
+        if rect is None:
+            rect = self.rect()
+        image = QImage(rect.size(), TILE_FORMAT)
+        image.fill(Qt.GlobalColor.white)
+        painter = QPainter(image)
+        painter.translate(-rect.x(), -rect.y())
+        self.render(painter, rect)
+        painter.end()
+        return image
+
+    def allocated_bytes(self):
+        """
+        Returns memory used by layer and cache tiles
+
+        Returns
+        ----------
+        int
+            Bytes of pixel data held by allocated tiles
+        """
+        cached = list(self.below.values()) + list(self.above.values())
+        return (sum(layer.tiles.allocated_bytes() for layer in self.layers) +
+                sum(tile.sizeInBytes() for tile in cached))
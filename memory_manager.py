@@ -0,0 +1,429 @@
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import (QThread, QTimer, QStandardPaths, pyqtSignal)
+from collections import OrderedDict
+import mmap
+import os
+import tempfile
+import zlib
+
+""" Memory manager for the PyQt6 Paint Application.
+    Keeps the pixels of every open document within one
+    memory budget. Once the documents hold more than the
+    budget, the least recently focused ones have their
+    tiles and undo snapshots compressed on a worker thread
+    into a temporary spill file in the app's cache folder
+    that is memory mapped back in, so their tiles are
+    decoded again only as they come into view when their
+    tab is next focused.
+"""
+
+# Bytes of pixels open documents may hold before the least
+# recently used are spilled, PAINT_MEMORY_BUDGET in MiB
+# overrides it
+MEMORY_BUDGET = 1024 * 2 ** 20
+
+# Milliseconds between checks of the budget
+CHECK_INTERVAL = 5000
+
+# zlib level spilled tiles are compressed with, fast so
+# memory is released soon after the budget is passed
+SPILL_LEVEL = 1
+
+
+def memory_budget():
+    """ Returns the memory budget in bytes, from the
+        PAINT_MEMORY_BUDGET environment variable in MiB
+        if set
+    """
+    budget = os.environ.get('PAINT_MEMORY_BUDGET')
+    if budget is None:
+        return MEMORY_BUDGET
+    return int(float(budget) * 2 ** 20)
+
+
+def spill_directory():
+    """ Returns the folder spill files are written to, the
+        app's cache folder, which is on disk where the
+        system temporary folder is often kept in memory
+    """
+    return (QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.CacheLocation) or
+        tempfile.gettempdir())
+
+
+def resident_bytes(canvas):
+    """
+    Returns memory held by a document's pixels
+
+    Parameters
+    ----------
+    canvas : PaintCanvas
+        Canvas of the document
+
+    Returns
+    ----------
+    int
+        Bytes of layer tiles, cached composites, mipmaps,
+        and undo snapshots held in memory
+    """
+    return (canvas.layers.allocated_bytes() +
+            canvas.mipmaps.allocated_bytes() + canvas.history.used_bytes())
+
+
+class SpillWorker(QThread):
+    """ A class to represent a Spill Worker
+
+        ...
+
+        Attributes
+        ----------
+        QThread : class
+            SpillWorker inherits from this PyQt6 class
+        directory : str
+            Folder the spill file is written to
+        items : list
+            Shallow tile copies to compress and already
+            compressed snapshots to write, in file order
+        spilled : pyqtSignal
+            Emits memory map of the spill file, None if
+            nothing was written, and the offset and length
+            of each item in it
+        failed : pyqtSignal
+            Emits error message if the spill file could not
+            be written
+
+        Methods
+        ----------
+        run():
+            Writes every item to the spill file and maps it
+    """
+
+    spilled = pyqtSignal(object, list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, directory, items, parent=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            directory : str
+                Folder the spill file is written to
+            items : list
+                QImage tiles to compress and bytes to write
+            parent : QObject
+                Owner of the worker thread
+        """
+        super().__init__(parent)
+        self.directory = directory
+        self.items = items
+
+    def run(self):
+        """
+        Compresses tiles and writes every item to the spill
+        file, then maps the file back in, emitting nothing
+        once interrupted
+        """
+        # The spill file is deleted once closed, its pages
+        # stay reachable through the map until every view
+        # into it is decoded or dropped
+        locations = []
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.TemporaryFile(prefix='paint-spill-',
+                                        dir=self.directory) as spill_file:
+                offset = 0
+                for item in self.items:
+                    if self.isInterruptionRequested():
+                        return
+                    if isinstance(item, QImage):
+                        buffer = item.constBits()
+                        buffer.setsize(item.sizeInBytes())
+                        item = zlib.compress(bytes(buffer), SPILL_LEVEL)
+                    spill_file.write(item)
+                    locations.append((offset, len(item)))
+                    offset += len(item)
+                data = None
+                if offset:
+                    spill_file.flush()
+                    data = mmap.mmap(spill_file.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+        except OSError as error:
+            self.failed.emit(str(error))
+            return
+        self.spilled.emit(data, locations)
+
+
+class MemoryManager:
+    """ A class to represent a Memory Manager
+
+        ...
+
+        Attributes
+        ----------
+        budget : int
+            Bytes of pixels open documents may hold
+        documents : OrderedDict
+            Canvases of open documents, least recently
+            focused first
+        timer : QTimer
+            Timer checking the budget as documents grow
+        worker : SpillWorker
+            Worker writing the current spill, or None
+        spilling : PaintCanvas
+            Canvas of the document being spilled, or None
+        spills : int
+            Number of times a document was spilled
+        spilled_bytes : int
+            Bytes of memory released by spilling
+
+        Methods
+        ----------
+        add(canvas):
+            Starts managing a document
+        remove(canvas):
+            Stops managing a closed document
+        activate(canvas):
+            Marks a document most recently used
+        resident_bytes():
+            Returns memory held by every document
+        enforce():
+            Spills least recently used documents until
+            within budget
+        spill(canvas):
+            Starts moving a document's pixels to a spill
+            file
+        spill_finished(worker, data, locations, sources):
+            Swaps spilled pixels for views into the spill
+            file
+        spill_failed(worker, message):
+            Keeps a document's pixels in memory
+        stop_spill():
+            Abandons the spill being written
+    """
+
+    def __init__(self, parent, budget=None, interval=CHECK_INTERVAL):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            parent : QObject
+                Owner of the check timer
+            budget : int
+                Bytes of pixels open documents may hold,
+                memory_budget() if None
+            interval : int
+                Milliseconds between checks of the budget
+        """
+        self.budget = memory_budget() if budget is None else budget
+        self.documents = OrderedDict()
+        self.timer = QTimer(parent)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.enforce)
+        self.timer.start()
+        self.worker = None
+        self.spilling = None
+        self.spills = 0
+        self.spilled_bytes = 0
+
+    def add(self, canvas):
+        """
+        Starts managing a document as the most recently
+        used
+
+        Parameters
+        ----------
+        canvas : PaintCanvas
+            Canvas of the new document
+        """
+        self.documents[canvas] = None
+        self.enforce()
+
+    def remove(self, canvas):
+        """
+        Stops managing a closed document
+
+        Parameters
+        ----------
+        canvas : PaintCanvas
+            Canvas of the closed document
+        """
+        if canvas is self.spilling:
+            self.stop_spill()
+        self.documents.pop(canvas, None)
+
+    def activate(self, canvas):
+        """
+        Marks a document most recently used, as when its
+        tab is focused
+
+        Parameters
+        ----------
+        canvas : PaintCanvas
+            Canvas of the focused document
+        """
+        if canvas in self.documents:
+            self.documents.move_to_end(canvas)
+            self.enforce()
+
+    def resident_bytes(self):
+        """
+        Returns memory held by every document
+
+        Returns
+        ----------
+        int
+            Bytes of pixels held in memory by all open
+            documents
+        """
+        return sum(resident_bytes(canvas) for canvas in self.documents)
+
+    def enforce(self):
+        """
+        Starts spilling the least recently used document
+        while over budget, never the focused document or
+        one being drawn on or loaded into. Each finished
+        spill checks the budget again
+        """
+        if self.worker is not None:
+            return
+        if self.resident_bytes() <= self.budget:
+            return
+        for canvas in list(self.documents)[:-1]:
+            if (canvas.drawing_status or canvas.image_loader is not None or
+                    canvas.history.entry is not None):
+                continue
+            if canvas.layers.allocated_bytes() or any(
+                    isinstance(snapshot, (bytes, QImage))
+                    for entry in (canvas.history.undo_entries +
+                                  canvas.history.redo_entries)
+                    for snapshot in entry['tiles'].values()):
+                self.spill(canvas)
+                return
+
+    def spill(self, canvas):
+        """
+        Starts a worker compressing a document's tiles and
+        undo snapshots into a spill file, taking shallow
+        copies so the document stays usable meanwhile
+
+        Parameters
+        ----------
+        canvas : PaintCanvas
+            Canvas of the document
+        """
+        history = canvas.history
+        items = []
+        sources = []
+        for layer in canvas.layers.layers:
+            for key, tile in layer.tiles.tiles.items():
+                items.append(QImage(tile))
+                sources.append((layer.tiles, key, tile.cacheKey()))
+        for entry in history.undo_entries + history.redo_entries:
+            for key, snapshot in entry['tiles'].items():
+                if isinstance(snapshot, QImage):
+                    items.append(QImage(snapshot))
+                elif isinstance(snapshot, bytes):
+                    items.append(snapshot)
+                else:
+                    continue
+                sources.append((entry, key, snapshot))
+
+        self.spilling = canvas
+        self.worker = SpillWorker(spill_directory(), items, canvas)
+        worker = self.worker
+        self.worker.spilled.connect(
+            lambda data, locations: self.spill_finished(
+                worker, data, locations, sources))
+        self.worker.failed.connect(
+            lambda message: self.spill_failed(worker, message))
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def spill_finished(self, worker, data, locations, sources):
+        """
+        Swaps spilled tiles and snapshots for views into the
+        spill file, keeping those changed since the spill
+        started, then checks the budget again
+
+        Parameters
+        ----------
+        worker : SpillWorker
+            Worker that wrote the spill file
+        data : mmap.mmap
+            Memory map of the spill file, None if empty
+        locations : list
+            Offset and length of each item in the file
+        sources : list
+            Tile store, key, and cache key of each tile,
+            then entry, key, and snapshot of each snapshot
+        """
+        if worker is not self.worker:
+            return
+        canvas = self.spilling
+        self.worker = None
+        self.spilling = None
+
+        # The document may have been focused since, and is
+        # then kept in memory as it is about to be shown
+        if data is None or canvas is list(self.documents)[-1]:
+            return
+        before = resident_bytes(canvas)
+        history = canvas.history
+        entries = {id(entry): entry for entry in
+                   history.undo_entries + history.redo_entries}
+        view = memoryview(data)
+        for (source, key, original), (offset, length) in zip(sources,
+                                                             locations):
+            spilled = view[offset:offset + length]
+            if isinstance(source, dict):
+                if (id(source) in entries and
+                        source['tiles'].get(key) is original):
+                    source['tiles'][key] = spilled
+            else:
+                tile = source.tiles.get(key)
+                if tile is not None and tile.cacheKey() == original:
+                    del source.tiles[key]
+                    source.stored[key] = spilled
+        for entry in entries.values():
+            entry['compressed'] = not any(
+                isinstance(snapshot, QImage)
+                for snapshot in entry['tiles'].values())
+            history.measure(entry)
+        canvas.layers.invalidate(canvas.layers.rect())
+        canvas.mipmaps.clear()
+
+        self.spills += 1
+        self.spilled_bytes += before - resident_bytes(canvas)
+        self.enforce()
+
+    def spill_failed(self, worker, message):
+        """
+        Keeps a document's pixels in memory when its spill
+        file could not be written
+
+        Parameters
+        ----------
+        worker : SpillWorker
+            Worker that failed
+        message : str
+            Reason the spill file was not written
+        """
+        if worker is not self.worker:
+            return
+        self.spilling.status_display.show_message(
+            f'Could not spill to disk: {message}', 5000)
+        self.worker = None
+        self.spilling = None
+
+    def stop_spill(self):
+        """
+        Abandons the spill being written, waiting for its
+        worker to stop
+        """
+        if self.worker is not None:
+            self.worker.requestInterruption()
+            self.worker.wait()
+        self.worker = None
+        self.spilling = None
@@ -0,0 +1,181 @@
+from PyQt6.QtGui import (QImage, QPainter)
+from PyQt6.QtCore import (QRect, QRectF)
+from tile_store import TILE_FORMAT
+
+""" Mipmap cache for the PyQt6 Paint Application.
+    Keeps halved copies of the document tiles for each
+    zoom level so downscaled views draw a few small images
+    instead of resampling full resolution tiles. Cached
+    tiles are dropped only where the document changed.
+"""
+
+
+class MipmapCache:
+    """ A class to represent a Mipmap Cache
+
+        ...
+
+        Attributes
+        ----------
+        tiles : TileStore or LayerStack
+            Document tiles the levels are built from
+        levels : dict
+            Downscaled tile images keyed by
+            (level, column, row)
+
+        Methods
+        ----------
+        level_size(level):
+            Returns document pixels covered by one tile
+            at a level
+        tile(level, key):
+            Returns tile image at a level, building it
+            from the level below when not cached
+        invalidate(rect):
+            Drops cached tiles covering a changed area
+        clear():
+            Drops every cached tile
+        render(painter, rect, level):
+            Draws document rectangle using tiles from
+            a level
+        allocated_bytes():
+            Returns memory used by cached tiles
+    """
+
+    def __init__(self, tiles):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            tiles : TileStore or LayerStack
+                Document tiles the levels are built from
+        """
+        self.tiles = tiles
+        self.levels = {}
+
+    def level_size(self, level):
+        """
+        Returns document pixels covered by one tile
+        at a level
+
+        Parameters
+        ----------
+        level : int
+            Mipmap level, 0 being full resolution
+
+        Returns
+        ----------
+        int
+            Width and height in document pixels
+        """
+        return self.tiles.tile_size << level
+
+    def tile(self, level, key):
+        """
+        Returns tile image at a level, building it
+        from the level below when not cached
+
+        Parameters
+        ----------
+        level : int
+            Mipmap level, 0 being full resolution
+        key : tuple
+            Column and row of the tile at that level
+
+        Returns
+        ----------
+        QImage
+            Tile image, or the shared blank tile when
+            nothing under it has been painted
+        """
+        if level == 0:
+            return self.tiles.tile(key)
+        cached = self.levels.get((level, ) + key)
+        if cached is not None:
+            return cached
+
+        column, row = key
+        children = [((2 * column + dx, 2 * row + dy),
+                     self.tile(level - 1, (2 * column + dx, 2 * row + dy)))
+                    for dy in (0, 1) for dx in (0, 1)]
+
+        blank = self.tiles.blank_tile
+        if all(child is blank for _, child in children):
+            image = blank
+        else:
+            # Each child shrinks to one quarter of the parent
+            size = self.tiles.tile_size
+            half = size // 2
+            image = QImage(size, size, TILE_FORMAT)
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            for (child_column, child_row), child in children:
+                target = QRect((child_column % 2) * half,
+                               (child_row % 2) * half, half, half)
+                painter.drawImage(target, child)
+            painter.end()
+        self.levels[(level, ) + key] = image
+        return image
+
+    def invalidate(self, rect):
+        """
+        Drops cached tiles covering a changed area
+
+        Parameters
+        ----------
+        rect : QRect
+            Changed area in document coordinates
+        """
+        if not self.levels:
+            return
+        levels = {key[0] for key in self.levels}
+        for level in levels:
+            size = self.level_size(level)
+            for row in range(rect.top() // size, rect.bottom() // size + 1):
+                for column in range(rect.left() // size,
+                                    rect.right() // size + 1):
+                    self.levels.pop((level, column, row), None)
+
+    def clear(self):
+        """
+        Drops every cached tile
+        """
+        self.levels = {}
+
+    def render(self, painter, rect, level):
+        """
+        Draws document rectangle using tiles from a level
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter whose coordinates match the document
+        rect : QRect
+            Document area to draw
+        level : int
+            Mipmap level to draw from
+        """
+        if level == 0:
+            self.tiles.render(painter, rect)
+            return
+        rect = rect.intersected(self.tiles.rect())
+        if rect.isEmpty():
+            return
+        size = self.level_size(level)
+        for row in range(rect.top() // size, rect.bottom() // size + 1):
+            for column in range(rect.left() // size,
+                                rect.right() // size + 1):
+                target = QRectF(column * size, row * size, size, size)
+                painter.drawImage(target, self.tile(level, (column, row)))
+
+    def allocated_bytes(self):
+        """
+        Returns memory used by cached tiles
+
+        Returns
+        ----------
+        int
+            Bytes of pixel data held by every level
+        """
+        return sum(tile.sizeInBytes() for tile in self.levels.values())
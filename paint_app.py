@@ -1,14 +1,47 @@
-from PyQt6.QtWidgets import (QMainWindow, QApplication, QStatusBar)
-from PyQt6.QtGui import (QAction, QIcon)
-from canvas import PaintCanvas
+from PyQt6.QtWidgets import (QMainWindow, QApplication, QStatusBar,
+                             QMessageBox, QTabWidget, QFileDialog)
+from PyQt6.QtGui import (QAction, QCloseEvent)
+from canvas import (PaintCanvas, ZOOM_STEP, FILE_FILTERS)
+from layer_stack import BLEND_MODES
+from stroke_smoother import SMOOTHING_LEVELS
+from brush_engine import BRUSH_PRESETS
+from icon_atlas import IconAtlas
+from status_display import StatusDisplay
+from memory_manager import MemoryManager
+from filter_engine import (FilterEngine, FILTERS)
+from autosave import (journal_path, lock_journal, claim_journals)
+import os
 
 """ This is a PyQt6 Paint Application.
     User can create new, open existing, and save drawings
     using a variety of tools (pencil, brush, spray paint,
-    and eraser) in a variety of tool sizes, as well as
-    select different tool colors.
+    eraser, and bucket fill) in a variety of tool sizes,
+    as well as select different tool colors, and paint
+    on a stack of blended layers, adjust them with filters,
+    move, scale, and rotate selected parts of them,
+    with several drawings open side by side in tabs.
 """
 
+# Icon, label, and size of each entry in the tool menus,
+# the bucket offering color tolerances instead of sizes and
+# the select tool its selection shapes
+TOOL_MENUS = {
+    'Pencil': [('2px', 'Pencil 2px', 1), ('4px', 'Pencil 4px', 2),
+               ('6px', 'Pencil 6px', 3), ('8px', 'Pencil 8px', 4)],
+    'Brush': [('4px', 'Brush 4px', 2), ('8px', 'Brush 8px', 4),
+              ('12px', 'Brush 12px', 6), ('16px', 'Brush 16px', 8)],
+    'Spray': [('S_2px', 'Spray 2px', 1), ('S_4px', 'Spray 4px', 2),
+              ('S_6px', 'Spray 6px', 3), ('S_8px', 'Spray 8px', 4)],
+    'Eraser': [('E_16px', 'Eraser 16px', 4), ('E_24px', 'Eraser 24px', 6),
+               ('E_32px', 'Eraser 32px', 8), ('E_40px', 'Eraser 40px', 10)],
+    'Bucket': [(None, 'Exact Color', 0), (None, 'Tolerance 16', 16),
+               (None, 'Tolerance 48', 48), (None, 'Tolerance 96', 96)],
+    'Select': [(None, 'Rectangle', 0), (None, 'Lasso', 1)],
+}
+
+# Opacities offered in the layer opacity sub-menu
+LAYER_OPACITIES = [100, 75, 50, 25]
+
 
 class AppWindow(QMainWindow):
     """ A class to represent the AppWindow
@@ -19,11 +52,64 @@ class AppWindow(QMainWindow):
         ----------
         QMainWindow : class
             AppWindow inherits from this PyQt6 class
+        icons : IconAtlas
+            Menu icons, cut from one packed image
+        status_display : StatusDisplay
+            Status bar labels shared by every document
+        memory : MemoryManager
+            Keeps the pixels of open documents within a
+            memory budget
+        filters : FilterEngine
+            Filters layers on threads shared by every
+            document
+        tabs : QTabWidget
+            Tab of each open document's canvas
+        autosaving : bool
+            Whether documents autosave as they are opened
 
         Methods
         ----------
         init_UI():
             Sets up initial state of the object
+        canvas():
+            Returns the canvas of the focused document
+        documents():
+            Returns the canvas of every open document
+        new_document(number, lock):
+            Opens a blank document in a new tab
+        open_document():
+            Opens an image or project file in a new tab
+        save_document(save_as):
+            Saves the focused document
+        close_document(index):
+            Closes a document after prompting user to
+            save it
+        document_changed(index):
+            Shows the state of a newly focused document
+        refresh_titles():
+            Names each tab after its document
+        exit_program():
+            Closes the window, exiting the app
+        closeEvent(event: QCloseEvent):
+            Event handler prompts user to save each
+            document and waits for saves before the
+            window closes
+        defer_menu(menu, build):
+            Builds a menu's actions the first time it opens
+        build_tool_menu(menu, tool):
+            Adds an action for each size of a tool, and
+            each brush preset to the brush menu
+        build_smoothing_menu(menu):
+            Adds an action for each stroke smoothing level
+        build_opacity_menu(menu):
+            Adds an action for each layer opacity
+        build_blend_menu(menu):
+            Adds an action for each layer blend mode
+        build_filter_menu(menu):
+            Adds an action for each filter
+        start_autosave():
+            Offers to recover drawings left by a crash
+            then starts autosaving
 
     """
 
@@ -32,6 +118,8 @@ class AppWindow(QMainWindow):
         Constructs all the attributes for the object
         """
         super().__init__()
+        self.icons = IconAtlas()
+        self.autosaving = False
         self.init_UI()
 
     def init_UI(self):
@@ -41,165 +129,524 @@ class AppWindow(QMainWindow):
         self.setMinimumSize(500, 500)
         self.setWindowTitle('PyQt Paint App')
 
-        # Create a PaintCanvas class instance
-        canvas = PaintCanvas(self)
-        self.setCentralWidget(canvas)
-
         # Create a status bar using QStatusBar class
         self.statusBar = QStatusBar(self)
         self.setStatusBar(self.statusBar)
 
+        self.status_display = StatusDisplay(self.statusBar)
+        self.filters = FilterEngine()
+
+        # Create tabs holding a PaintCanvas for each document,
+        # their pixels kept within a shared memory budget
+        self.memory = MemoryManager(self)
+        self.tabs = QTabWidget(self)
+        self.tabs.setDocumentMode(True)
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.tabCloseRequested.connect(self.close_document)
+        self.setCentralWidget(self.tabs)
+        self.new_document()
+
         # Create menu bar with drop-down fields and tool icons
         menu_bar = self.menuBar()
         menu_bar.setNativeMenuBar(False)
 
         # Add a 'File' drop-down to menu bar
         file_menu = menu_bar.addMenu('File')
-        menu_bar.addMenu(QIcon('Icons/separator.png'), '|')
+
+        # Add an 'Edit' drop-down to menu bar
+        edit_menu = menu_bar.addMenu('Edit')
+
+        # Add a 'View' drop-down to menu bar
+        view_menu = menu_bar.addMenu('View')
+
+        # Add a 'Layer' drop-down to menu bar
+        layer_menu = menu_bar.addMenu('Layer')
+
+        # Add a 'Filter' drop-down to menu bar, built on first use
+        self.defer_menu(menu_bar.addMenu('Filter'), self.build_filter_menu)
+        menu_bar.addMenu(self.icons.icon('separator'), '|')
 
         # Add an open icon to menu bar
-        self.open_icon = QAction(QIcon('Icons/open.png'), 'Open')
-        self.open_icon.triggered.connect(canvas.open_file)
+        self.open_icon = QAction(self.icons.icon('open'), 'Open')
+        self.open_icon.triggered.connect(self.open_document)
         menu_bar.addAction(self.open_icon)
 
         # Add a new icon to menu bar
-        self.new_icon = QAction(QIcon('Icons/new.png'), 'New')
-        self.new_icon.triggered.connect(canvas.new_file)
+        self.new_icon = QAction(self.icons.icon('new'), 'New')
+        self.new_icon.triggered.connect(lambda: self.new_document())
         menu_bar.addAction(self.new_icon)
 
         # Add a save icon to menu bar
-        self.save_icon = QAction(QIcon('Icons/save.png'), 'Save')
-        self.save_icon.triggered.connect(canvas.save_file)
+        self.save_icon = QAction(self.icons.icon('save'), 'Save')
+        self.save_icon.triggered.connect(lambda: self.save_document())
         menu_bar.addAction(self.save_icon)
 
-        # Add pencil, brush, spray paint, and eraser icons
-        # with drop-downs to menu bar
-        menu_bar.addMenu(QIcon('Icons/separator.png'), '|')
-        pencil_menu = menu_bar.addMenu(QIcon('Icons/pencil.png'), 'Pencil')
-        brush_menu = menu_bar.addMenu(QIcon('Icons/brush.png'), 'Brush')
-        spray_menu = menu_bar.addMenu(QIcon('Icons/spray.png'), 'Spray')
-        eraser_menu = menu_bar.addMenu(QIcon('Icons/eraser.png'), 'Eraser')
+        # Add pencil, brush, spray paint, eraser, bucket, and select icons
+        # with drop-downs to menu bar, their sizes added on first use
+        menu_bar.addMenu(self.icons.icon('separator'), '|')
+        for tool in TOOL_MENUS:
+            tool_menu = menu_bar.addMenu(self.icons.icon(tool.lower()), tool)
+            self.defer_menu(tool_menu, lambda menu, tool=tool:
+                            self.build_tool_menu(menu, tool))
 
         # Add a color selector icon to menu bar
-        self.colors_icon = QAction(QIcon('Icons/colors.png'), 'Colors')
+        self.colors_icon = QAction(self.icons.icon('colors'), 'Colors')
         self.colors_icon.triggered.connect(
-            lambda: canvas.select_tool_size('Colors', 0))
+            lambda: self.canvas().select_tool_size('Colors', 0))
         menu_bar.addAction(self.colors_icon)
 
-        # Create actions (new, open, save, save as, exit) to file menu
-        self.new_action = QAction(QIcon('Icons/new.png'), 'New')
-        self.new_action.triggered.connect(canvas.new_file)
+        # Create actions (new, open, save, save as, export, close,
+        # exit) to file menu, each acting on the focused document
+        self.new_action = QAction(self.icons.icon('new'), 'New')
+        self.new_action.triggered.connect(lambda: self.new_document())
         file_menu.addAction(self.new_action)
 
-        self.open_action = QAction(QIcon('Icons/open.png'), 'Open')
-        self.open_action.triggered.connect(canvas.open_file)
+        self.open_action = QAction(self.icons.icon('open'), 'Open')
+        self.open_action.triggered.connect(self.open_document)
         file_menu.addAction(self.open_action)
 
-        self.save_action = QAction(QIcon('Icons/save.png'), 'Save')
-        self.save_action.triggered.connect(canvas.save_file)
+        self.save_action = QAction(self.icons.icon('save'), 'Save')
+        self.save_action.triggered.connect(lambda: self.save_document())
         file_menu.addAction(self.save_action)
 
-        self.save_as_action = QAction(QIcon('Icons/save_as.png'), 'Save As')
-        self.save_as_action.triggered.connect(canvas.save_file_as)
+        self.save_as_action = QAction(self.icons.icon('save_as'), 'Save As')
+        self.save_as_action.triggered.connect(
+            lambda: self.save_document(save_as=True))
         file_menu.addAction(self.save_as_action)
+
+        self.export_action = QAction('Export...')
+        self.export_action.triggered.connect(
+            lambda: self.canvas().export_file())
+        file_menu.addAction(self.export_action)
+
+        self.close_action = QAction('Close')
+        self.close_action.triggered.connect(
+            lambda: self.close_document(self.tabs.currentIndex()))
+        file_menu.addAction(self.close_action)
         file_menu.addSeparator()
 
-        self.exit_action = QAction(QIcon('Icons/exit.png'), 'Exit')
-        self.exit_action.triggered.connect(canvas.exit_program)
+        self.exit_action = QAction(self.icons.icon('exit'), 'Exit')
+        self.exit_action.triggered.connect(self.exit_program)
         file_menu.addAction(self.exit_action)
 
-        # Create actions to select size to pencil menu
-        self.pencil1x_action = QAction(QIcon('Icons/2px.png'), 'Pencil 2px')
-        self.pencil1x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Pencil', 1))
-        pencil_menu.addAction(self.pencil1x_action)
-
-        self.pencil2x_action = QAction(QIcon('Icons/4px.png'), 'Pencil 4px')
-        self.pencil2x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Pencil', 2))
-        pencil_menu.addAction(self.pencil2x_action)
-
-        self.pencil3x_action = QAction(QIcon('Icons/6px.png'), 'Pencil 6px')
-        self.pencil3x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Pencil', 3))
-        pencil_menu.addAction(self.pencil3x_action)
-
-        self.pencil4x_action = QAction(QIcon('Icons/8px.png'), 'Pencil 8px')
-        self.pencil4x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Pencil', 4))
-        pencil_menu.addAction(self.pencil4x_action)
-
-        # Create actions to select size to brush menu
-        self.brush1x_action = QAction(QIcon('Icons/4px.png'), 'Brush 4px')
-        self.brush1x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Brush', 2))
-        brush_menu.addAction(self.brush1x_action)
-
-        self.brush2x_action = QAction(QIcon('Icons/8px.png'), 'Brush 8px')
-        self.brush2x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Brush', 4))
-        brush_menu.addAction(self.brush2x_action)
-
-        self.brush3x_action = QAction(QIcon('Icons/12px.png'), 'Brush 12px')
-        self.brush3x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Brush', 6))
-        brush_menu.addAction(self.brush3x_action)
-
-        self.brush4x_action = QAction(QIcon('Icons/16px.png'), 'Brush 16px')
-        self.brush4x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Brush', 8))
-        brush_menu.addAction(self.brush4x_action)
-
-        # Create actions to select size to spray menu
-        self.spray1x_action = QAction(QIcon('Icons/S_4px.png'), 'Spray 2px')
-        self.spray1x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Spray', 1))
-        spray_menu.addAction(self.spray1x_action)
-
-        self.spray2x_action = QAction(QIcon('Icons/S_4px.png'), 'Spray 4px')
-        self.spray2x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Spray', 2))
-        spray_menu.addAction(self.spray2x_action)
-
-        self.spray3x_action = QAction(QIcon('Icons/S_6px.png'), 'Spray 6px')
-        self.spray3x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Spray', 3))
-        spray_menu.addAction(self.spray3x_action)
-
-        self.spray4x_action = QAction(QIcon('Icons/S_8px.png'), 'Spray 8px')
-        self.spray4x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Spray', 4))
-        spray_menu.addAction(self.spray4x_action)
-
-        # Create actions to select size eraser menu
-        self.eraser1x_action = QAction(
-            QIcon('Icons/E_16px.png'), 'Eraser 16px')
-        self.eraser1x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Eraser', 4))
-        eraser_menu.addAction(self.eraser1x_action)
-
-        self.eraser2x_action = QAction(
-            QIcon('Icons/E_24px.png'), 'Eraser 24px')
-        self.eraser2x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Eraser', 6))
-        eraser_menu.addAction(self.eraser2x_action)
-
-        self.eraser3x_action = QAction(
-            QIcon('Icons/E_32px.png'), 'Eraser 32px')
-        self.eraser3x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Eraser', 8))
-        eraser_menu.addAction(self.eraser3x_action)
-
-        self.eraser4x_action = QAction(
-            QIcon('Icons/E_40px.png'), 'Eraser 40px')
-        self.eraser4x_action.triggered.connect(
-            lambda: canvas.select_tool_size('Eraser', 10))
-        eraser_menu.addAction(self.eraser4x_action)
-
-        # Add keyboard shortcuts for new, open, and save actions
+        # Create actions (undo, redo, deselect) to edit menu
+        self.undo_action = QAction('Undo')
+        self.undo_action.triggered.connect(lambda: self.canvas().undo())
+        edit_menu.addAction(self.undo_action)
+
+        self.redo_action = QAction('Redo')
+        self.redo_action.triggered.connect(lambda: self.canvas().redo())
+        edit_menu.addAction(self.redo_action)
+
+        self.deselect_action = QAction('Deselect')
+        self.deselect_action.triggered.connect(
+            lambda: self.canvas().deselect())
+        edit_menu.addAction(self.deselect_action)
+        edit_menu.addSeparator()
+
+        # Add stroke smoothing sub-menu, built on first use
+        self.defer_menu(edit_menu.addMenu('Stroke Smoothing'),
+                        self.build_smoothing_menu)
+
+        # Create actions (zoom in, zoom out, actual size) to view menu
+        self.zoom_in_action = QAction('Zoom In')
+        self.zoom_in_action.triggered.connect(
+            lambda: self.canvas().zoom_view(ZOOM_STEP))
+        view_menu.addAction(self.zoom_in_action)
+
+        self.zoom_out_action = QAction('Zoom Out')
+        self.zoom_out_action.triggered.connect(
+            lambda: self.canvas().zoom_view(1 / ZOOM_STEP))
+        view_menu.addAction(self.zoom_out_action)
+
+        self.actual_size_action = QAction('Actual Size')
+        self.actual_size_action.triggered.connect(
+            lambda: self.canvas().reset_view())
+        view_menu.addAction(self.actual_size_action)
+        view_menu.addSeparator()
+
+        # Create checkable profiling overlay action to view menu
+        self.profiler_action = QAction('Profiling Overlay')
+        self.profiler_action.setCheckable(True)
+        self.profiler_action.setChecked(
+            self.canvas().profiler.overlay_visible)
+        self.profiler_action.toggled.connect(
+            lambda checked: self.canvas().profiler.show_overlay(checked))
+        view_menu.addAction(self.profiler_action)
+
+        # Create actions (new, delete, move, select, show) to layer menu
+        self.new_layer_action = QAction('New Layer')
+        self.new_layer_action.triggered.connect(
+            lambda: self.canvas().add_layer())
+        layer_menu.addAction(self.new_layer_action)
+
+        self.delete_layer_action = QAction('Delete Layer')
+        self.delete_layer_action.triggered.connect(
+            lambda: self.canvas().delete_layer())
+        layer_menu.addAction(self.delete_layer_action)
+        layer_menu.addSeparator()
+
+        self.layer_up_action = QAction('Move Layer Up')
+        self.layer_up_action.triggered.connect(
+            lambda: self.canvas().move_layer(1))
+        layer_menu.addAction(self.layer_up_action)
+
+        self.layer_down_action = QAction('Move Layer Down')
+        self.layer_down_action.triggered.connect(
+            lambda: self.canvas().move_layer(-1))
+        layer_menu.addAction(self.layer_down_action)
+
+        self.select_above_action = QAction('Select Layer Above')
+        self.select_above_action.triggered.connect(
+            lambda: self.canvas().select_layer(1))
+        layer_menu.addAction(self.select_above_action)
+
+        self.select_below_action = QAction('Select Layer Below')
+        self.select_below_action.triggered.connect(
+            lambda: self.canvas().select_layer(-1))
+        layer_menu.addAction(self.select_below_action)
+        layer_menu.addSeparator()
+
+        self.layer_visible_action = QAction('Show/Hide Layer')
+        self.layer_visible_action.triggered.connect(
+            lambda: self.canvas().toggle_layer_visibility())
+        layer_menu.addAction(self.layer_visible_action)
+
+        # Add layer opacity and blend mode sub-menus, built on first use
+        self.defer_menu(layer_menu.addMenu('Opacity'),
+                        self.build_opacity_menu)
+        self.defer_menu(layer_menu.addMenu('Blend Mode'),
+                        self.build_blend_menu)
+
+        # Add keyboard shortcuts for new, open, save, and close actions
         self.new_action.setShortcut('Ctrl+N')
         self.open_action.setShortcut('Ctrl+O')
         self.save_as_action.setShortcut('Ctrl+S')
+        self.close_action.setShortcut('Ctrl+W')
+
+        # Add keyboard shortcuts for undo, redo, and deselect actions
+        self.undo_action.setShortcut('Ctrl+Z')
+        self.redo_action.setShortcut('Ctrl+Shift+Z')
+        self.deselect_action.setShortcut('Ctrl+D')
+
+        # Add keyboard shortcuts for zoom actions
+        self.zoom_in_action.setShortcut('Ctrl+=')
+        self.zoom_out_action.setShortcut('Ctrl+-')
+        self.actual_size_action.setShortcut('Ctrl+0')
+        self.profiler_action.setShortcut('F12')
+
+        # Add keyboard shortcuts for layer actions
+        self.new_layer_action.setShortcut('Ctrl+Shift+N')
+        self.layer_up_action.setShortcut('Ctrl+]')
+        self.layer_down_action.setShortcut('Ctrl+[')
+        self.select_above_action.setShortcut('Alt+]')
+        self.select_below_action.setShortcut('Alt+[')
+
+        # Follow focus between documents once the actions exist
+        self.tabs.currentChanged.connect(self.document_changed)
+
+    def canvas(self):
+        """
+        Returns the canvas of the focused document
+
+        Returns
+        ----------
+        PaintCanvas
+            Canvas in the current tab
+        """
+        return self.tabs.currentWidget()
+
+    def documents(self):
+        """
+        Returns the canvas of every open document
+
+        Returns
+        ----------
+        list
+            PaintCanvas of each tab, in tab order
+        """
+        return [self.tabs.widget(index) for index in range(self.tabs.count())]
+
+    def new_document(self, number=None, lock=None):
+        """
+        Opens a blank document in a new tab and focuses it
+
+        Parameters
+        ----------
+        number : int
+            Number of the document, the lowest not open here
+            or in another running instance if None
+        lock : QLockFile
+            Lock already held on the document's autosave
+            journal, taken here if None
+
+        Returns
+        ----------
+        PaintCanvas
+            Canvas of the new document
+        """
+        if number is None:
+            # Journals of other running instances stay locked
+            numbers = {canvas.number for canvas in self.documents()}
+            number = 0
+            while lock is None:
+                number += 1
+                if number not in numbers:
+                    lock = lock_journal(number)
+        canvas = PaintCanvas(self, number, lock)
+        self.memory.add(canvas)
+        self.tabs.setCurrentIndex(self.tabs.addTab(canvas,
+                                                   canvas.document_name()))
+        if self.autosaving:
+            canvas.autosave.start()
+        return canvas
+
+    def open_document(self):
+        """
+        Opens an image or project file in a new tab, or in
+        the focused tab if its document is still blank
+        """
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, 'Open File', '', FILE_FILTERS)
+        if not file_path:
+            return
+        canvas = self.canvas()
+        if not canvas.untouched():
+            canvas = self.new_document()
+        canvas.open_file(file_path)
+        self.refresh_titles()
+
+    def save_document(self, save_as=False):
+        """
+        Saves the focused document
+
+        Parameters
+        ----------
+        save_as : bool
+            Whether to ask for a new file to save to
+        """
+        if save_as:
+            self.canvas().save_file_as()
+        else:
+            self.canvas().save_file()
+        self.refresh_titles()
+
+    def close_document(self, index):
+        """
+        Closes a document after prompting user to save
+        it, opening a blank one if it was the last
+
+        Parameters
+        ----------
+        index : int
+            Tab index of the document
+        """
+        canvas = self.tabs.widget(index)
+        if canvas is None:
+            return
+        canvas.close_document()
+        self.memory.remove(canvas)
+        self.tabs.removeTab(index)
+        canvas.deleteLater()
+        if self.tabs.count() == 0:
+            self.new_document()
+
+    def document_changed(self, index):
+        """
+        Shows the state of a newly focused document and
+        marks it most recently used
+
+        Parameters
+        ----------
+        index : int
+            Tab index of the focused document, -1 if none
+        """
+        canvas = self.tabs.widget(index)
+        if canvas is None:
+            return
+        self.memory.activate(canvas)
+        canvas.status_display.set_tool(canvas.renderer.tool_selected,
+                                       canvas.renderer.pen_width,
+                                       canvas.renderer.color_selected)
+        self.profiler_action.blockSignals(True)
+        self.profiler_action.setChecked(canvas.profiler.overlay_visible)
+        self.profiler_action.blockSignals(False)
+
+    def refresh_titles(self):
+        """
+        Names each tab after its document
+        """
+        for index, canvas in enumerate(self.documents()):
+            self.tabs.setTabText(index, canvas.document_name())
+            self.tabs.setTabToolTip(index, canvas.current_file or '')
+
+    def exit_program(self):
+        """
+        Closes the window, exiting the app
+        """
+        self.close()
+
+    def closeEvent(self, event: QCloseEvent):
+        """
+        Event handler prompts user to save each document,
+        lets saves still in flight finish, and discards
+        autosave journals however the window is closed
+
+        Parameters
+        ----------
+        event : QCloseEvent
+            Inherits from PyQt6 QCloseEvent method
+            for handling window close event
+        """
+        for canvas in self.documents():
+            self.tabs.setCurrentWidget(canvas)
+            canvas.close_document()
+
+        # Threads must stop before the canvases owning them go
+        self.memory.stop_spill()
+        print('Exiting File...')
+        event.accept()
+
+    def defer_menu(self, menu, build):
+        """
+        Builds a menu's actions the first time it opens
+
+        Parameters
+        ----------
+        menu : QMenu
+            Menu left empty until it is first shown
+        build : function
+            Called with the menu to add its actions
+        """
+        def show():
+            menu.aboutToShow.disconnect(show)
+            build(menu)
+
+        menu.aboutToShow.connect(show)
+
+    def build_tool_menu(self, menu, tool):
+        """
+        Adds an action for each size of a tool, and each
+        brush preset to the brush menu
+
+        Parameters
+        ----------
+        menu : QMenu
+            Drop-down of the tool
+        tool : str
+            Name of the tool in TOOL_MENUS
+        """
+        for icon_name, text, size in TOOL_MENUS[tool]:
+            action = menu.addAction(text)
+            if icon_name is not None:
+                action.setIcon(self.icons.icon(icon_name))
+            action.triggered.connect(
+                lambda checked, size=size:
+                self.canvas().select_tool_size(tool, size))
+
+        if tool == 'Brush':
+            menu.addSeparator()
+            for preset in BRUSH_PRESETS:
+                action = menu.addAction(preset)
+                action.triggered.connect(
+                    lambda checked, preset=preset:
+                    self.canvas().select_brush(preset))
+
+    def build_smoothing_menu(self, menu):
+        """
+        Adds an action for each stroke smoothing level
+
+        Parameters
+        ----------
+        menu : QMenu
+            Stroke smoothing sub-menu
+        """
+        for level in SMOOTHING_LEVELS:
+            action = menu.addAction(level)
+            action.triggered.connect(
+                lambda checked, level=level:
+                self.canvas().set_smoothing(level))
+
+    def build_opacity_menu(self, menu):
+        """
+        Adds an action for each layer opacity
+
+        Parameters
+        ----------
+        menu : QMenu
+            Layer opacity sub-menu
+        """
+        for percent in LAYER_OPACITIES:
+            action = menu.addAction(f'{percent}%')
+            action.triggered.connect(
+                lambda checked, opacity=percent / 100:
+                self.canvas().set_layer_opacity(opacity))
+
+    def build_blend_menu(self, menu):
+        """
+        Adds an action for each layer blend mode
+
+        Parameters
+        ----------
+        menu : QMenu
+            Layer blend mode sub-menu
+        """
+        for blend_mode in BLEND_MODES:
+            action = menu.addAction(blend_mode)
+            action.triggered.connect(
+                lambda checked, blend_mode=blend_mode:
+                self.canvas().set_layer_blend_mode(blend_mode))
+
+    def build_filter_menu(self, menu):
+        """
+        Adds an action for each filter
+
+        Parameters
+        ----------
+        menu : QMenu
+            Filter drop-down
+        """
+        for name in FILTERS:
+            label = f'{name}...' if FILTERS[name] else name
+            action = menu.addAction(label)
+            action.triggered.connect(
+                lambda checked, name=name: self.canvas().open_filter(name))
+
+    def start_autosave(self):
+        """
+        Offers to recover drawings left by a crash, each
+        in its own tab, then starts autosaving
+        """
+        # Only journals no running instance holds are offered
+        locks = claim_journals({canvas.number
+                                for canvas in self.documents()})
+        numbers = sorted(locks)
+        if numbers:
+            message_text = ('The last session did not exit cleanly. ' +
+                            'Do you want to recover the autosaved drawings?')
+            recover_msg = QMessageBox.question(
+                self, 'Recover Drawing', message_text,
+                QMessageBox.StandardButton.Yes |
+                QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes)
+
+            if recover_msg == QMessageBox.StandardButton.Yes:
+                for number in numbers:
+                    canvas = next((canvas for canvas in self.documents()
+                                   if canvas.number == number), None)
+                    if canvas is None:
+                        canvas = self.new_document(number, locks[number])
+                    canvas.recover_autosave()
+                self.refresh_titles()
+            else:
+                for number in numbers:
+                    os.remove(journal_path(number))
+                    if locks[number] is not None:
+                        locks[number].unlock()
+        self.autosaving = True
+        for canvas in self.documents():
+            canvas.autosave.start()
 
 
 def main():
@@ -208,8 +655,10 @@ def main():
         to display application on desktop screen
     """
     app = QApplication([])
+    app.setApplicationName('PyQt Paint App')
     window = AppWindow()
     window.show()
+    window.start_autosave()
     app.exec()
 
 
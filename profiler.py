@@ -0,0 +1,364 @@
+from PyQt6.QtGui import (QColor, QRegion)
+from PyQt6.QtCore import (Qt, QRect, QTimer)
+import json
+import time
+
+""" Profiler for the PyQt6 Paint Application.
+    Times the canvas event handlers and draw calls, counts
+    painters and damaged pixels, and keeps histograms of
+    frame times. Timing wrappers are only installed while
+    profiling is enabled, so a disabled profiler adds no
+    work to the canvas at all.
+"""
+
+# Upper bounds in milliseconds of the histogram buckets
+HISTOGRAM_BUCKETS = [0.5, 1, 2, 4, 8, 16, 33, 66, float('inf')]
+
+# Canvas methods timed while profiling is enabled
+TIMED_METHODS = ['mouseMoveEvent', 'draw', 'paintEvent', 'resizeEvent']
+
+# Milliseconds between overlay refreshes and JSON dumps
+OVERLAY_INTERVAL = 250
+DUMP_INTERVAL = 5000
+
+# Area of the canvas widget covered by the overlay
+OVERLAY_RECT = QRect(8, 8, 440, 120)
+
+
+class Profiler:
+    """ A class to represent a Profiler
+
+        ...
+
+        Attributes
+        ----------
+        canvas : PaintCanvas
+            Canvas being profiled
+        enabled : bool
+            Whether timing wrappers are installed
+        overlay_visible : bool
+            Whether stats are drawn over the canvas
+        timers : dict
+            Call count, total, max, and histogram of
+            durations keyed by method name
+        counters : dict
+            Running totals keyed by counter name
+        frames : list
+            Histogram of time between painted frames
+        last_frame : float
+            Time the last frame was painted
+        patched : list
+            (object, attribute) pairs of installed wrappers
+        overlay_timer : QTimer
+            Timer refreshing the overlay
+        dump_timer : QTimer
+            Timer writing stats to the dump file
+        dump_path : str
+            JSON file stats are written to
+
+        Methods
+        ----------
+        enable():
+            Installs timing wrappers on the canvas
+        disable():
+            Removes timing wrappers from the canvas
+        wrap(target, name, before):
+            Replaces method with a timed wrapper
+        frame():
+            Adds time since the last painted frame to the
+            frame histogram
+        area(rect):
+            Returns pixel area of a rectangle
+        add_to_histogram(histogram, seconds):
+            Counts a duration in its histogram bucket
+        record(name, seconds):
+            Adds a duration to a method's timer
+        count(name, amount):
+            Adds to a counter
+        reset():
+            Clears every timer, counter, and histogram
+        stats():
+            Returns all measurements as a dict
+        show_overlay(visible):
+            Shows or hides the stats overlay
+        draw_overlay(painter):
+            Draws stats summary over the canvas
+        start_dump(path, interval):
+            Writes stats to a JSON file periodically
+        stop_dump():
+            Stops writing stats to the JSON file
+        dump():
+            Writes stats to the JSON file now
+    """
+
+    def __init__(self, canvas):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            canvas : PaintCanvas
+                Canvas being profiled
+        """
+        self.canvas = canvas
+        self.enabled = False
+        self.overlay_visible = False
+        self.patched = []
+        self.reset()
+
+        # Timers owned by the canvas are deleted along with it
+        self.overlay_timer = QTimer(canvas)
+        self.overlay_timer.setInterval(OVERLAY_INTERVAL)
+        self.overlay_timer.timeout.connect(
+            lambda: self.canvas.update(OVERLAY_RECT))
+        self.dump_timer = QTimer(canvas)
+        self.dump_timer.timeout.connect(self.dump)
+        self.dump_path = None
+
+    def enable(self):
+        """
+        Installs timing wrappers on the canvas
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        for name in TIMED_METHODS:
+            self.wrap(self.canvas, name)
+
+        # paintEvent builds one painter, tile painting one per tile
+        self.wrap(self.canvas, 'paintEvent', lambda *args: self.frame())
+        self.wrap(self.canvas.tiles, 'paint', lambda rect, function:
+                  self.count('painters',
+                             len(self.canvas.tiles.tile_keys(rect))))
+        self.wrap(self.canvas, 'add_damage', lambda rect: self.count(
+            'damaged_pixels', self.area(QRegion(rect).boundingRect())))
+
+    def disable(self):
+        """
+        Removes timing wrappers from the canvas
+        """
+        # Dropping the instance attribute uncovers the class method,
+        # including when several wrappers were stacked on it
+        for target, name in self.patched:
+            vars(target).pop(name, None)
+        self.patched = []
+        self.enabled = False
+
+    def wrap(self, target, name, before=None):
+        """
+        Replaces method with a timed wrapper
+
+        Parameters
+        ----------
+        target : object
+            Object owning the method
+        name : str
+            Name of the method
+        before : function
+            Called with the method's arguments before each
+            call, only times the call if None
+        """
+        original = getattr(target, name)
+
+        if before is None:
+            def wrapper(*args):
+                start = time.perf_counter()
+                try:
+                    return original(*args)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+        else:
+            def wrapper(*args):
+                before(*args)
+                return original(*args)
+
+        setattr(target, name, wrapper)
+        self.patched.append((target, name))
+
+    def frame(self):
+        """
+        Adds time since the last painted frame to the
+        frame histogram
+        """
+        now = time.perf_counter()
+        self.count('painters', 1)
+        if self.last_frame is not None:
+            self.add_to_histogram(self.frames, now - self.last_frame)
+        self.last_frame = now
+
+    def area(self, rect):
+        """
+        Returns pixel area of a rectangle
+
+        Parameters
+        ----------
+        rect : QRect
+            Rectangle to measure
+
+        Returns
+        ----------
+        int
+            Width times height
+        """
+        return rect.width() * rect.height()
+
+    def add_to_histogram(self, histogram, seconds):
+        """
+        Counts a duration in its histogram bucket
+
+        Parameters
+        ----------
+        histogram : list
+            Counts per bucket of HISTOGRAM_BUCKETS
+        seconds : float
+            Duration to count
+        """
+        milliseconds = seconds * 1000
+        for index, bound in enumerate(HISTOGRAM_BUCKETS):
+            if milliseconds <= bound:
+                histogram[index] += 1
+                return
+
+    def record(self, name, seconds):
+        """
+        Adds a duration to a method's timer
+
+        Parameters
+        ----------
+        name : str
+            Name of the timed method
+        seconds : float
+            Duration of the call
+        """
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = {'count': 0, 'total': 0.0, 'max': 0.0,
+                     'histogram': [0] * len(HISTOGRAM_BUCKETS)}
+            self.timers[name] = timer
+        timer['count'] += 1
+        timer['total'] += seconds
+        timer['max'] = max(timer['max'], seconds)
+        self.add_to_histogram(timer['histogram'], seconds)
+
+    def count(self, name, amount):
+        """
+        Adds to a counter
+
+        Parameters
+        ----------
+        name : str
+            Name of the counter
+        amount : int
+            Amount to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        """
+        Clears every timer, counter, and histogram
+        """
+        self.timers = {}
+        self.counters = {}
+        self.frames = [0] * len(HISTOGRAM_BUCKETS)
+        self.last_frame = None
+
+    def stats(self):
+        """
+        Returns all measurements as a dict
+
+        Returns
+        ----------
+        dict
+            Timers with count, mean, max, and histogram in
+            milliseconds, counters, and frame histogram
+        """
+        labels = [f'<={bound}ms' for bound in HISTOGRAM_BUCKETS[:-1]]
+        labels.append(f'>{HISTOGRAM_BUCKETS[-2]}ms')
+        return {
+            'timers': {name: {'count': timer['count'],
+                              'mean_ms': (timer['total'] * 1000 /
+                                          timer['count']),
+                              'max_ms': timer['max'] * 1000,
+                              'histogram': dict(zip(labels,
+                                                    timer['histogram']))}
+                       for name, timer in self.timers.items()},
+            'counters': dict(self.counters),
+            'frame_intervals': dict(zip(labels, self.frames)),
+        }
+
+    def show_overlay(self, visible):
+        """
+        Shows or hides the stats overlay, enabling
+        profiling while it is shown
+
+        Parameters
+        ----------
+        visible : bool
+            Whether to draw the overlay
+        """
+        self.overlay_visible = visible
+        if visible:
+            self.enable()
+            self.overlay_timer.start()
+        else:
+            self.overlay_timer.stop()
+            if not self.dump_timer.isActive():
+                self.disable()
+        self.canvas.update(OVERLAY_RECT)
+
+    def draw_overlay(self, painter):
+        """
+        Draws stats summary over the canvas
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter in canvas widget coordinates
+        """
+        lines = []
+        for name, timer in self.timers.items():
+            lines.append(f'{name}: {timer["count"]} calls, ' +
+                         f'{timer["total"] * 1000 / timer["count"]:.3f} ms ' +
+                         f'mean, {timer["max"] * 1000:.2f} ms max')
+        for name, total in self.counters.items():
+            lines.append(f'{name}: {total}')
+
+        painter.fillRect(OVERLAY_RECT, QColor(0, 0, 0, 160))
+        painter.setPen(QColor(255, 255, 255))
+        painter.drawText(OVERLAY_RECT.adjusted(6, 4, -6, -4),
+                         Qt.AlignmentFlag.AlignLeft |
+                         Qt.AlignmentFlag.AlignTop,
+                         '\n'.join(lines) or 'Profiling...')
+
+    def start_dump(self, path, interval=DUMP_INTERVAL):
+        """
+        Writes stats to a JSON file periodically,
+        enabling profiling while dumping
+
+        Parameters
+        ----------
+        path : str
+            JSON file stats are written to
+        interval : int
+            Milliseconds between writes
+        """
+        self.dump_path = path
+        self.enable()
+        self.dump_timer.start(interval)
+
+    def stop_dump(self):
+        """
+        Stops writing stats to the JSON file
+        """
+        self.dump_timer.stop()
+        self.dump()
+        if not self.overlay_visible:
+            self.disable()
+
+    def dump(self):
+        """
+        Writes stats to the JSON file now
+        """
+        if self.dump_path is not None:
+            with open(self.dump_path, 'w') as dump_file:
+                json.dump(self.stats(), dump_file, indent=2)
@@ -0,0 +1,660 @@
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import (QThread, pyqtSignal)
+from save_worker import UMASK
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+""" Project files for the PyQt6 Paint Application.
+    Saves the document with its layers, tool settings, and
+    the strokes drawn, each tile compressed into its own
+    chunk and found through an index at the end of the file.
+    Opening memory maps the file and leaves every tile
+    compressed until it is first drawn, so only the tiles
+    in view are decoded. Saving the file again appends only
+    the tiles changed since, with a new index, and rewrites
+    the whole file once the chunks it replaced outgrow the
+    ones still in use.
+"""
+
+# File extension and file dialog filter of project files
+PROJECT_EXTENSION = '.qpaint'
+PROJECT_FILTER = f'Paint Projects(*{PROJECT_EXTENSION})'
+
+# File header, format version, and header layout: tile
+# size, document width and height, then the offset, length,
+# and checksum of the index
+PROJECT_MAGIC = b'QPAINTPF'
+PROJECT_VERSION = 1
+HEADER = struct.Struct('<8sIIIIQII')
+
+# zlib level tile and stroke chunks are compressed with
+CHUNK_LEVEL = 6
+
+# Most mouse positions kept in strokes not saved yet, the
+# oldest strokes dropped beyond it
+STROKE_LOG_POINTS = 250000
+
+
+def is_project(file_path):
+    """
+    Returns whether a path names a project file
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the file
+
+    Returns
+    ----------
+    bool
+        True if the path has the project extension
+    """
+    return os.path.splitext(file_path)[1].lower() == PROJECT_EXTENSION
+
+
+def read_index(data):
+    """
+    Reads the header and index of a project file
+
+    Parameters
+    ----------
+    data : bytes-like
+        Whole project file, such as a memory map
+
+    Returns
+    ----------
+    dict
+        Index with the header's 'tile_size' and 'size',
+        and the 'live_bytes' of the file it refers to,
+        added
+
+    Raises
+    ----------
+    ValueError
+        If the file is not a project file or is damaged
+    """
+    if len(data) < HEADER.size:
+        raise ValueError('Not a project file')
+    (magic, version, tile_size, width, height, index_offset, index_length,
+     index_checksum) = HEADER.unpack_from(data)
+    if magic != PROJECT_MAGIC:
+        raise ValueError('Not a project file')
+    if version != PROJECT_VERSION:
+        raise ValueError(f'Unsupported project version {version}')
+    index_data = bytes(data[index_offset:index_offset + index_length])
+    if (len(index_data) != index_length or
+            zlib.crc32(index_data) != index_checksum):
+        raise ValueError('Project index is damaged')
+    try:
+        index = json.loads(zlib.decompress(index_data))
+        chunks = [tile[2:] for layer in index['layers']
+                  for tile in layer['tiles']] + index['strokes']
+    except (zlib.error, KeyError, TypeError) as error:
+        raise ValueError(f'Project index is damaged: {error}')
+    if not index['layers']:
+        raise ValueError('Project has no layers')
+    if any(offset + length > len(data) for offset, length in chunks):
+        raise ValueError('Project file is truncated')
+    index['tile_size'] = tile_size
+    index['size'] = (width, height)
+    index['live_bytes'] = (HEADER.size + index_length +
+                           sum(length for _, length in chunks))
+    return index
+
+
+def read_strokes(file_path):
+    """
+    Reads the strokes saved in a project file
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the project file
+
+    Returns
+    ----------
+    dict
+        Stroke script of every stroke saved and not
+        undone, in the form StrokeRenderer.render_script
+        reads
+    """
+    with open(file_path, 'rb') as project:
+        data = project.read()
+    index = read_index(data)
+    log = []
+    for offset, length in index['strokes']:
+        log += json.loads(zlib.decompress(data[offset:offset + length]))
+
+    # Undo and redo entries mark the stroke with their id
+    undone = set()
+    for entry in log:
+        if 'undo' in entry:
+            undone.add(entry['undo'])
+        elif 'redo' in entry:
+            undone.discard(entry['redo'])
+    strokes = [entry for entry in log if 'tool' in entry and
+               entry.get('id') not in undone]
+    return {'width': index['size'][0], 'height': index['size'][1],
+            'smoothing': index['settings'].get('smoothing', 0),
+            'strokes': strokes}
+
+
+class ProjectFile:
+    """ A class to represent a Project File
+
+        ...
+
+        Attributes
+        ----------
+        path : str
+            Project file the document was last opened from
+            or saved to, None if never
+        chunks : dict
+            (offset, length) of each tile chunk in the file
+            keyed by (column, row), keyed by TileStore
+        stroke_chunks : list
+            (offset, length) of each stroke chunk in the
+            file
+        live_bytes : int
+            Bytes of the file the index refers to
+        strokes : list
+            Stroke script entries drawn since the last
+            save, and undo and redo entries naming the id
+            of the stroke undone or redone
+        stroke_points : int
+            Mouse positions held in the strokes
+        next_stroke : int
+            Id given to the next stroke, unique within the
+            project file
+
+        Methods
+        ----------
+        open(file_path, stack):
+            Replaces the layers of a stack with the layers
+            of a project file
+        snapshot(stack, file_path, settings):
+            Returns what a worker needs to save the document
+        add_stroke(stroke):
+            Logs a stroke as it starts
+        add_points(stroke, points):
+            Logs mouse positions of a stroke being drawn
+        trim_strokes():
+            Drops the oldest unsaved strokes past
+            STROKE_LOG_POINTS
+        clear_strokes():
+            Drops every stroke not saved yet
+        mark(stroke_id, action):
+            Logs a stroke being undone or redone
+        saved(job):
+            Takes chunk positions from a finished save
+        failed(job):
+            Keeps tiles and strokes of a failed save unsaved
+    """
+
+    def __init__(self):
+        """
+        Constructs all the attributes for the object
+        """
+        self.path = None
+        self.chunks = {}
+        self.stroke_chunks = []
+        self.live_bytes = 0
+        self.strokes = []
+        self.stroke_points = 0
+        self.next_stroke = 0
+
+    def open(self, file_path, stack):
+        """
+        Replaces the layers of a stack with the layers of
+        a project file, leaving their tiles compressed in
+        the memory mapped file
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the project file
+        stack : LayerStack
+            Layers replaced by the file's layers
+
+        Returns
+        ----------
+        dict
+            Tool settings saved with the project
+
+        Raises
+        ----------
+        OSError
+            If the file cannot be read
+        ValueError
+            If the file is not a project file or is damaged
+        """
+        with open(file_path, 'rb') as project:
+            data = mmap.mmap(project.fileno(), 0, access=mmap.ACCESS_READ)
+        index = read_index(data)
+        if index['tile_size'] != stack.tile_size:
+            raise ValueError(f'Unsupported tile size {index["tile_size"]}')
+
+        # Tiles keep views into the map, which stays open
+        # until the last of them is decoded or dropped
+        view = memoryview(data)
+        stack.resize(*index['size'])
+        self.chunks = {}
+        for position, saved in enumerate(index['layers']):
+            layer = stack.restore_layer(position, saved['name'],
+                                        saved['opaque'], saved.get('id'))
+            layer.opacity = saved['opacity']
+            layer.blend_mode = saved['blend_mode']
+            layer.visible = saved['visible']
+            chunks = {}
+            for column, row, offset, length in saved['tiles']:
+                chunks[(column, row)] = (offset, length)
+                layer.tiles.stored[(column, row)] = view[offset:
+                                                         offset + length]
+            self.chunks[layer.tiles] = chunks
+        stack.set_active(index['active'])
+        stack.changed()
+
+        self.path = file_path
+        self.stroke_chunks = [tuple(chunk) for chunk in index['strokes']]
+        self.live_bytes = index['live_bytes']
+        self.strokes = []
+        self.stroke_points = 0
+        self.next_stroke = index.get('next_stroke', 0)
+        return index['settings']
+
+    def snapshot(self, stack, file_path, settings):
+        """
+        Returns what a worker needs to save the document,
+        marking its tiles and strokes saved
+
+        Parameters
+        ----------
+        stack : LayerStack
+            Layers to save
+        file_path : str
+            Path the project is saved to
+        settings : dict
+            Tool settings saved with the project
+
+        Returns
+        ----------
+        dict
+            Save job for a ProjectWorker
+        """
+        # Appending to the file is only worth it while the
+        # chunks it has replaced are outweighed by the ones
+        # still in use
+        append = (file_path == self.path and os.path.exists(file_path) and
+                  os.path.getsize(file_path) <= 2 * self.live_bytes)
+
+        # Unchanged tiles are found by their chunk in the
+        # last saved file, tiles still compressed are written
+        # as they are, and shallow copies of changed tiles
+        # share pixels with them until they are next painted
+        layers = []
+        unsaved = {}
+        for layer in stack.layers:
+            tiles = layer.tiles
+            saved = self.chunks.get(tiles, {}) if self.path else {}
+            snapshot = {}
+            for key in tiles.painted_keys():
+                if key in saved and key not in tiles.unsaved_keys:
+                    snapshot[key] = saved[key]
+                elif key in tiles.stored:
+                    snapshot[key] = bytes(tiles.stored[key])
+                else:
+                    snapshot[key] = QImage(tiles.tiles[key])
+            layers.append({'store': tiles, 'id': layer.id,
+                           'name': layer.name,
+                           'opacity': layer.opacity,
+                           'blend_mode': layer.blend_mode,
+                           'visible': layer.visible,
+                           'opaque': layer.opaque(), 'tiles': snapshot})
+            unsaved[tiles] = tiles.unsaved_keys
+            tiles.unsaved_keys = set()
+        strokes = self.strokes
+        self.strokes = []
+        self.stroke_points = 0
+        return {'path': file_path, 'append': append, 'source': self.path,
+                'tile_size': stack.tile_size,
+                'size': (stack.width, stack.height), 'active': stack.active,
+                'settings': settings, 'layers': layers,
+                'stroke_chunks': list(self.stroke_chunks) if self.path else [],
+                'strokes': strokes, 'next_stroke': self.next_stroke,
+                'unsaved': unsaved}
+
+    def saved(self, job):
+        """
+        Takes chunk positions from a finished save
+
+        Parameters
+        ----------
+        job : dict
+            Save job the worker finished
+        """
+        self.path = job['path']
+        self.chunks = {layer['store']: locations for layer, locations
+                       in zip(job['layers'], job['locations'])}
+        self.stroke_chunks = job['stroke_locations']
+        self.live_bytes = job['live_bytes']
+
+    def failed(self, job):
+        """
+        Keeps tiles and strokes of a failed save unsaved
+        so the next save writes them
+
+        Parameters
+        ----------
+        job : dict
+            Save job the worker gave up on
+        """
+        for tiles, keys in job['unsaved'].items():
+            tiles.unsaved_keys |= keys
+        self.strokes[:0] = job['strokes']
+        self.stroke_points += sum(len(entry.get('points', ()))
+                                  for entry in job['strokes'])
+        self.trim_strokes()
+
+    def add_stroke(self, stroke):
+        """
+        Logs a stroke as it starts, giving it an id
+        unique within the project file
+
+        Parameters
+        ----------
+        stroke : dict
+            Stroke script entry, its 'id' set here
+        """
+        stroke['id'] = self.next_stroke
+        self.next_stroke += 1
+        self.strokes.append(stroke)
+        self.add_points(stroke, [])
+
+    def add_points(self, stroke, points):
+        """
+        Logs mouse positions of a stroke being drawn,
+        dropping the oldest strokes past STROKE_LOG_POINTS
+
+        Parameters
+        ----------
+        stroke : dict
+            Stroke script entry the positions belong to
+        points : list
+            [x, y] document positions
+        """
+        # A stroke already dropped from the log stays dropped
+        if not self.strokes or self.strokes[-1] is not stroke:
+            return
+        stroke['points'] += points
+        self.stroke_points += len(points)
+        self.trim_strokes()
+
+    def trim_strokes(self):
+        """
+        Drops the oldest unsaved strokes until they hold
+        at most STROKE_LOG_POINTS positions
+        """
+        while self.stroke_points > STROKE_LOG_POINTS and self.strokes:
+            entry = self.strokes.pop(0)
+            self.stroke_points -= len(entry.get('points', ()))
+
+    def clear_strokes(self):
+        """
+        Drops every stroke not saved yet
+        """
+        self.strokes = []
+        self.stroke_points = 0
+
+    def mark(self, stroke_id, action):
+        """
+        Logs a stroke being undone or redone, so replaying
+        the strokes leaves out those still undone
+
+        Parameters
+        ----------
+        stroke_id : int
+            Id of the stroke
+        action : str
+            'undo' or 'redo'
+        """
+        self.strokes.append({action: stroke_id})
+
+
+class ProjectWorker(QThread):
+    """ A class to represent a Project Worker
+
+        ...
+
+        Attributes
+        ----------
+        QThread : class
+            ProjectWorker inherits from this PyQt6 class
+        job : dict
+            Save job from ProjectFile.snapshot, given the
+            'locations', 'stroke_locations', and
+            'live_bytes' of the saved file once written
+        offset : int
+            Position in the file the next chunk is written at
+        progress : pyqtSignal
+            Emits percent of the save completed
+        saved : pyqtSignal
+            Emits file path once the file is in place
+        failed : pyqtSignal
+            Emits file path and error message if the
+            save did not complete
+
+        Methods
+        ----------
+        run():
+            Appends changed chunks to the project file, or
+            writes a new file and renames it into place
+        append():
+            Appends chunks and index and then points the
+            header at the new index
+        rewrite():
+            Writes every chunk to a temporary file and
+            renames it over the project file
+        write_chunks(output, source):
+            Writes chunks not already in the output and
+            the index after them
+        write_chunk(output, data):
+            Writes one chunk at the end of the output
+    """
+
+    progress = pyqtSignal(int)
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, job, parent=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            job : dict
+                Save job from ProjectFile.snapshot
+            parent : QObject
+                Owner of the worker thread
+        """
+        super().__init__(parent)
+        self.job = job
+        self.offset = 0
+
+    def run(self):
+        """
+        Appends changed chunks to the project file, or
+        writes a new file and renames it into place
+        """
+        self.progress.emit(0)
+        try:
+            if self.job['append']:
+                self.append()
+            else:
+                self.rewrite()
+        except OSError as error:
+            self.failed.emit(self.job['path'], str(error))
+            return
+        self.progress.emit(100)
+        self.saved.emit(self.job['path'])
+
+    def append(self):
+        """
+        Appends chunks and index and then points the
+        header at the new index, so a crash before the
+        header is rewritten leaves the last save intact
+        """
+        with open(self.job['path'], 'r+b') as output:
+            self.offset = output.seek(0, os.SEEK_END)
+            header = self.write_chunks(output, None)
+            output.flush()
+            os.fsync(output.fileno())
+            output.seek(0)
+            output.write(header)
+            output.flush()
+            os.fsync(output.fileno())
+
+    def rewrite(self):
+        """
+        Writes every chunk to a temporary file and renames
+        it over the project file
+        """
+        job = self.job
+        directory, name = os.path.split(os.path.abspath(job['path']))
+        handle, temp_path = tempfile.mkstemp(prefix=f'.{name}.',
+                                             suffix='.tmp', dir=directory)
+        source = None
+        try:
+            # Chunks still in the last saved file are copied
+            # without being decoded
+            if job['source'] is not None:
+                source = open(job['source'], 'rb')
+            with os.fdopen(handle, 'wb') as output:
+                output.write(bytes(HEADER.size))
+                self.offset = HEADER.size
+                header = self.write_chunks(output, source)
+                output.seek(0)
+                output.write(header)
+                output.flush()
+                os.fsync(output.fileno())
+
+            # Temporary files are private, give the saved file
+            # the permissions it had or would have had
+            if os.path.exists(job['path']):
+                mode = os.stat(job['path']).st_mode & 0o777
+            else:
+                mode = 0o666 & ~UMASK
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, job['path'])
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        finally:
+            if source is not None:
+                source.close()
+
+    def write_chunks(self, output, source):
+        """
+        Writes chunks not already in the output and the
+        index after them
+
+        Parameters
+        ----------
+        output : file
+            Project file being written, positioned at its
+            end
+        source : file
+            Last saved file to copy unchanged chunks from,
+            None if they are already in the output
+
+        Returns
+        ----------
+        bytes
+            File header pointing at the index written
+        """
+        job = self.job
+        live_bytes = HEADER.size
+        count = max(sum(len(layer['tiles']) for layer in job['layers']), 1)
+        written = 0
+        job['locations'] = []
+        saved_layers = []
+        for layer in job['layers']:
+            locations = {}
+            for key, tile in layer['tiles'].items():
+                if isinstance(tile, QImage):
+                    buffer = tile.constBits()
+                    buffer.setsize(tile.sizeInBytes())
+                    location = self.write_chunk(output, zlib.compress(
+                        bytes(buffer), CHUNK_LEVEL))
+                elif isinstance(tile, bytes):
+                    location = self.write_chunk(output, tile)
+                elif source is not None:
+                    source.seek(tile[0])
+                    location = self.write_chunk(output,
+                                                source.read(tile[1]))
+                else:
+                    location = tile
+                locations[key] = location
+                live_bytes += location[1]
+                written += 1
+                self.progress.emit(95 * written // count)
+            job['locations'].append(locations)
+            saved_layers.append({
+                'id': layer['id'], 'name': layer['name'],
+                'opacity': layer['opacity'],
+                'blend_mode': layer['blend_mode'],
+                'visible': layer['visible'], 'opaque': layer['opaque'],
+                'tiles': [[*key, *location]
+                          for key, location in locations.items()]})
+
+        # Strokes drawn since the last save get a chunk of
+        # their own after the ones already saved
+        stroke_locations = []
+        for location in job['stroke_chunks']:
+            if source is not None:
+                source.seek(location[0])
+                location = self.write_chunk(output,
+                                            source.read(location[1]))
+            stroke_locations.append(tuple(location))
+        if job['strokes']:
+            stroke_locations.append(self.write_chunk(output, zlib.compress(
+                json.dumps(job['strokes']).encode(), CHUNK_LEVEL)))
+        live_bytes += sum(length for _, length in stroke_locations)
+        job['stroke_locations'] = stroke_locations
+
+        index_offset = self.offset
+        index = zlib.compress(json.dumps({
+            'active': job['active'], 'settings': job['settings'],
+            'layers': saved_layers, 'strokes': stroke_locations,
+            'next_stroke': job['next_stroke']}).encode(), CHUNK_LEVEL)
+        live_bytes += len(index)
+        job['live_bytes'] = live_bytes
+        self.write_chunk(output, index)
+        return HEADER.pack(PROJECT_MAGIC, PROJECT_VERSION, job['tile_size'],
+                           job['size'][0], job['size'][1], index_offset,
+                           len(index), zlib.crc32(index))
+
+    def write_chunk(self, output, data):
+        """
+        Writes one chunk at the end of the output
+
+        Parameters
+        ----------
+        output : file
+            Project file being written
+        data : bytes
+            Compressed chunk
+
+        Returns
+        ----------
+        tuple
+            (offset, length) of the chunk in the file
+        """
+        output.write(data)
+        location = (self.offset, len(data))
+        self.offset += len(data)
+        return location
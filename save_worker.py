@@ -0,0 +1,134 @@
+from PyQt6.QtGui import QImageWriter
+from PyQt6.QtCore import (QThread, QBuffer, QByteArray, QIODevice,
+                          pyqtSignal)
+import os
+import tempfile
+
+""" Background saving for the PyQt6 Paint Application.
+    Encodes a snapshot of the drawing on a worker thread,
+    writes it to a temporary file beside the target and
+    renames it into place, so a crash mid-save never leaves
+    a half written file behind.
+"""
+
+# Bytes written to disk between progress updates
+CHUNK_SIZE = 1024 * 1024
+
+# Process umask, read once on import since setting it to
+# read it back is not safe from worker threads
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class SaveWorker(QThread):
+    """ A class to represent a Save Worker
+
+        ...
+
+        Attributes
+        ----------
+        QThread : class
+            SaveWorker inherits from this PyQt6 class
+        image : QImage
+            Snapshot of the drawing to save
+        file_path : str
+            Path the image is saved to
+        progress : pyqtSignal
+            Emits percent of the save completed
+        saved : pyqtSignal
+            Emits file path once the file is in place
+        failed : pyqtSignal
+            Emits file path and error message if the
+            save did not complete
+
+        Methods
+        ----------
+        run():
+            Encodes image then writes and renames the
+            temporary file into place
+        image_format():
+            Returns image format named by the file extension
+    """
+
+    progress = pyqtSignal(int)
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, image, file_path, parent=None):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            image : QImage
+                Snapshot of the drawing to save
+            file_path : str
+                Path the image is saved to
+            parent : QObject
+                Owner of the worker thread
+        """
+        super().__init__(parent)
+        self.image = image
+        self.file_path = file_path
+
+    def run(self):
+        """
+        Encodes image then writes and renames the
+        temporary file into place
+        """
+        self.progress.emit(0)
+
+        # Encode in memory so the file is only touched once
+        # the slow part is done
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        writer = QImageWriter(buffer, self.image_format())
+        if not writer.write(self.image):
+            self.failed.emit(self.file_path, writer.errorString())
+            return
+        buffer.close()
+        self.progress.emit(50)
+
+        directory, name = os.path.split(os.path.abspath(self.file_path))
+        temp_path = None
+        try:
+            handle, temp_path = tempfile.mkstemp(prefix=f'.{name}.',
+                                                 suffix='.tmp', dir=directory)
+            with os.fdopen(handle, 'wb') as temp_file:
+                encoded = data.data()
+                for start in range(0, len(encoded), CHUNK_SIZE):
+                    temp_file.write(encoded[start:start + CHUNK_SIZE])
+                    self.progress.emit(50 + 50 * start // len(encoded))
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+
+            # Temporary files are private, give the saved file
+            # the permissions it had or would have had
+            if os.path.exists(self.file_path):
+                mode = os.stat(self.file_path).st_mode & 0o777
+            else:
+                mode = 0o666 & ~UMASK
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, self.file_path)
+        except OSError as error:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            self.failed.emit(self.file_path, str(error))
+            return
+
+        self.progress.emit(100)
+        self.saved.emit(self.file_path)
+
+    def image_format(self):
+        """
+        Returns image format named by the file extension
+
+        Returns
+        ----------
+        bytes
+            Format name such as b'png', PNG if the path
+            has no extension
+        """
+        extension = os.path.splitext(self.file_path)[1][1:].lower()
+        return (extension or 'png').encode()
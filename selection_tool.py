@@ -0,0 +1,451 @@
+from PyQt6.QtGui import (QColor, QImage, QPainter, QPainterPath, QPen,
+                         QTransform)
+from PyQt6.QtCore import (Qt, QPointF, QRect, QRectF)
+from tile_store import TILE_FORMAT
+import math
+
+""" Selection tool for the PyQt6 Paint Application.
+    Selects a rectangle or lasso of the active layer and
+    lifts it into a floating image moved, scaled, or
+    rotated by dragging. While dragging, a downscaled proxy
+    of the floating image is drawn over the document, so a
+    mouse move only changes a transform however large the
+    selection is. The floating image is resampled into the
+    layer at full quality once, when the mouse is released.
+"""
+
+# Selection shapes of the Select menu, by menu order
+SELECTION_MODES = ('Rectangle', 'Lasso')
+
+# Longest side in pixels of the proxy drawn while dragging
+PROXY_SIZE = 512
+
+
+class SelectionTool:
+    """ A class to represent a Selection Tool
+
+        ...
+
+        Attributes
+        ----------
+        mode : str
+            Shape selected by dragging, one of
+            SELECTION_MODES
+        path : QPainterPath
+            Selected area in document coordinates before
+            the transform, empty if nothing is selected
+        anchor : QPointF
+            Document position the selection or drag
+            started from
+        selecting : bool
+            True while a selection is being drawn
+        dragging : bool
+            True while the selection is being transformed
+        floating : QImage
+            Full resolution pixels lifted from the layer,
+            None until the selection is first dragged
+        floating_rect : QRect
+            Document area the floating image was lifted
+            from
+        proxy : QImage
+            Floating image downscaled to PROXY_SIZE, drawn
+            in its place while dragging
+        transform : QTransform
+            Transform applied to the floating image
+        drag_transform : QTransform
+            Transform when the drag started
+        drag_mode : str
+            Move, Scale, or Rotate
+        under : QImage
+            Layer pixels the floating image was last
+            resampled over, None if it never was
+        under_rect : QRect
+            Document area of the under image
+
+        Methods
+        ----------
+        clear():
+            Drops the selection
+        begin_select(point):
+            Starts drawing a selection
+        extend(point):
+            Grows the selection being drawn
+        finish_select(rect):
+            Ends drawing the selection
+        grabs(point, modifiers):
+            Returns whether a press drags the selection
+        begin_drag(point, modifiers, tiles):
+            Lifts the selection out of the layer and
+            starts transforming it
+        lift(tiles):
+            Copies the selected pixels into the floating
+            image, leaving a hole in the layer
+        restore(tiles):
+            Puts back the pixels the floating image was
+            last resampled over
+        drag(point):
+            Updates the transform from the mouse
+        end_drag(tiles):
+            Resamples the floating image into the layer
+        bounds():
+            Returns document area covered by the outline
+        draw(painter):
+            Draws the outline, and the proxy while
+            dragging
+    """
+
+    def __init__(self):
+        """
+        Constructs all the attributes for the object
+        """
+        self.mode = SELECTION_MODES[0]
+        self.path = QPainterPath()
+        self.anchor = QPointF()
+        self.selecting = False
+        self.dragging = False
+        self.clear()
+
+    def clear(self):
+        """
+        Drops the selection, leaving the layer as it was
+        last resampled into
+
+        Returns
+        ----------
+        QRect
+            Document area of the outline to repaint
+        """
+        rect = self.bounds()
+        self.path = QPainterPath()
+        self.selecting = False
+        self.dragging = False
+        self.floating = None
+        self.floating_rect = QRect()
+        self.proxy = None
+        self.transform = QTransform()
+        self.drag_transform = QTransform()
+        self.drag_mode = 'Move'
+        self.under = None
+        self.under_rect = QRect()
+        return rect
+
+    def begin_select(self, point):
+        """
+        Drops any selection and starts drawing a new one
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position the selection starts from
+
+        Returns
+        ----------
+        QRect
+            Document area of the dropped outline to repaint
+        """
+        rect = self.clear()
+        self.selecting = True
+        self.anchor = QPointF(point)
+        self.path = QPainterPath(self.anchor)
+        return rect
+
+    def extend(self, point):
+        """
+        Grows the selection being drawn to a mouse
+        position
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position under the mouse
+
+        Returns
+        ----------
+        QRect
+            Document area of the old and new outline
+        """
+        rect = self.bounds()
+        if self.mode == 'Lasso':
+            self.path.lineTo(QPointF(point))
+        else:
+            self.path = QPainterPath()
+            self.path.addRect(QRectF(self.anchor,
+                                     QPointF(point)).normalized())
+        return rect.united(self.bounds())
+
+    def finish_select(self, rect):
+        """
+        Ends drawing the selection, keeping the part
+        inside the document
+
+        Parameters
+        ----------
+        rect : QRect
+            Document rectangle
+
+        Returns
+        ----------
+        QRect
+            Document area of the outline to repaint
+        """
+        damage = self.bounds()
+        self.selecting = False
+        self.path.closeSubpath()
+        document = QPainterPath()
+        document.addRect(QRectF(rect))
+        self.path = self.path.intersected(document).simplified()
+        if self.path.boundingRect().toAlignedRect().isEmpty():
+            self.path = QPainterPath()
+        return damage
+
+    def grabs(self, point, modifiers):
+        """
+        Returns whether a press drags the selection
+        rather than starting a new one
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position pressed
+        modifiers : Qt.KeyboardModifier
+            Keys held, Shift or Ctrl grabbing from anywhere
+
+        Returns
+        ----------
+        bool
+            True if there is a selection under the press or
+            a modifier is held
+        """
+        if self.path.isEmpty():
+            return False
+        held = (Qt.KeyboardModifier.ShiftModifier |
+                Qt.KeyboardModifier.ControlModifier)
+        return (bool(modifiers & held) or
+                self.transform.map(self.path).contains(QPointF(point)))
+
+    def begin_drag(self, point, modifiers, tiles):
+        """
+        Lifts the selection out of the layer on its first
+        drag, or takes back the last resample, then starts
+        transforming it: moving it, scaling it with Shift
+        held, or rotating it with Ctrl held
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position pressed
+        modifiers : Qt.KeyboardModifier
+            Keys held
+        tiles : TileStore
+            Active layer tiles
+
+        Returns
+        ----------
+        QRect
+            Document area of the layer changed
+        """
+        if self.floating is None:
+            changed = self.lift(tiles)
+        else:
+            changed = self.restore(tiles)
+        self.dragging = True
+        self.anchor = QPointF(point)
+        self.drag_transform = QTransform(self.transform)
+        if modifiers & Qt.KeyboardModifier.ShiftModifier:
+            self.drag_mode = 'Scale'
+        elif modifiers & Qt.KeyboardModifier.ControlModifier:
+            self.drag_mode = 'Rotate'
+        else:
+            self.drag_mode = 'Move'
+        return changed
+
+    def lift(self, tiles):
+        """
+        Copies the selected pixels into the floating image
+        and its proxy, leaving the layer's unpainted color
+        behind
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Active layer tiles
+
+        Returns
+        ----------
+        QRect
+            Document area of the layer changed
+        """
+        rect = self.path.boundingRect().toAlignedRect().intersected(
+            tiles.rect())
+        self.floating_rect = rect
+        self.floating = QImage(rect.size(), TILE_FORMAT)
+        self.floating.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(self.floating)
+        painter.translate(-rect.x(), -rect.y())
+        painter.setClipPath(self.path)
+        painter.drawImage(rect.topLeft(), tiles.to_image(rect))
+        painter.end()
+
+        # Only the proxy is drawn while dragging, so a drag costs
+        # the same however many pixels are selected
+        if max(rect.width(), rect.height()) > PROXY_SIZE:
+            self.proxy = self.floating.scaled(
+                PROXY_SIZE, PROXY_SIZE, Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation)
+        else:
+            self.proxy = self.floating
+
+        def cut(painter):
+            painter.setCompositionMode(
+                QPainter.CompositionMode.CompositionMode_Source)
+            painter.fillPath(self.path, QColor(tiles.fill_color))
+
+        tiles.paint(rect, cut)
+        return rect
+
+    def restore(self, tiles):
+        """
+        Puts back the layer pixels the floating image was
+        last resampled over
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Active layer tiles
+
+        Returns
+        ----------
+        QRect
+            Document area of the layer changed
+        """
+        if self.under is None:
+            return QRect()
+
+        def put_back(painter):
+            painter.setCompositionMode(
+                QPainter.CompositionMode.CompositionMode_Source)
+            painter.drawImage(self.under_rect.topLeft(), self.under)
+
+        tiles.paint(self.under_rect, put_back)
+        return self.under_rect
+
+    def drag(self, point):
+        """
+        Updates the transform from the mouse without
+        touching any pixels
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position under the mouse
+
+        Returns
+        ----------
+        QRect
+            Document area of the old and new selection
+        """
+        rect = self.bounds()
+        point = QPointF(point)
+        center = self.drag_transform.map(
+            QRectF(self.floating_rect).center())
+        if self.drag_mode == 'Move':
+            change = QTransform.fromTranslate(point.x() - self.anchor.x(),
+                                              point.y() - self.anchor.y())
+        else:
+            if self.drag_mode == 'Scale':
+                start = math.dist((self.anchor.x(), self.anchor.y()),
+                                  (center.x(), center.y()))
+                end = math.dist((point.x(), point.y()),
+                                (center.x(), center.y()))
+                factor = max(end, 1) / max(start, 1)
+                change = QTransform.fromScale(factor, factor)
+            else:
+                start = math.atan2(self.anchor.y() - center.y(),
+                                   self.anchor.x() - center.x())
+                end = math.atan2(point.y() - center.y(),
+                                 point.x() - center.x())
+                change = QTransform().rotate(math.degrees(end - start))
+
+            # Scale and rotate about the selection's center
+            change = (QTransform.fromTranslate(-center.x(), -center.y()) *
+                      change *
+                      QTransform.fromTranslate(center.x(), center.y()))
+        self.transform = self.drag_transform * change
+        return rect.united(self.bounds())
+
+    def end_drag(self, tiles):
+        """
+        Resamples the full resolution floating image into
+        the layer with the transform, keeping the pixels
+        it covers to take back on the next drag
+
+        Parameters
+        ----------
+        tiles : TileStore
+            Active layer tiles
+
+        Returns
+        ----------
+        QRect
+            Document area of the layer changed
+        """
+        self.dragging = False
+        rect = self.transform.mapRect(QRectF(self.floating_rect))
+        rect = rect.toAlignedRect().adjusted(-1, -1, 1, 1).intersected(
+            tiles.rect())
+        self.under_rect = rect
+        if rect.isEmpty():
+            self.under = None
+            return rect
+        self.under = tiles.to_image(rect)
+
+        def stamp(painter):
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.setTransform(self.transform, True)
+            painter.drawImage(self.floating_rect.topLeft(), self.floating)
+
+        tiles.paint(rect, stamp)
+        return rect
+
+    def bounds(self):
+        """
+        Returns document area covered by the outline
+
+        Returns
+        ----------
+        QRect
+            Transformed outline bounds, padded for the
+            outline pen
+        """
+        if self.path.isEmpty():
+            return QRect()
+        rect = self.transform.mapRect(self.path.boundingRect())
+        return rect.toAlignedRect().adjusted(-1, -1, 1, 1)
+
+    def draw(self, painter):
+        """
+        Draws the selection outline, and the proxy in
+        place of the floating image while dragging
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter in document coordinates
+        """
+        if self.path.isEmpty():
+            return
+        painter.save()
+        painter.setTransform(self.transform, True)
+        if self.dragging:
+            # Nearest neighbour stretch of the small proxy
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform,
+                                  False)
+            painter.drawImage(QRectF(self.floating_rect), self.proxy)
+
+        # Black dashes over white, a pixel wide at any zoom
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(QPen(Qt.GlobalColor.white, 0))
+        painter.drawPath(self.path)
+        painter.setPen(QPen(Qt.GlobalColor.black, 0, Qt.PenStyle.DashLine))
+        painter.drawPath(self.path)
+        painter.restore()
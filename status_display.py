@@ -0,0 +1,134 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QTimer
+
+""" Status bar display for the PyQt6 Paint Application.
+    Registers the mouse and tool labels with the status bar
+    once, rewrites the tool text only when the tool state
+    changes, and caps how often the mouse position is shown.
+"""
+
+# Maximum number of mouse position updates shown per second
+POSITION_RATE = 30
+
+
+class StatusDisplay:
+    """ A class to represent the Status Display
+
+        ...
+
+        Attributes
+        ----------
+        status_bar : QStatusBar
+            Status bar the labels are added to
+        mouse_label : QLabel
+            Permanent status bar label showing mouse position
+        tool_label : QLabel
+            Permanent status bar label showing tool, size,
+            and color
+        position_timer : QTimer
+            Timer limiting mouse position updates to the
+            position rate
+
+        Methods
+        ----------
+        set_mouse_position(x, y):
+            Stores latest mouse position to be shown on
+            next position update
+        set_tool(tool, size, color):
+            Updates tool label when tool state changes
+        show_message(text, timeout):
+            Shows a temporary message in the status bar
+        show_mouse_position():
+            Updates mouse label with latest mouse position
+    """
+
+    def __init__(self, status_bar, position_rate=POSITION_RATE):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            status_bar : QStatusBar
+                Status bar the labels are added to
+            position_rate : int
+                Maximum mouse position updates per second
+        """
+        self.status_bar = status_bar
+        self.mouse_label = QLabel()
+        self.tool_label = QLabel()
+
+        # Messages hide every label but permanent ones, so both
+        # stay in view beside them
+        status_bar.addPermanentWidget(self.tool_label)
+        status_bar.addPermanentWidget(self.mouse_label)
+
+        self.mouse_x = None
+        self.mouse_y = None
+        self.shown_position = None
+        self.shown_tool = None
+
+        self.position_timer = QTimer(status_bar)
+        self.position_timer.setSingleShot(True)
+        self.position_timer.setInterval(round(1000 / position_rate))
+        self.position_timer.timeout.connect(self.show_mouse_position)
+
+    def set_mouse_position(self, x, y):
+        """
+        Stores latest mouse position to be shown on
+        next position update
+
+        Parameters
+        ----------
+        x : int
+            Horizontal mouse position on canvas
+        y : int
+            Vertical mouse position on canvas
+        """
+        self.mouse_x = x
+        self.mouse_y = y
+        if not self.position_timer.isActive():
+            self.position_timer.start()
+
+    def show_mouse_position(self):
+        """
+        Updates mouse label with latest mouse position
+        """
+        position = (self.mouse_x, self.mouse_y)
+        if position != self.shown_position:
+            self.shown_position = position
+            self.mouse_label.setText(f'     Mouse at {self.mouse_x}, ' +
+                                     f'{self.mouse_y}     ')
+
+    def set_tool(self, tool, size, color):
+        """
+        Updates tool label when tool state changes
+
+        Parameters
+        ----------
+        tool : str
+            Tool type selected by user
+        size : int
+            Tool size in pixels
+        color : tuple
+            RGBA values of tool color
+        """
+        tool_state = (tool, size, color)
+        if tool_state != self.shown_tool:
+            self.shown_tool = tool_state
+            self.tool_label.setText(f'     Tool: {tool}, ' +
+                                    f'Size: {size}px, ' +
+                                    f'Color: {color}     ')
+
+    def show_message(self, text, timeout=0):
+        """
+        Shows a temporary message in the status bar
+
+        Parameters
+        ----------
+        text : str
+            Message to show
+        timeout : int
+            Milliseconds before the message clears, kept
+            until replaced if 0
+        """
+        self.status_bar.showMessage(text, timeout)
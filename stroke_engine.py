@@ -0,0 +1,93 @@
+from PyQt6.QtCore import QTimer
+
+""" Stroke engine for the PyQt6 Paint Application.
+    Queues mouse positions received while a stroke is in
+    progress and hands them to the canvas in batches once
+    per frame, so a single painter draws every point that
+    arrived since the last frame.
+"""
+
+# Number of batches flushed to the canvas per second
+FRAME_RATE = 120
+
+
+class StrokeEngine:
+    """ A class to represent a Stroke Engine
+
+        ...
+
+        Attributes
+        ----------
+        canvas : PaintCanvas
+            Canvas whose draw method renders each batch
+        pending_points : list
+            Mouse positions queued since the last flush
+        frame_timer : QTimer
+            Timer flushing queued points at the frame rate
+
+        Methods
+        ----------
+        begin_stroke():
+            Starts the frame timer when mouse pressed
+        add_point(point):
+            Queues a mouse position for the next flush
+        end_stroke():
+            Flushes remaining points and stops the frame
+            timer when mouse released
+        flush():
+            Sends all queued points to the canvas in a
+            single batch
+    """
+
+    def __init__(self, canvas, frame_rate=FRAME_RATE):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            canvas : PaintCanvas
+                Canvas whose draw method renders each batch
+            frame_rate : int
+                Number of batches flushed per second
+        """
+        self.canvas = canvas
+        self.pending_points = []
+        self.frame_timer = QTimer(canvas)
+        self.frame_timer.setInterval(round(1000 / frame_rate))
+        self.frame_timer.timeout.connect(self.flush)
+
+    def begin_stroke(self):
+        """
+        Starts the frame timer when mouse pressed
+        """
+        self.pending_points = []
+        self.frame_timer.start()
+
+    def add_point(self, point):
+        """
+        Queues a mouse position for the next flush
+
+        Parameters
+        ----------
+        point : QPoint
+            Mouse position on canvas
+        """
+        self.pending_points.append(point)
+
+    def end_stroke(self):
+        """
+        Flushes remaining points and stops the frame
+        timer when mouse released
+        """
+        self.frame_timer.stop()
+        self.flush()
+
+    def flush(self):
+        """
+        Sends all queued points to the canvas in a
+        single batch
+        """
+        if self.pending_points:
+            points = self.pending_points
+            self.pending_points = []
+            self.canvas.draw(points)
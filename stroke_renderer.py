@@ -0,0 +1,527 @@
+from PyQt6.QtGui import (QPen, QColor, QRegion, QPolygon, QPolygonF,
+                         QPainter)
+from PyQt6.QtCore import (Qt, QPoint, QPointF, QRect)
+from spray_engine import SprayEngine
+from stroke_smoother import StrokeSmoother
+from brush_engine import BrushEngine
+from flood_fill import flood_fill
+from tile_store import TileStore
+import math
+
+""" Stroke renderer for the PyQt6 Paint Application.
+    Holds the selected tool and draws batches of points
+    into document tiles without any widgets, pencil strokes
+    as lines and brush strokes as stamped dabs, so drawings
+    can be rendered headless from stroke scripts as well
+    as from the canvas mouse handlers.
+"""
+
+
+class StrokeRenderer:
+    """ A class to represent a Stroke Renderer
+
+        ...
+
+        Attributes
+        ----------
+        tiles : TileStore
+            Document tiles strokes are drawn into
+        eraser_status : bool
+            Whether the eraser is selected
+        tool_selected : str
+            Name of the selected tool
+        pen_color : QColor
+            Color of pencil, brush, and spray strokes
+        color_selected : tuple
+            RGBA values of pen color
+        pen_width : int
+            Pencil, brush, and spray size in pixels
+        eraser_size : int
+            Eraser size in pixels
+        fill_tolerance : int
+            Largest channel difference the bucket fills over
+        smoothing : float
+            Pixel tolerance pencil and brush strokes are
+            simplified to before drawing them as splines,
+            0 draws straight lines between mouse positions
+        last_mouse_position : QPoint
+            Point the next batch continues from
+        spray_engine : SprayEngine
+            Generates spray paint particles
+        smoother : StrokeSmoother
+            Simplifies and smooths pencil and brush strokes
+        brush_engine : BrushEngine
+            Stamps brush dabs along brush strokes
+
+        Methods
+        ----------
+        select_tool_size(tool, size):
+            Sets eraser status, tool type, and size
+        set_color(color):
+            Sets pen color
+        begin_stroke(point):
+            Starts a stroke at a point
+        end_stroke():
+            Draws the rest of a smoothed stroke
+        fill(point):
+            Fills region of similar color with pen color
+        draw(points):
+            Draws batch of points with the selected tool
+        smoothed():
+            Returns whether strokes go through the smoother
+        pen():
+            Returns the pen for pencil and brush strokes
+        draw_line(points):
+            Draws a polyline into the tiles with the pen,
+            or stamps brush dabs along it
+        preview_line():
+            Returns the part of a smoothed stroke not drawn
+            into the tiles yet
+        preview_rect():
+            Returns document area covered by the preview
+        draw_preview(painter):
+            Draws the preview with the selected tool
+        line_rect(start, end, width):
+            Returns bounding rectangle of a line segment
+            inflated by pen width
+        tool_settings():
+            Returns the selected tool, color, and sizes
+        restore_tool_settings(settings):
+            Selects the tool, color, and sizes saved by
+            tool_settings
+        stroke_record(point):
+            Returns a stroke script entry for a stroke
+            starting at a point
+        render_script(script):
+            Renders every stroke in a stroke script
+    """
+
+    def __init__(self, tiles):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            tiles : TileStore
+                Document tiles strokes are drawn into
+        """
+        self.tiles = tiles
+        self.eraser_status = False
+        self.tool_selected = 'Pencil'
+        self.pen_color = QColor(0, 0, 0)
+        self.color_selected = self.pen_color.getRgb()
+        self.pen_width = 2
+        self.eraser_size = 4
+        self.fill_tolerance = 0
+        self.smoothing = 0
+        self.last_mouse_position = QPoint()
+        self.spray_engine = SprayEngine()
+        self.smoother = StrokeSmoother()
+        self.brush_engine = BrushEngine()
+
+    def select_tool_size(self, tool, size):
+        """
+        Sets eraser status, tool type, and size
+
+        Parameters
+        ----------
+        tool : str
+            Tool type, one of Pencil, Brush, Spray, Eraser,
+            Bucket, Select
+        size : int
+            Tool size tier as listed in the tool menus,
+            color tolerance for the bucket, or selection
+            shape for the select tool
+        """
+        if tool == 'Spray':
+            self.eraser_status = False
+            self.tool_selected = 'Spray Paint'
+            self.pen_width = 2 * size
+        elif tool in ('Pencil', 'Brush'):
+            self.eraser_status = False
+            self.tool_selected = tool
+            self.pen_width = 2 * size
+        elif tool == 'Eraser':
+            self.eraser_status = True
+            self.tool_selected = 'Eraser'
+            self.eraser_size = 4 * size
+        elif tool == 'Bucket':
+            self.eraser_status = False
+            self.tool_selected = 'Bucket'
+            self.fill_tolerance = size
+        elif tool == 'Select':
+            # Selections are handled by the canvas, never stroked
+            self.eraser_status = False
+            self.tool_selected = 'Select'
+
+    def set_color(self, color):
+        """
+        Sets pen color
+
+        Parameters
+        ----------
+        color : QColor
+            Color of pencil, brush, and spray strokes
+        """
+        self.eraser_status = False
+        self.pen_color = color
+        self.color_selected = QColor.getRgb(self.pen_color)
+
+    def begin_stroke(self, point):
+        """
+        Starts a stroke at a point
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position the stroke starts from
+        """
+        self.last_mouse_position = point
+        self.brush_engine.begin_stroke()
+        self.smoother.active = False
+        if self.smoothed():
+            self.smoother.tolerance = self.smoothing
+            self.smoother.begin(point)
+
+    def end_stroke(self):
+        """
+        Draws the rest of a smoothed stroke up to the
+        last point
+
+        Returns
+        ----------
+        QRect
+            Document area changed, empty if the stroke was
+            not smoothed
+        """
+        if not self.smoother.active:
+            return QRect()
+        return self.draw_line(self.smoother.finish())
+
+    def fill(self, point):
+        """
+        Fills region of similar color with pen color
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position the fill starts from
+
+        Returns
+        ----------
+        QRect
+            Document area changed by the fill
+        """
+        return flood_fill(self.tiles, point, self.pen_color,
+                          self.fill_tolerance)
+
+    def draw(self, points):
+        """
+        Draws batch of points with the selected tool
+
+        Parameters
+        ----------
+        points : list
+            List of PyQt6 QPoint objects continuing the
+            stroke from the last batch
+
+        Returns
+        ----------
+        QRect or QRegion
+            Document area changed by the batch
+        """
+        # Set drawing type based on tool selected and
+        # eraser status
+        if self.smoother.active:
+            # Only the part of the spline the batch completes
+            # is drawn, the rest waits for more points
+            dirty_rect = self.draw_line(self.smoother.add(points))
+            self.last_mouse_position = points[-1]
+            paint_stroke = None
+        elif (self.eraser_status is False and
+                self.tool_selected != 'Spray Paint'):
+            dirty_rect = self.draw_line([self.last_mouse_position] + points)
+            self.last_mouse_position = points[-1]
+            paint_stroke = None
+        elif (self.eraser_status is False and
+                self.tool_selected == 'Spray Paint'):
+            # Whole batch of particles is generated at once and
+            # written straight into tile memory
+            particles = self.spray_engine.spray(self.last_mouse_position,
+                                                points, self.pen_width)
+            dirty_rect = self.tiles.plot(particles, self.pen_color)
+            self.last_mouse_position = points[-1]
+            paint_stroke = None
+        else:
+            erasers = [QRect(point.x(), point.y(),
+                             self.eraser_size, self.eraser_size)
+                       for point in points]
+            dirty_rect = QRegion()
+            for eraser in erasers:
+                dirty_rect = dirty_rect.united(eraser)
+
+            # Erasing restores the layer's unpainted color
+            def paint_stroke(painter):
+                painter.setCompositionMode(
+                    QPainter.CompositionMode.CompositionMode_Source)
+                for eraser in erasers:
+                    painter.fillRect(eraser, self.tiles.fill_color)
+
+        # Paint only into the tiles the batch touches
+        if paint_stroke is not None:
+            self.tiles.paint(QRegion(dirty_rect).boundingRect(), paint_stroke)
+        return dirty_rect
+
+    def smoothed(self):
+        """
+        Returns whether strokes go through the smoother
+
+        Returns
+        ----------
+        bool
+            True for pencil and brush with smoothing on
+        """
+        return (self.smoothing > 0 and self.eraser_status is False and
+                self.tool_selected in ('Pencil', 'Brush'))
+
+    def pen(self):
+        """
+        Returns the pen for pencil and brush strokes
+
+        Returns
+        ----------
+        QPen
+            Pen of the selected color and width
+        """
+        # Round caps and joins make one polyline identical
+        # to drawing each segment on its own
+        return QPen(self.pen_color, self.pen_width, Qt.PenStyle.SolidLine,
+                    Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+
+    def draw_line(self, points):
+        """
+        Draws a polyline into the tiles with the pen, or
+        stamps brush dabs along it
+
+        Parameters
+        ----------
+        points : list
+            QPoint or QPointF points of the polyline
+
+        Returns
+        ----------
+        QRect
+            Document area changed, empty if nothing was
+            drawn
+        """
+        if not points:
+            return QRect()
+        if self.tool_selected == 'Brush':
+            return self.brush_engine.stamp(self.tiles, points, self.pen_width,
+                                           self.pen_color)
+
+        # Whole pixel mouse positions keep the integer polygon
+        if isinstance(points[0], QPointF):
+            line = QPolygonF(points)
+            bounds = line.boundingRect().toAlignedRect()
+        else:
+            line = QPolygon(points)
+            bounds = line.boundingRect()
+        pen = self.pen()
+        dirty_rect = self.line_rect(bounds.topLeft(), bounds.bottomRight(),
+                                    self.pen_width)
+
+        def paint_stroke(painter):
+            painter.setPen(pen)
+            painter.drawPolyline(line)
+
+        # Paint only into the tiles the line touches
+        self.tiles.paint(dirty_rect, paint_stroke)
+        return dirty_rect
+
+    def preview_line(self):
+        """
+        Returns the part of a smoothed stroke not drawn
+        into the tiles yet
+
+        Returns
+        ----------
+        QPolygonF
+            Straight path from the end of the spline to
+            the last point, empty without a smoothed stroke
+        """
+        return QPolygonF(self.smoother.preview())
+
+    def preview_rect(self):
+        """
+        Returns document area covered by the preview
+
+        Returns
+        ----------
+        QRect
+            Area the preview line is drawn over
+        """
+        line = self.preview_line()
+        if line.isEmpty():
+            return QRect()
+        bounds = line.boundingRect().toAlignedRect()
+        return self.line_rect(bounds.topLeft(), bounds.bottomRight(),
+                              self.pen_width)
+
+    def draw_preview(self, painter):
+        """
+        Draws the preview with the selected tool
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter in document coordinates
+        """
+        line = self.preview_line()
+        if line.isEmpty():
+            return
+        if self.tool_selected == 'Brush':
+            self.brush_engine.draw(painter, list(line), self.pen_width,
+                                   self.pen_color)
+        else:
+            painter.setPen(self.pen())
+            painter.drawPolyline(line)
+
+    def line_rect(self, start, end, width):
+        """
+        Returns bounding rectangle of a line segment
+        inflated by pen width
+
+        Parameters
+        ----------
+        start : QPoint
+            Start point of the line segment
+        end : QPoint
+            End point of the line segment
+        width : int
+            Pen width used to draw the line segment
+
+        Returns
+        ----------
+        QRect
+            Rectangle covering every pixel the segment touched
+        """
+        # Square pen caps reach half the pen width along the
+        # diagonal, plus a pixel for rasterization rounding
+        margin = math.ceil(width / math.sqrt(2)) + 1
+        rect = QRect(start, end).normalized()
+        return rect.adjusted(-margin, -margin, margin, margin)
+
+    def tool_settings(self):
+        """
+        Returns the selected tool, color, and sizes
+
+        Returns
+        ----------
+        dict
+            Settings that can be written as JSON
+        """
+        return {'tool': self.tool_selected, 'eraser': self.eraser_status,
+                'color': list(self.color_selected),
+                'pen_width': self.pen_width, 'eraser_size': self.eraser_size,
+                'fill_tolerance': self.fill_tolerance,
+                'smoothing': self.smoothing,
+                'brush': self.brush_engine.preset}
+
+    def restore_tool_settings(self, settings):
+        """
+        Selects the tool, color, and sizes saved by
+        tool_settings, keeping the current value of any
+        setting missing
+
+        Parameters
+        ----------
+        settings : dict
+            Settings returned by tool_settings
+        """
+        if 'color' in settings:
+            self.set_color(QColor(*settings['color']))
+        self.tool_selected = settings.get('tool', self.tool_selected)
+        self.eraser_status = settings.get('eraser', self.eraser_status)
+        self.pen_width = settings.get('pen_width', self.pen_width)
+        self.eraser_size = settings.get('eraser_size', self.eraser_size)
+        self.fill_tolerance = settings.get('fill_tolerance',
+                                           self.fill_tolerance)
+        self.smoothing = settings.get('smoothing', self.smoothing)
+        self.brush_engine.select(settings.get('brush',
+                                              self.brush_engine.preset))
+
+    def stroke_record(self, point):
+        """
+        Returns a stroke script entry for a stroke with
+        the selected tool starting at a point
+
+        Parameters
+        ----------
+        point : QPoint
+            Document position the stroke starts from
+
+        Returns
+        ----------
+        dict
+            Stroke 'tool', 'size', 'color', 'brush' for
+            Brush strokes, and 'points' as render_script
+            reads them
+        """
+        # Sizes are stored as the tiers listed in the menus
+        if self.eraser_status:
+            tool, size = 'Eraser', self.eraser_size // 4
+        elif self.tool_selected == 'Spray Paint':
+            tool, size = 'Spray', self.pen_width // 2
+        elif self.tool_selected == 'Bucket':
+            tool, size = 'Bucket', self.fill_tolerance
+        else:
+            tool, size = self.tool_selected, self.pen_width // 2
+        stroke = {'tool': tool, 'size': size,
+                  'color': list(self.color_selected),
+                  'points': [[point.x(), point.y()]]}
+        if tool == 'Brush':
+            stroke['brush'] = self.brush_engine.preset
+        return stroke
+
+    @classmethod
+    def render_script(cls, script):
+        """
+        Renders every stroke in a stroke script
+
+        Parameters
+        ----------
+        script : dict
+            Document 'width' and 'height', optional spray
+            'seed' and pencil and brush 'smoothing' in
+            pixels, and a list of 'strokes' each with a
+            'tool', 'size', 'color' as RGB(A) values, a
+            'brush' preset for Brush strokes, and
+            'points' as [x, y] pairs, each point of a Bucket
+            stroke starting its own fill
+
+        Returns
+        ----------
+        QImage
+            Rendered drawing
+        """
+        renderer = cls(TileStore(script['width'], script['height']))
+        renderer.spray_engine.seed(script.get('seed'))
+        renderer.smoothing = script.get('smoothing', 0)
+        for stroke in script['strokes']:
+            if 'color' in stroke:
+                renderer.set_color(QColor(*stroke['color']))
+            if 'brush' in stroke:
+                renderer.brush_engine.select(stroke['brush'])
+            renderer.select_tool_size(stroke['tool'], stroke['size'])
+            points = [QPoint(x, y) for x, y in stroke['points']]
+            if not points:
+                continue
+            if renderer.tool_selected == 'Bucket':
+                for point in points:
+                    renderer.fill(point)
+                continue
+            renderer.begin_stroke(points[0])
+            renderer.draw(points[1:] or points[:1])
+            renderer.end_stroke()
+        return renderer.tiles.to_image()
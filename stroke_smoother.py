@@ -0,0 +1,329 @@
+from PyQt6.QtCore import QPointF
+import math
+
+""" Stroke smoother for the PyQt6 Paint Application.
+    Sits between the mouse handlers and the stroke renderer.
+    Mouse positions are simplified as they arrive, in the
+    spirit of Ramer-Douglas-Peucker but one point at a time:
+    every point that stays within a pixel tolerance of a
+    straight line from the last kept point is dropped. The
+    points kept are joined by a centripetal Catmull-Rom
+    spline cut into only as many line segments as its
+    curvature needs.
+"""
+
+# Simplification tolerance in document pixels for each
+# smoothing level offered in the edit menu
+SMOOTHING_LEVELS = {'Off': 0, 'Low': 1, 'Medium': 2, 'High': 4}
+
+# Furthest in pixels line segments may stray from the spline
+FLATNESS = 0.5
+
+
+class StrokeSmoother:
+    """ A class to represent a Stroke Smoother
+
+        ...
+
+        Attributes
+        ----------
+        tolerance : float
+            Furthest in pixels a dropped point may lie from
+            the line replacing it, 0 keeps every point
+        active : bool
+            Whether a stroke is in progress
+        keys : list
+            Last (x, y) points kept, at most four
+        held : tuple
+            Last (x, y) point held back since the last key,
+            None if there is none
+        direction : float
+            Angle from the last key to the first held back
+            point outside the tolerance, None until then
+        low : float
+            Smallest angle from direction a line from the
+            last key may take
+        high : float
+            Largest angle from direction a line from the
+            last key may take
+        reach : float
+            Furthest a held back point is from the last key
+        curve : list
+            Spline points produced since last taken
+        curve_end : tuple
+            (x, y) end of the spline drawn so far
+        points_added : int
+            Mouse positions received this stroke
+        points_kept : int
+            Positions kept as spline control points
+        segments : int
+            Line segments the spline was cut into
+
+        Methods
+        ----------
+        begin(point):
+            Starts a stroke at a point
+        add(points):
+            Simplifies new mouse positions and returns the
+            part of the spline they complete
+        finish():
+            Returns the rest of the spline up to the last
+            mouse position
+        preview():
+            Returns the straight path from the end of the
+            spline through the points held back
+        fits(point):
+            Returns whether the held back points and a new
+            point stay close to one line from the last key
+        keep(point):
+            Adds a spline control point
+        add_curve(p0, p1, p2, p3):
+            Cuts the spline between p1 and p2 into line
+            segments
+        take():
+            Returns spline points produced since last taken
+    """
+
+    def __init__(self, tolerance=0):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            tolerance : float
+                Furthest in pixels a dropped point may lie
+                from the line replacing it
+        """
+        self.tolerance = tolerance
+        self.active = False
+        self.keys = []
+        self.held = None
+        self.direction = None
+        self.low = -math.pi
+        self.high = math.pi
+        self.reach = 0
+        self.curve = []
+        self.curve_end = None
+        self.points_added = 0
+        self.points_kept = 0
+        self.segments = 0
+
+    def begin(self, point):
+        """
+        Starts a stroke at a point
+
+        Parameters
+        ----------
+        point : QPoint or QPointF
+            Document position the stroke starts from
+        """
+        start = (point.x(), point.y())
+        self.active = True
+        self.keys = [start]
+        self.held = None
+        self.direction = None
+        self.low = -math.pi
+        self.high = math.pi
+        self.reach = 0
+        self.curve = []
+        self.curve_end = start
+        self.points_added = 0
+        self.points_kept = 1
+        self.segments = 0
+
+    def add(self, points):
+        """
+        Simplifies new mouse positions and returns the
+        part of the spline they complete
+
+        Parameters
+        ----------
+        points : list
+            QPoint mouse positions continuing the stroke
+
+        Returns
+        ----------
+        list
+            QPointF polyline continuing the drawn spline,
+            empty until the stroke has bent enough to
+            place another key
+        """
+        self.points_added += len(points)
+        for point in points:
+            point = (point.x(), point.y())
+            if point == (self.held or self.keys[-1]):
+                continue
+
+            # A point is only kept once the stroke strays
+            # too far from the line it would start
+            if not self.fits(point):
+                self.keep(self.held)
+                self.fits(point)
+            self.held = point
+        return self.take()
+
+    def finish(self):
+        """
+        Returns the rest of the spline up to the last
+        mouse position
+
+        Returns
+        ----------
+        list
+            QPointF polyline ending the stroke, a single
+            dot if every position matched the start
+        """
+        if self.held is not None:
+            self.keep(self.held)
+        keys = self.keys
+        if len(keys) >= 2:
+            self.add_curve(keys[-3] if len(keys) >= 3 else keys[-2],
+                           keys[-2], keys[-1], keys[-1])
+        elif self.points_added > 0:
+            self.curve.append(keys[-1])
+        self.active = False
+        return self.take()
+
+    def preview(self):
+        """
+        Returns the straight path from the end of the
+        spline through the points held back
+
+        Returns
+        ----------
+        list
+            QPointF polyline not yet drawn into the tiles
+        """
+        if not self.active:
+            return []
+        path = [self.curve_end] + self.keys[1:][-1:]
+        if self.held is not None:
+            path.append(self.held)
+        return [QPointF(*point) for point in path]
+
+    def fits(self, point):
+        """
+        Returns whether the held back points and a new
+        point stay close to one line from the last key,
+        narrowing the angles that line may take
+
+        Parameters
+        ----------
+        point : tuple
+            (x, y) position added to the stroke
+
+        Returns
+        ----------
+        bool
+            True if no point strays past the tolerance
+        """
+        # Each point further out than the tolerance leaves
+        # a narrower wedge of directions passing near it,
+        # so every point is checked once however many are
+        # held back
+        anchor = self.keys[-1]
+        distance = math.dist(anchor, point)
+        if distance < self.reach - self.tolerance:
+            return False
+        self.reach = max(self.reach, distance)
+        if distance <= self.tolerance:
+            return True
+        angle = math.atan2(point[1] - anchor[1], point[0] - anchor[0])
+        if self.direction is None:
+            self.direction = angle
+        offset = (angle - self.direction + math.pi) % (2 * math.pi) - math.pi
+        if not self.low <= offset <= self.high:
+            return False
+        spread = math.asin(self.tolerance / distance)
+        self.low = max(self.low, offset - spread)
+        self.high = min(self.high, offset + spread)
+        return True
+
+    def keep(self, point):
+        """
+        Adds a spline control point, completing the
+        spline up to the key before it
+
+        Parameters
+        ----------
+        point : tuple
+            (x, y) position kept
+        """
+        keys = self.keys
+        keys.append(point)
+        self.held = None
+        self.direction = None
+        self.low = -math.pi
+        self.high = math.pi
+        self.reach = 0
+        self.points_kept += 1
+        if len(keys) >= 3:
+            self.add_curve(keys[-4] if len(keys) >= 4 else keys[-3],
+                           keys[-3], keys[-2], keys[-1])
+        del keys[:-4]
+
+    def add_curve(self, p0, p1, p2, p3):
+        """
+        Cuts the spline between p1 and p2 into line
+        segments
+
+        Parameters
+        ----------
+        p0 : tuple
+            (x, y) key before the segment
+        p1 : tuple
+            (x, y) start of the segment
+        p2 : tuple
+            (x, y) end of the segment
+        p3 : tuple
+            (x, y) key after the segment
+        """
+        # Centripetal knot spacing keeps the curve from
+        # looping between keys placed unevenly apart
+        d1 = math.dist(p0, p1)
+        d2 = math.dist(p1, p2)
+        d3 = math.dist(p2, p3)
+        r1, r2, r3 = math.sqrt(d1), math.sqrt(d2), math.sqrt(d3)
+        c1, c2 = p1, p2
+        if d1 > 0 and d2 > 0:
+            a = 2 * d1 + 3 * r1 * r2 + d2
+            n = 3 * r1 * (r1 + r2)
+            c1 = tuple((d1 * p2[i] - d2 * p0[i] + a * p1[i]) / n
+                       for i in range(2))
+        if d3 > 0 and d2 > 0:
+            b = 2 * d3 + 3 * r3 * r2 + d2
+            m = 3 * r3 * (r3 + r2)
+            c2 = tuple((d3 * p1[i] - d2 * p3[i] + b * p2[i]) / m
+                       for i in range(2))
+
+        # Wang's formula gives the fewest even steps whose
+        # chords stay within FLATNESS of the cubic
+        bend = max(math.hypot(p1[0] - 2 * c1[0] + c2[0],
+                              p1[1] - 2 * c1[1] + c2[1]),
+                   math.hypot(c1[0] - 2 * c2[0] + p2[0],
+                              c1[1] - 2 * c2[1] + p2[1]))
+        steps = max(1, math.ceil(math.sqrt(0.75 * bend / FLATNESS)))
+        for step in range(1, steps + 1):
+            t = step / steps
+            u = 1 - t
+            self.curve.append(tuple(
+                u * u * u * p1[i] + 3 * u * u * t * c1[i] +
+                3 * u * t * t * c2[i] + t * t * t * p2[i] for i in range(2)))
+        self.segments += steps
+
+    def take(self):
+        """
+        Returns spline points produced since last taken
+
+        Returns
+        ----------
+        list
+            QPointF polyline starting at the previous end
+            of the spline, empty if nothing was produced
+        """
+        if not self.curve:
+            return []
+        curve = [self.curve_end] + self.curve
+        self.curve_end = self.curve[-1]
+        self.curve = []
+        return [QPointF(*point) for point in curve]
@@ -0,0 +1,25 @@
+from PyQt6.QtWidgets import QApplication
+import os
+import pytest
+import sys
+import tempfile
+
+""" Shared test setup for the PyQt6 Paint Application.
+    Runs every test under the offscreen Qt platform with
+    the autosave journal in a temporary folder.
+"""
+
+# Read when the QApplication is created and on autosave,
+# so setting them here covers every test
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('PAINT_AUTOSAVE_PATH',
+                      os.path.join(tempfile.mkdtemp(), 'autosave.journal'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+@pytest.fixture(scope='session')
+def app():
+    """ Create the QApplication shared by every test
+    """
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,165 @@
+from PyQt6.QtWidgets import QMessageBox
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import QLockFile
+from paint_app import AppWindow
+from autosave import (journal_path, LOCK_SUFFIX)
+import numpy
+import os
+import pytest
+import subprocess
+import sys
+
+""" Autosave recovery tests for the PyQt6 Paint Application.
+    Writes a journal from one window, then checks a second
+    window leaves it alone while the first is running and
+    recovers it once the first has crashed.
+"""
+
+# Pixels painted into the first document before it crashes
+STROKE = numpy.array([(x, 40 + x // 3) for x in range(20, 300)],
+                     numpy.int32)
+STROKE_COLOR = QColor(30, 90, 200)
+
+# Takes the lock and exits without releasing it, as a crash
+# leaves it
+CRASHED_OWNER = """
+import sys
+from PyQt6.QtCore import QLockFile
+lock = QLockFile(sys.argv[1])
+lock.setStaleLockTime(0)
+sys.exit(0 if lock.tryLock(0) else 1)
+"""
+
+
+@pytest.fixture
+def journal_folder(tmp_path, monkeypatch):
+    """ Keep each test's journals in a folder of its own
+    """
+    monkeypatch.setenv('PAINT_AUTOSAVE_PATH',
+                       str(tmp_path / 'autosave.journal'))
+    return tmp_path
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """ Answer the recovery question with the next answer
+        queued, recording each time it is asked
+    """
+    queued = []
+    asked = []
+
+    def question(*args):
+        asked.append(args[2])
+        return queued.pop(0)
+
+    monkeypatch.setattr(QMessageBox, 'question', staticmethod(question))
+    return queued, asked
+
+
+def write_journal(app):
+    """
+    Opens a window, paints a stroke, and writes it to the
+    journal of the window's first document
+
+    Parameters
+    ----------
+    app : QApplication
+        Application delivering the worker's signals
+
+    Returns
+    ----------
+    AppWindow
+        Window still holding the journal's lock
+    """
+    window = AppWindow()
+    canvas = window.canvas()
+    canvas.tiles.plot(STROKE, STROKE_COLOR)
+    canvas.autosave.checkpoint()
+    canvas.autosave.worker.wait()
+    app.processEvents()
+    assert canvas.number == 1
+    assert os.path.exists(journal_path(1))
+    return window
+
+
+def close_window(window):
+    """
+    Closes every document of a window as a clean exit does
+
+    Parameters
+    ----------
+    window : AppWindow
+        Window to close
+    """
+    for canvas in window.documents():
+        canvas.autosave.discard()
+    window.deleteLater()
+
+
+def crash(window):
+    """
+    Drops a window's journal locks the way a crash does,
+    leaving lock files naming a process that has exited
+
+    Parameters
+    ----------
+    window : AppWindow
+        Window whose process is made to have crashed
+    """
+    for canvas in window.documents():
+        canvas.autosave.lock.unlock()
+        path = journal_path(canvas.number) + LOCK_SUFFIX
+        subprocess.run([sys.executable, '-c', CRASHED_OWNER, path],
+                       check=True)
+        assert os.path.exists(path)
+    window.deleteLater()
+
+
+def test_running_instance_journal_is_left_alone(app, journal_folder,
+                                                answers):
+    """ A window started while another runs numbers its
+        documents past the other's and never offers or
+        deletes the other's journal
+    """
+    first = write_journal(app)
+    second = AppWindow()
+    second.start_autosave()
+    assert answers[1] == []
+    assert second.canvas().number == 2
+    assert os.path.exists(journal_path(1))
+    close_window(second)
+    close_window(first)
+
+
+def test_crashed_instance_journal_is_recovered(app, journal_folder,
+                                               answers):
+    """ A journal whose owner has crashed is offered and
+        replayed into the new window's document
+    """
+    crashed = write_journal(app)
+    expected = crashed.canvas().tiles.to_image()
+    crash(crashed)
+
+    window = AppWindow()
+    answers[0].append(QMessageBox.StandardButton.Yes)
+    window.start_autosave()
+    assert len(answers[1]) == 1
+    assert len(window.documents()) == 1
+    assert window.canvas().tiles.to_image() == expected
+    assert not QLockFile(journal_path(1) + LOCK_SUFFIX).tryLock(0)
+    close_window(window)
+    assert not os.path.exists(journal_path(1))
+
+
+def test_declined_journal_is_deleted(app, journal_folder, answers):
+    """ Declining recovery deletes the crashed journal and
+        frees its number
+    """
+    crash(write_journal(app))
+    window = AppWindow()
+    answers[0].append(QMessageBox.StandardButton.No)
+    window.start_autosave()
+    assert len(answers[1]) == 1
+    assert not os.path.exists(journal_path(1))
+    close_window(window)
+    assert not os.path.exists(journal_path(1) + LOCK_SUFFIX)
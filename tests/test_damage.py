@@ -0,0 +1,118 @@
+from PyQt6.QtGui import QMouseEvent
+from PyQt6.QtCore import (Qt, QEvent, QPointF)
+from paint_app import AppWindow
+
+""" Damage tracking tests for the PyQt6 Paint Application.
+    Draws short and long strokes on small and large
+    canvases and checks the area repainted follows the
+    stroke rather than the canvas.
+"""
+
+# Canvas sizes in pixels, and stroke lengths drawn on them
+SMALL_CANVAS = (400, 300)
+LARGE_CANVAS = (1600, 1200)
+SHORT_STROKE = 20
+LONG_STROKE = 200
+
+
+def mouse_event(event_type, x, y, buttons):
+    """
+    Builds a left button mouse event
+
+    Parameters
+    ----------
+    event_type : QEvent.Type
+        Press, move, or release event type
+    x : float
+        Horizontal mouse position on canvas
+    y : float
+        Vertical mouse position on canvas
+    buttons : Qt.MouseButton
+        Buttons held during the event
+
+    Returns
+    ----------
+    QMouseEvent
+        Synthetic mouse event
+    """
+    position = QPointF(x, y)
+    return QMouseEvent(event_type, position, position,
+                       Qt.MouseButton.LeftButton, buttons,
+                       Qt.KeyboardModifier.NoModifier)
+
+
+def repainted_by_stroke(app, size, length):
+    """
+    Draws a horizontal pencil stroke on a canvas of a
+    given size and returns the pixels repainted for it
+
+    Parameters
+    ----------
+    app : QApplication
+        Application processing paint events
+    size : tuple
+        Width and height of the canvas widget and document
+    length : int
+        Length of the stroke in pixels
+
+    Returns
+    ----------
+    int
+        Pixels repainted from the press to the release
+    """
+    window = AppWindow()
+    window.show()
+    canvas = window.canvas()
+    canvas.setFixedSize(*size)
+    canvas.layers.resize(*size)
+    canvas.reset_view()
+
+    # The large canvas is bigger than the offscreen screen,
+    # so hide the status bar that would lie over it and have
+    # its updates repaint the canvas underneath
+    window.statusBar.hide()
+    canvas.select_tool_size('Pencil', 1)
+
+    # Strokes start where the mouse last moved to
+    canvas.mouseMoveEvent(mouse_event(QEvent.Type.MouseMove, 10, 10,
+                                      Qt.MouseButton.NoButton))
+    for _ in range(5):
+        app.processEvents()
+
+    held = Qt.MouseButton.LeftButton
+    repainted = canvas.repainted_pixels
+    canvas.mousePressEvent(mouse_event(QEvent.Type.MouseButtonPress,
+                                       10, 10, held))
+    for x in range(10, 11 + length, 2):
+        canvas.mouseMoveEvent(mouse_event(QEvent.Type.MouseMove, x, 10,
+                                          held))
+    canvas.mouseReleaseEvent(mouse_event(QEvent.Type.MouseButtonRelease,
+                                         10 + length, 10,
+                                         Qt.MouseButton.NoButton))
+    for _ in range(5):
+        app.processEvents()
+    repainted = canvas.repainted_pixels - repainted
+    window.hide()
+    window.deleteLater()
+    return repainted
+
+
+def test_repaint_follows_stroke_not_canvas(app):
+    """ The same stroke repaints about the same area on a
+        small and a large canvas, far less than either
+    """
+    small = repainted_by_stroke(app, SMALL_CANVAS, SHORT_STROKE)
+    large = repainted_by_stroke(app, LARGE_CANVAS, SHORT_STROKE)
+    assert 0 < small < SMALL_CANVAS[0] * SMALL_CANVAS[1] / 10
+    assert large <= 2 * small
+    assert large < LARGE_CANVAS[0] * LARGE_CANVAS[1] / 100
+
+
+def test_repaint_grows_with_stroke(app):
+    """ A longer stroke repaints more, still far less
+        than the canvas
+    """
+    short = repainted_by_stroke(app, LARGE_CANVAS, SHORT_STROKE)
+    long = repainted_by_stroke(app, LARGE_CANVAS, LONG_STROKE)
+    assert long > 2 * short
+    assert long < LARGE_CANVAS[0] * LARGE_CANVAS[1] / 20
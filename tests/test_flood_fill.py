@@ -0,0 +1,132 @@
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import (QPoint, QRect)
+from collections import deque
+from tile_store import TileStore
+from image_buffer import (pixel_array, premultiplied)
+from flood_fill import flood_fill
+import numpy
+
+""" Flood fill tests for the PyQt6 Paint Application.
+    Fills mazes of walls spread over many small tiles and
+    checks the result matches a plain pixel by pixel fill,
+    so regions leaving and re-entering tiles across their
+    edges are filled exactly.
+"""
+
+# Document and tile sizes, the document ending part way
+# through its last row and column of tiles
+DOCUMENT_SIZE = (300, 200)
+TILE_SIZE = 64
+
+# Share of pixels made walls, close to where open areas
+# stop connecting so regions wind between tiles
+WALL_DENSITY = 0.4
+
+WALL_COLOR = QColor(250, 250, 250)
+FILL_COLOR = QColor(200, 0, 0)
+
+
+def maze(seed):
+    """
+    Returns tiles of white paper with scattered walls
+
+    Parameters
+    ----------
+    seed : int
+        Seed of the wall positions
+
+    Returns
+    ----------
+    tuple
+        TileStore holding the maze and bool array, True
+        where a wall was drawn
+    """
+    width, height = DOCUMENT_SIZE
+    walls = numpy.random.default_rng(seed).random((height, width))
+    walls = walls < WALL_DENSITY
+    tiles = TileStore(width, height, TILE_SIZE)
+    rows, columns = numpy.nonzero(walls)
+    tiles.plot(numpy.stack([columns, rows], axis=1).astype(numpy.int32),
+               WALL_COLOR)
+    return tiles, walls
+
+
+def reference_fill(open_pixels, x, y):
+    """
+    Returns pixels a 4-connected fill reaches, one pixel
+    at a time
+
+    Parameters
+    ----------
+    open_pixels : numpy.ndarray
+        bool array of pixels the fill may cover
+    x : int
+        Horizontal position the fill starts from
+    y : int
+        Vertical position the fill starts from
+
+    Returns
+    ----------
+    numpy.ndarray
+        bool array of pixels filled
+    """
+    height, width = open_pixels.shape
+    filled = numpy.zeros_like(open_pixels)
+    filled[y, x] = True
+    queue = deque([(x, y)])
+    while queue:
+        x, y = queue.popleft()
+        for x, y in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if (0 <= x < width and 0 <= y < height and
+                    open_pixels[y, x] and not filled[y, x]):
+                filled[y, x] = True
+                queue.append((x, y))
+    return filled
+
+
+def filled_pixels(tiles):
+    """
+    Returns which document pixels hold the fill color
+
+    Parameters
+    ----------
+    tiles : TileStore
+        Tiles after the fill
+
+    Returns
+    ----------
+    numpy.ndarray
+        bool array, True where the pixel was filled
+    """
+    image = tiles.to_image()
+    return pixel_array(image, False) == premultiplied(FILL_COLOR)
+
+
+def test_fill_matches_pixel_fill_across_tiles(app):
+    """ Filling mazes over many tiles covers exactly the
+        pixels a pixel by pixel fill reaches, and reports
+        their bounds
+    """
+    for seed in range(4):
+        tiles, walls = maze(seed)
+        y, x = numpy.argwhere(~walls)[len(walls) // 2]
+        expected = reference_fill(~walls, x, y)
+        rows = numpy.flatnonzero(expected.any(axis=1))
+        columns = numpy.flatnonzero(expected.any(axis=0))
+
+        bounds = flood_fill(tiles, QPoint(int(x), int(y)), FILL_COLOR)
+        assert (filled_pixels(tiles) == expected).all()
+        assert bounds == QRect(QPoint(int(columns[0]), int(rows[0])),
+                               QPoint(int(columns[-1]), int(rows[-1])))
+
+
+def test_fill_tolerance_covers_close_colors(app):
+    """ Walls within the tolerance of the paper are filled
+        too, up to the document edge and no further
+    """
+    tiles, walls = maze(0)
+    y, x = numpy.argwhere(~walls)[0]
+    bounds = flood_fill(tiles, QPoint(int(x), int(y)), FILL_COLOR, 5)
+    assert filled_pixels(tiles).all()
+    assert bounds == tiles.rect()
+    assert set(tiles.tiles) == set(tiles.tile_keys(tiles.rect()))
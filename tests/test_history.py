@@ -0,0 +1,145 @@
+from PyQt6.QtGui import (QColor, QImage)
+from tile_store import TileStore
+from history import (History, UNCOMPRESSED_ENTRIES)
+import numpy
+import pytest
+
+""" Undo history tests for the PyQt6 Paint Application.
+    Paints strokes over many tiles, undoes and redoes them,
+    and checks older entries are compressed, the byte count
+    matches the entries held, the budget is kept, and undo
+    and redo put back the exact pixels.
+"""
+
+# Document and tile sizes, every stroke changing a few tiles
+DOCUMENT_SIZE = (640, 480)
+TILE_SIZE = 64
+STROKES = 30
+
+
+def stroke_points(index):
+    """
+    Returns the pixels of one stroke
+
+    Parameters
+    ----------
+    index : int
+        Stroke number, each crossing different tiles
+
+    Returns
+    ----------
+    numpy.ndarray
+        int32 array of (x, y) document positions
+    """
+    rng = numpy.random.default_rng(index)
+    start = rng.integers(0, (DOCUMENT_SIZE[0] - 150, DOCUMENT_SIZE[1] - 150))
+    return (start + rng.integers(0, 150, (400, 2))).astype(numpy.int32)
+
+
+def paint(tiles, history, index):
+    """
+    Paints one stroke as a single history entry
+
+    Parameters
+    ----------
+    tiles : TileStore
+        Document tiles
+    history : History
+        History recording the stroke
+    index : int
+        Stroke number
+    """
+    history.begin(tiles)
+    tiles.plot(stroke_points(index), QColor.fromHsv(index * 37 % 360,
+                                                    200, 200))
+    history.end()
+
+
+def check_entries(history):
+    """
+    Checks every entry outside the newest uncompressed
+    ones is compressed and the byte count is exact
+
+    Parameters
+    ----------
+    history : History
+        History to check
+    """
+    for entries in (history.undo_entries, history.redo_entries):
+        for entry in entries[:-UNCOMPRESSED_ENTRIES]:
+            assert entry['compressed']
+            assert not any(isinstance(snapshot, QImage)
+                           for snapshot in entry['tiles'].values())
+    assert history.used_bytes() == sum(
+        history.entry_bytes(entry)
+        for entry in history.undo_entries + history.redo_entries)
+
+
+@pytest.fixture
+def document():
+    """ Blank document tiles recorded by a new history
+    """
+    history = History()
+    tiles = TileStore(*DOCUMENT_SIZE, TILE_SIZE)
+    tiles.history = history
+    return tiles, history
+
+
+def test_undo_redo_compress_and_restore(app, document):
+    """ Undoing and redoing every stroke keeps older
+        entries compressed and puts back exact pixels
+    """
+    tiles, history = document
+    states = [tiles.to_image()]
+    for index in range(STROKES):
+        paint(tiles, history, index)
+        states.append(tiles.to_image())
+        check_entries(history)
+
+    for index in range(STROKES, 0, -1):
+        history.undo()
+        check_entries(history)
+        assert tiles.to_image() == states[index - 1]
+    for index in range(STROKES):
+        history.redo()
+        check_entries(history)
+        assert tiles.to_image() == states[index + 1]
+
+
+def test_budget_drops_oldest_entries(app, document):
+    """ A small budget keeps the newest entries that fit,
+        dropping undo entries before redo entries
+    """
+    tiles, history = document
+    history.budget = 10 * TILE_SIZE * TILE_SIZE * 4
+    for index in range(STROKES):
+        paint(tiles, history, index)
+        assert history.used_bytes() <= history.budget
+        check_entries(history)
+    assert 0 < len(history.undo_entries) < STROKES
+
+    while history.undo_entries:
+        history.undo()
+        assert history.used_bytes() <= history.budget
+        check_entries(history)
+    assert history.redo_entries
+
+
+def test_stroke_cost_does_not_grow_with_history(app, document,
+                                                monkeypatch):
+    """ Each stroke, undo, and redo compresses and measures
+        at most one older entry however long the history
+    """
+    tiles, history = document
+    for index in range(STROKES):
+        paint(tiles, history, index)
+    calls = []
+    entry_bytes = history.entry_bytes
+    monkeypatch.setattr(history, 'entry_bytes',
+                        lambda entry: calls.append(entry) or
+                        entry_bytes(entry))
+    for action in (lambda: paint(tiles, history, STROKES), history.undo,
+                   history.undo, history.redo):
+        calls.clear()
+        action()
+        assert len(calls) <= 2
@@ -0,0 +1,93 @@
+from PyQt6.QtGui import (QColor, QImage, QPainter)
+from PyQt6.QtCore import QSize
+from image_loader import ImageLoader
+import pytest
+
+""" Image opening tests for the PyQt6 Paint Application.
+    Opens images bigger than Qt's default 256 MB read limit
+    in a format that decodes part of an image and one that
+    decodes only whole images, and checks every band
+    arrives in order with the right pixels.
+"""
+
+# Larger than Qt's default limit of 256 MB at 32 bits per
+# pixel, and not a whole number of bands high
+IMAGE_SIZE = (8200, 8200)
+BAND_HEIGHT = 256
+
+# Largest channel difference lossy formats may decode to
+COLOR_TOLERANCE = 8
+
+
+def band_color(index):
+    """
+    Returns the color painted on one band of the image
+
+    Parameters
+    ----------
+    index : int
+        Band number from the top
+
+    Returns
+    ----------
+    QColor
+        Color of every pixel in the band
+    """
+    return QColor(index * 40 % 256, 100, 250 - index * 7 % 250)
+
+
+def save_striped_image(path):
+    """
+    Saves an image striped with one color per band
+
+    Parameters
+    ----------
+    path : str
+        File path, its extension picking the format
+    """
+    width, height = IMAGE_SIZE
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    painter = QPainter(image)
+    for index, top in enumerate(range(0, height, BAND_HEIGHT)):
+        painter.fillRect(0, top, width, BAND_HEIGHT, band_color(index))
+    painter.end()
+    assert image.save(path)
+
+
+@pytest.mark.parametrize('extension', ['jpg', 'png'])
+def test_open_image_larger_than_read_limit(app, tmp_path, extension):
+    """ Every band of an image over 256 MB is emitted in
+        order with its own colors, then loaded
+    """
+    path = str(tmp_path / f'large.{extension}')
+    save_striped_image(path)
+    loader = ImageLoader(path, QSize(800, 600), BAND_HEIGHT)
+    events = []
+    loader.header.connect(lambda size: events.append(('header', size)))
+    loader.preview.connect(
+        lambda image: events.append(('preview', image.size())))
+    loader.failed.connect(lambda message: events.append(('failed',
+                                                         message)))
+    loader.loaded.connect(lambda: events.append(('loaded',)))
+
+    # Keep a sample of each band rather than the band itself
+    def band(top, image):
+        color = image.pixelColor(image.width() // 2, image.height() // 2)
+        events.append(('band', top, image.size(), color))
+
+    loader.band.connect(band)
+    loader.run()
+
+    width, height = IMAGE_SIZE
+    assert events[0] == ('header', QSize(width, height))
+    assert events[1] == ('preview', QSize(600, 600))
+    assert events[-1] == ('loaded',)
+    bands = events[2:-1]
+    tops = list(range(0, height, BAND_HEIGHT))
+    assert [event[1] for event in bands] == tops
+    for index, (_, top, size, color) in enumerate(bands):
+        assert size == QSize(width, min(BAND_HEIGHT, height - top))
+        expected = band_color(index)
+        for channel in ('red', 'green', 'blue'):
+            assert abs(getattr(color, channel)() -
+                       getattr(expected, channel)()) <= COLOR_TOLERANCE
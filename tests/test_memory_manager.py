@@ -0,0 +1,120 @@
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import QStandardPaths
+from paint_app import AppWindow
+from memory_manager import resident_bytes
+import numpy
+import pytest
+
+""" Memory budget tests for the PyQt6 Paint Application.
+    Opens documents over a small budget and checks the
+    least recently focused are spilled on a worker into
+    the cache folder, come back with the same pixels, and
+    keep tiles painted while their spill was written.
+"""
+
+# Documents opened, their size, and the budget they share
+DOCUMENTS = 3
+DOCUMENT_SIZE = 1024
+BUDGET = 2 * DOCUMENT_SIZE * DOCUMENT_SIZE * 4
+
+
+def scribble(canvas, seed):
+    """
+    Paints random pixels across a whole document
+
+    Parameters
+    ----------
+    canvas : PaintCanvas
+        Canvas of the document
+    seed : int
+        Seed of the pixel positions
+    """
+    rng = numpy.random.default_rng(seed)
+    points = rng.integers(0, DOCUMENT_SIZE, (20000, 2)).astype(numpy.int32)
+    canvas.tiles.plot(points, QColor.fromHsv(seed * 50 % 360, 255, 200))
+
+
+def wait_for_spills(app, memory):
+    """
+    Runs the event loop until no spill is being written
+
+    Parameters
+    ----------
+    app : QApplication
+        Application delivering the worker's signals
+    memory : MemoryManager
+        Memory manager spilling documents
+    """
+    while memory.worker is not None:
+        app.processEvents()
+
+
+@pytest.fixture
+def window(app):
+    """ Window holding painted documents over the budget,
+        the first document least recently focused
+    """
+    window = AppWindow()
+    window.memory.budget = BUDGET
+    window.memory.timer.stop()
+    window.canvas().layers.resize(DOCUMENT_SIZE, DOCUMENT_SIZE)
+    scribble(window.canvas(), 0)
+    for seed in range(1, DOCUMENTS):
+        canvas = window.new_document()
+        canvas.layers.resize(DOCUMENT_SIZE, DOCUMENT_SIZE)
+        scribble(canvas, seed)
+    wait_for_spills(app, window.memory)
+    yield window
+    for canvas in window.documents():
+        window.memory.remove(canvas)
+        canvas.autosave.discard()
+    window.deleteLater()
+
+
+def test_spilled_documents_keep_their_pixels(app, window):
+    """ Documents past the budget are spilled until it is
+        kept, then show the same pixels when focused
+    """
+    memory = window.memory
+    first = window.documents()[0]
+    expected = first.tiles.to_image()
+    memory.enforce()
+    wait_for_spills(app, memory)
+    assert memory.spills >= 1
+    assert memory.resident_bytes() <= memory.budget
+    assert first.layers.allocated_bytes() == 0
+    assert all(isinstance(data, memoryview)
+               for data in first.tiles.stored.values())
+
+    window.tabs.setCurrentWidget(first)
+    assert first.tiles.to_image() == expected
+
+
+def test_tiles_painted_during_spill_stay_in_memory(app, window):
+    """ A tile painted while its document is being spilled
+        keeps the new pixels and stays allocated
+    """
+    memory = window.memory
+    documents = window.documents()
+    canvas = documents[1]
+    window.tabs.setCurrentWidget(documents[0])
+    window.tabs.setCurrentWidget(documents[2])
+    wait_for_spills(app, memory)
+    scribble(canvas, 10)
+    memory.spill(canvas)
+    assert memory.worker.directory == QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.CacheLocation)
+
+    # Painted on the GUI thread before the spill is applied
+    canvas.tiles.plot(numpy.array([[5, 5]], numpy.int32),
+                      QColor(1, 2, 3))
+    expected = canvas.tiles.to_image()
+    before = resident_bytes(canvas)
+
+    # High enough that no other spill follows this one
+    memory.budget = before * DOCUMENTS
+    wait_for_spills(app, memory)
+    assert (0, 0) in canvas.tiles.tiles
+    assert len(canvas.tiles.tiles) == 1
+    assert resident_bytes(canvas) < before
+    assert canvas.tiles.to_image() == expected
@@ -0,0 +1,166 @@
+from PyQt6.QtGui import QColor
+from layer_stack import LayerStack
+from project_file import (ProjectFile, ProjectWorker, read_strokes)
+import numpy
+import os
+
+""" Project file tests for the PyQt6 Paint Application.
+    Saves a layered document, paints over it and saves it
+    again, appending to the file or rewriting it, then
+    reopens it and checks the layers, their pixels, and the
+    strokes saved come back as they were.
+"""
+
+# Document and tile sizes, every stroke changing a few tiles
+DOCUMENT_SIZE = (320, 240)
+TILE_SIZE = 64
+
+# Tool settings saved with the project
+SETTINGS = {'smoothing': 3}
+
+
+def paint(stack, project, index):
+    """
+    Paints and logs one stroke on the active layer
+
+    Parameters
+    ----------
+    stack : LayerStack
+        Document layers
+    project : ProjectFile
+        Project logging the stroke
+    index : int
+        Stroke number, each crossing different tiles
+    """
+    rng = numpy.random.default_rng(index)
+    start = rng.integers(0, (DOCUMENT_SIZE[0] - 100, DOCUMENT_SIZE[1] - 100))
+    points = (start + rng.integers(0, 100, (200, 2))).astype(numpy.int32)
+    color = QColor.fromHsv(index * 37 % 360, 200, 200)
+    stack.active_layer().tiles.plot(points, color)
+    stroke = {'tool': 'Pen', 'size': 1, 'color': list(color.getRgb()[:3]),
+              'points': [], 'layer': stack.active_layer().id}
+    project.add_stroke(stroke)
+    project.add_points(stroke, points.tolist())
+
+
+def save(stack, project, file_path):
+    """
+    Saves the document the way the canvas does, running
+    the worker on this thread
+
+    Parameters
+    ----------
+    stack : LayerStack
+        Document layers
+    project : ProjectFile
+        Project of the document
+    file_path : str
+        Path the project is saved to
+
+    Returns
+    ----------
+    dict
+        Save job the worker finished
+    """
+    job = project.snapshot(stack, file_path, SETTINGS)
+    worker = ProjectWorker(job)
+    failures = []
+    worker.failed.connect(lambda path, error: failures.append(error))
+    worker.run()
+    assert not failures
+    project.saved(job)
+    return job
+
+
+def check_reopened(stack, file_path):
+    """
+    Checks a project file opens to the same layers and
+    pixels as a document
+
+    Parameters
+    ----------
+    stack : LayerStack
+        Document the file was saved from
+    file_path : str
+        Path of the project file
+    """
+    reopened = LayerStack(*DOCUMENT_SIZE, tile_size=TILE_SIZE)
+    assert ProjectFile().open(file_path, reopened) == SETTINGS
+    assert reopened.active == stack.active
+    assert len(reopened.layers) == len(stack.layers)
+    for saved, layer in zip(stack.layers, reopened.layers):
+        assert ((layer.id, layer.name, layer.opacity, layer.blend_mode,
+                 layer.visible, layer.opaque()) ==
+                (saved.id, saved.name, saved.opacity, saved.blend_mode,
+                 saved.visible, saved.opaque()))
+        assert layer.tiles.to_image() == saved.tiles.to_image()
+    assert reopened.to_image() == stack.to_image()
+
+
+def layered_document():
+    """
+    Returns a document of two layers with strokes on both
+
+    Returns
+    ----------
+    tuple
+        LayerStack and ProjectFile of the document
+    """
+    stack = LayerStack(*DOCUMENT_SIZE, tile_size=TILE_SIZE)
+    project = ProjectFile()
+    paint(stack, project, 0)
+    stack.add_layer()
+    stack.set_opacity(0.5)
+    stack.set_blend_mode('Multiply')
+    paint(stack, project, 1)
+    return stack, project
+
+
+def test_append_round_trip(app, tmp_path):
+    """ Saving again appends changed tiles and strokes,
+        and the reopened file matches the document
+    """
+    file_path = str(tmp_path / 'drawing.qpaint')
+    stack, project = layered_document()
+    save(stack, project, file_path)
+    first_size = os.path.getsize(file_path)
+
+    paint(stack, project, 2)
+    project.mark(1, 'undo')
+    stack.set_active(0)
+    paint(stack, project, 3)
+    job = save(stack, project, file_path)
+    assert job['append']
+    assert os.path.getsize(file_path) > first_size
+    check_reopened(stack, file_path)
+
+    script = read_strokes(file_path)
+    assert [stroke['id'] for stroke in script['strokes']] == [0, 2, 3]
+    assert script['smoothing'] == SETTINGS['smoothing']
+
+
+def test_rewrite_round_trip(app, tmp_path):
+    """ Saving once replaced chunks outweigh the live ones
+        rewrites the file, and the reopened file matches
+    """
+    file_path = str(tmp_path / 'drawing.qpaint')
+    stack, project = layered_document()
+    save(stack, project, file_path)
+
+    # Painting the same tiles over and over leaves more of
+    # the file replaced with each append
+    for index in range(2, 40):
+        paint(stack, project, index % 2)
+        job = save(stack, project, file_path)
+        if not job['append']:
+            break
+    assert not job['append']
+    assert os.path.getsize(file_path) == project.live_bytes
+    check_reopened(stack, file_path)
+
+    # Saving to another path rewrites it from the first
+    copy_path = str(tmp_path / 'copy.qpaint')
+    paint(stack, project, 40)
+    assert not save(stack, project, copy_path)['append']
+    check_reopened(stack, copy_path)
+    assert len(read_strokes(copy_path)['strokes']) == index + 2
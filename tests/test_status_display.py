@@ -0,0 +1,26 @@
+from PyQt6.QtWidgets import QMainWindow
+from status_display import StatusDisplay
+
+""" Status bar tests for the PyQt6 Paint Application.
+    Checks temporary messages leave the tool and mouse
+    labels in view.
+"""
+
+
+def test_message_keeps_labels_in_view(app):
+    """ The tool and mouse labels stay visible and keep
+        their text while a message is shown
+    """
+    window = QMainWindow()
+    status = StatusDisplay(window.statusBar())
+    status.set_tool('Pencil', 2, (0, 0, 0, 255))
+    status.set_mouse_position(10, 20)
+    status.show_mouse_position()
+    window.show()
+    status.show_message('Layer added', 3000)
+    app.processEvents()
+    assert window.statusBar().currentMessage() == 'Layer added'
+    assert status.tool_label.isVisible()
+    assert status.mouse_label.isVisible()
+    assert 'Pencil' in status.tool_label.text()
+    window.close()
@@ -0,0 +1,520 @@
+from PyQt6.QtGui import (QImage, QPainter)
+from PyQt6.QtCore import (Qt, QPoint, QRect)
+from image_buffer import (pixel_array, premultiplied)
+import numpy
+import zlib
+
+""" Tile store for the PyQt6 Paint Application.
+    Splits the document into a grid of fixed size image
+    tiles that are only allocated once painted, so memory
+    grows with the painted area rather than document size.
+    Unpainted tiles all share one blank constant tile.
+    Tiles opened from a project file stay compressed until
+    they are first drawn or painted.
+"""
+
+# Width and height in pixels of each document tile
+TILE_SIZE = 256
+
+# Image format QPainter renders into fastest
+TILE_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+
+# Most tiles a batch of plotted pixels may span before its
+# pixels are sorted by tile rather than picked out per tile
+PLOT_TILES = 4
+
+
+class TileStore:
+    """ A class to represent a Tile Store
+
+        ...
+
+        Attributes
+        ----------
+        width : int
+            Document width in pixels
+        height : int
+            Document height in pixels
+        tile_size : int
+            Width and height in pixels of each tile
+        tiles : dict
+            Allocated tile images keyed by (column, row)
+        stored : dict
+            Compressed pixels of painted tiles not decoded
+            yet keyed by (column, row)
+        fill_color : QColor
+            Color of unpainted tiles
+        blank_tile : QImage
+            Tile of fill color shared by every unpainted tile
+        history : History
+            Undo history told about each tile before it
+            changes, None when not recording
+        dirty_keys : set
+            Keys of tiles changed since autosave last
+            took them
+        unsaved_keys : set
+            Keys of tiles changed since the project file
+            last took them
+
+        Methods
+        ----------
+        rect():
+            Returns rectangle covering the whole document
+        resize(width, height):
+            Changes document size keeping painted tiles
+        tile_rect(key):
+            Returns document rectangle covered by a tile
+        tile_keys(rect):
+            Returns keys of tiles intersecting a rectangle
+        tile(key):
+            Returns tile image or shared blank tile
+        decode(key):
+            Returns allocated tile, decoding it first if
+            it is still compressed
+        painted(key):
+            Returns whether a tile has been painted
+        painted_keys():
+            Returns keys of every painted tile
+        record(key):
+            Tells history about a tile before it changes
+            and marks it dirty for autosave and unsaved
+        allocate(key):
+            Returns tile image for writing, allocating it
+            from the blank tile if never painted
+        paint(rect, paint_function):
+            Paints into every tile intersecting a rectangle,
+            allocating tiles as needed
+        paint_tile(key, paint_function):
+            Paints into one tile, allocating it as needed
+        plot(points, color):
+            Writes single pixels straight into tile memory
+        render(painter, rect):
+            Draws document rectangle with painter
+        clear():
+            Releases every painted tile
+        load_image(image):
+            Replaces document with contents of an image
+        load_band(top, image):
+            Copies an image band into the tiles it covers
+        to_image(rect):
+            Returns document rectangle as a single image
+        allocated_bytes():
+            Returns memory used by allocated tiles
+    """
+
+    def __init__(self, width, height, tile_size=TILE_SIZE,
+                 fill_color=Qt.GlobalColor.white):
+        """
+        Constructs all the attributes for the object
+
+        Parameters
+        ----------
+            width : int
+                Document width in pixels
+            height : int
+                Document height in pixels
+            tile_size : int
+                Width and height in pixels of each tile
+            fill_color : QColor
+                Color of unpainted tiles
+        """
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.tiles = {}
+        self.blank_tile = QImage(tile_size, tile_size, TILE_FORMAT)
+        self.fill_color = fill_color
+        self.blank_tile.fill(fill_color)
+        self.stored = {}
+        self.history = None
+        self.dirty_keys = set()
+        self.unsaved_keys = set()
+
+    def rect(self):
+        """
+        Returns rectangle covering the whole document
+
+        Returns
+        ----------
+        QRect
+            Document rectangle with origin at (0, 0)
+        """
+        return QRect(0, 0, self.width, self.height)
+
+    def resize(self, width, height):
+        """
+        Changes document size keeping painted tiles,
+        releasing tiles left wholly outside the document
+
+        Parameters
+        ----------
+        width : int
+            New document width in pixels
+        height : int
+            New document height in pixels
+        """
+        self.width = width
+        self.height = height
+        columns = -(-width // self.tile_size)
+        rows = -(-height // self.tile_size)
+        for key in [key for key in self.tiles
+                    if key[0] >= columns or key[1] >= rows]:
+            del self.tiles[key]
+        for key in [key for key in self.stored
+                    if key[0] >= columns or key[1] >= rows]:
+            del self.stored[key]
+
+    def tile_rect(self, key):
+        """
+        Returns document rectangle covered by a tile
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QRect
+            Rectangle of the tile in document coordinates
+        """
+        return QRect(key[0] * self.tile_size, key[1] * self.tile_size,
+                     self.tile_size, self.tile_size)
+
+    def tile_keys(self, rect):
+        """
+        Returns keys of tiles intersecting a rectangle
+
+        Parameters
+        ----------
+        rect : QRect
+            Rectangle in document coordinates
+
+        Returns
+        ----------
+        list
+            (column, row) keys of tiles inside the document
+            that the rectangle touches
+        """
+        rect = rect.intersected(self.rect())
+        if rect.isEmpty():
+            return []
+        size = self.tile_size
+        return [(column, row)
+                for row in range(rect.top() // size,
+                                 rect.bottom() // size + 1)
+                for column in range(rect.left() // size,
+                                    rect.right() // size + 1)]
+
+    def tile(self, key):
+        """
+        Returns tile image or shared blank tile
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QImage
+            Allocated tile, or the blank tile if the tile
+            has never been painted
+        """
+        tile = self.tiles.get(key)
+        if tile is None:
+            if key not in self.stored:
+                return self.blank_tile
+            tile = self.decode(key)
+        return tile
+
+    def decode(self, key):
+        """
+        Returns allocated tile, decoding it first if it
+        is still compressed
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QImage
+            Allocated tile, None if the tile has never been
+            painted
+        """
+        data = self.stored.pop(key, None)
+        if data is not None:
+            tile = QImage(self.tile_size, self.tile_size, TILE_FORMAT)
+            pixels = numpy.frombuffer(zlib.decompress(data), numpy.uint32)
+            pixel_array(tile)[:] = pixels.reshape(self.tile_size,
+                                                  self.tile_size)
+            self.tiles[key] = tile
+        return self.tiles.get(key)
+
+    def painted(self, key):
+        """
+        Returns whether a tile has been painted
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        bool
+            True if the tile is allocated or still
+            compressed
+        """
+        return key in self.tiles or key in self.stored
+
+    def painted_keys(self):
+        """
+        Returns keys of every painted tile
+
+        Returns
+        ----------
+        set
+            (column, row) keys of allocated and compressed
+            tiles
+        """
+        return set(self.tiles) | set(self.stored)
+
+    def record(self, key):
+        """
+        Tells history about a tile before it changes
+        and marks it dirty for autosave and unsaved
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+        """
+        if key in self.stored:
+            self.decode(key)
+        self.dirty_keys.add(key)
+        self.unsaved_keys.add(key)
+        if self.history is not None:
+            self.history.record(key, self.tiles.get(key))
+
+    def allocate(self, key):
+        """
+        Returns tile image for writing, allocating it
+        from the blank tile if never painted
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+
+        Returns
+        ----------
+        QImage
+            Tile image owned by the store
+        """
+        self.record(key)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.blank_tile.copy()
+            self.tiles[key] = tile
+        return tile
+
+    def paint(self, rect, paint_function):
+        """
+        Paints into every tile intersecting a rectangle,
+        allocating tiles as needed
+
+        Parameters
+        ----------
+        rect : QRect
+            Document area the paint function may change
+        paint_function : function
+            Called with a QPainter translated so document
+            coordinates land on the current tile
+        """
+        for key in self.tile_keys(rect):
+            self.paint_tile(key, paint_function)
+
+    def paint_tile(self, key, paint_function):
+        """
+        Paints into one tile, allocating it as needed
+
+        Parameters
+        ----------
+        key : tuple
+            Column and row of the tile
+        paint_function : function
+            Called with a QPainter translated so document
+            coordinates land on the tile
+        """
+        tile = self.allocate(key)
+        origin = self.tile_rect(key).topLeft()
+        painter = QPainter(tile)
+        painter.translate(-origin.x(), -origin.y())
+        paint_function(painter)
+        painter.end()
+
+    def plot(self, points, color):
+        """
+        Writes single pixels straight into tile memory
+
+        Parameters
+        ----------
+        points : numpy.ndarray
+            int32 array of (x, y) document positions
+        color : QColor
+            Opaque color written to every pixel
+
+        Returns
+        ----------
+        QRect
+            Bounding rectangle of the pixels written,
+            empty if every point was outside the document
+        """
+        low = points.min(axis=0).tolist()
+        high = points.max(axis=0).tolist()
+        if (min(low) < 0 or high[0] >= self.width or
+                high[1] >= self.height):
+            inside = ((points[:, 0] >= 0) & (points[:, 0] < self.width) &
+                      (points[:, 1] >= 0) & (points[:, 1] < self.height))
+            points = points[inside]
+            if not len(points):
+                return QRect()
+            low = points.min(axis=0).tolist()
+            high = points.max(axis=0).tolist()
+
+        # Most batches fall inside one tile and the rest inside
+        # a few, which are picked out by their bounds without
+        # sorting points by tile
+        size = self.tile_size
+        columns = range(low[0] // size, high[0] // size + 1)
+        rows = range(low[1] // size, high[1] // size + 1)
+        if len(columns) == 1 and len(rows) == 1:
+            groups = [((columns[0], rows[0]), points)]
+        elif len(columns) * len(rows) <= PLOT_TILES:
+            cells = points // size
+            groups = []
+            for row in rows:
+                in_row = cells[:, 1] == row
+                for column in columns:
+                    tile_points = points[in_row & (cells[:, 0] == column)]
+                    if len(tile_points):
+                        groups.append(((column, row), tile_points))
+        else:
+            cells = points // size
+            tile_ids = ((cells[:, 1] - rows.start) * len(columns) +
+                        cells[:, 0] - columns.start)
+            order = numpy.argsort(tile_ids, kind='stable')
+            tile_ids = tile_ids[order]
+            starts = numpy.flatnonzero(numpy.diff(tile_ids)) + 1
+            groups = [(tuple(cells[order[start]].tolist()), tile_points)
+                      for start, tile_points in zip(
+                          numpy.r_[0, starts],
+                          numpy.split(points[order], starts))]
+
+        value = premultiplied(color)
+        for key, tile_points in groups:
+            pixels = pixel_array(self.allocate(key))
+            pixels[tile_points[:, 1] - key[1] * size,
+                   tile_points[:, 0] - key[0] * size] = value
+        return QRect(QPoint(*low), QPoint(*high))
+
+    def render(self, painter, rect):
+        """
+        Draws document rectangle with painter
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter whose coordinates match the document
+        rect : QRect
+            Document area to draw
+        """
+        for key in self.tile_keys(rect):
+            painter.drawImage(self.tile_rect(key).topLeft(), self.tile(key))
+
+    def clear(self):
+        """
+        Releases every painted tile
+        """
+        for key in self.painted_keys():
+            self.record(key)
+        self.tiles = {}
+
+    def load_image(self, image):
+        """
+        Replaces document with contents of an image,
+        keeping only tiles that are not blank
+
+        Parameters
+        ----------
+        image : QImage
+            Image to split into tiles
+        """
+        self.clear()
+        self.resize(image.width(), image.height())
+        self.load_band(0, image)
+
+    def load_band(self, top, image):
+        """
+        Copies an image band into the tiles it covers,
+        keeping only tiles that are not blank
+
+        Parameters
+        ----------
+        top : int
+            Document row of the band's first line
+        image : QImage
+            Band of the document, full document width
+        """
+        image = image.convertToFormat(TILE_FORMAT)
+        band = QRect(0, top, image.width(), image.height())
+        for key in self.tile_keys(band):
+            tile = self.tile(key).copy()
+            painter = QPainter(tile)
+            painter.drawImage(QPoint(0, 0), image,
+                              self.tile_rect(key).translated(0, -top))
+            painter.end()
+            if self.painted(key) or tile != self.blank_tile:
+                self.record(key)
+                self.tiles[key] = tile
+
+    def to_image(self, rect=None):
+        """
+        Returns document rectangle as a single image
+
+        Parameters
+        ----------
+        rect : QRect
+            Document area to copy, whole document if None
+
+        Returns
+        ----------
+        QImage
+            Image containing the document area
+        """
+        if rect is None:
+            rect = self.rect()
+        image = QImage(rect.size(), TILE_FORMAT)
+        image.fill(self.fill_color)
+        painter = QPainter(image)
+        painter.translate(-rect.x(), -rect.y())
+        for key in self.tile_keys(rect):
+            if self.painted(key):
+                origin = self.tile_rect(key).topLeft()
+                painter.drawImage(origin, self.tile(key))
+        painter.end()
+        return image
+
+    def allocated_bytes(self):
+        """
+        Returns memory used by allocated tiles
+
+        Returns
+        ----------
+        int
+            Bytes of pixel data held by allocated tiles
+        """
+        return sum(tile.sizeInBytes() for tile in self.tiles.values())
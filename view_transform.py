@@ -0,0 +1,187 @@
+from PyQt6.QtGui import QTransform
+from PyQt6.QtCore import (QPoint, QPointF, QRectF)
+import math
+
+""" View transform for the PyQt6 Paint Application.
+    Maps between document pixels and canvas widget pixels
+    for a zoom factor and pan offset, so resizing or zooming
+    the window never touches document pixels.
+"""
+
+# Smallest and largest zoom factors allowed
+MIN_ZOOM = 1 / 64
+MAX_ZOOM = 32
+
+# Deepest mipmap level used for downscaled views
+MAX_LEVEL = 6
+
+
+class ViewTransform:
+    """ A class to represent a View Transform
+
+        ...
+
+        Attributes
+        ----------
+        zoom : float
+            Widget pixels per document pixel
+        offset : QPointF
+            Widget position of the document origin
+
+        Methods
+        ----------
+        reset():
+            Returns view to zoom 1 with no pan
+        fit(size, area):
+            Zooms out until a document fits the widget
+        transform():
+            Returns painter transform from document to widget
+        to_document(point):
+            Maps widget position to document pixel
+        to_document_rect(rect):
+            Maps widget rectangle to document rectangle
+        to_widget_rect(rect):
+            Maps document rectangle to widget rectangle
+        zoom_at(factor, anchor):
+            Scales zoom keeping anchor point fixed
+        pan(dx, dy):
+            Moves document by widget pixels
+        level():
+            Returns mipmap level matching the zoom
+    """
+
+    def __init__(self):
+        """
+        Constructs all the attributes for the object
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Returns view to zoom 1 with no pan
+        """
+        self.zoom = 1.0
+        self.offset = QPointF(0, 0)
+
+    def fit(self, size, area):
+        """
+        Zooms out until a document fits the widget,
+        never zooming in past actual size
+
+        Parameters
+        ----------
+        size : QSize
+            Document size in pixels
+        area : QSize
+            Canvas widget size in pixels
+        """
+        self.reset()
+        if size.width() > 0 and size.height() > 0:
+            self.zoom = max(min(1.0, area.width() / size.width(),
+                                area.height() / size.height()), MIN_ZOOM)
+
+    def transform(self):
+        """
+        Returns painter transform from document to widget
+
+        Returns
+        ----------
+        QTransform
+            Scale by zoom then translate by offset
+        """
+        return QTransform(self.zoom, 0, 0, self.zoom,
+                          self.offset.x(), self.offset.y())
+
+    def to_document(self, point):
+        """
+        Maps widget position to document pixel
+
+        Parameters
+        ----------
+        point : QPointF
+            Position on the canvas widget
+
+        Returns
+        ----------
+        QPoint
+            Document pixel under the position
+        """
+        return QPoint(math.floor((point.x() - self.offset.x()) / self.zoom),
+                      math.floor((point.y() - self.offset.y()) / self.zoom))
+
+    def to_document_rect(self, rect):
+        """
+        Maps widget rectangle to document rectangle
+
+        Parameters
+        ----------
+        rect : QRect
+            Area of the canvas widget
+
+        Returns
+        ----------
+        QRect
+            Smallest document rectangle covering the area
+        """
+        inverse, _ = self.transform().inverted()
+        return inverse.mapRect(QRectF(rect)).toAlignedRect()
+
+    def to_widget_rect(self, rect):
+        """
+        Maps document rectangle to widget rectangle
+
+        Parameters
+        ----------
+        rect : QRect
+            Area of the document
+
+        Returns
+        ----------
+        QRect
+            Smallest widget rectangle covering the area
+        """
+        return self.transform().mapRect(QRectF(rect)).toAlignedRect()
+
+    def zoom_at(self, factor, anchor):
+        """
+        Scales zoom keeping anchor point fixed
+
+        Parameters
+        ----------
+        factor : float
+            Amount to multiply the zoom by
+        anchor : QPointF
+            Widget position that stays over the same
+            document point
+        """
+        zoom = min(max(self.zoom * factor, MIN_ZOOM), MAX_ZOOM)
+        scale = zoom / self.zoom
+        self.offset = anchor - (anchor - self.offset) * scale
+        self.zoom = zoom
+
+    def pan(self, dx, dy):
+        """
+        Moves document by widget pixels
+
+        Parameters
+        ----------
+        dx : float
+            Horizontal distance in widget pixels
+        dy : float
+            Vertical distance in widget pixels
+        """
+        self.offset += QPointF(dx, dy)
+
+    def level(self):
+        """
+        Returns mipmap level matching the zoom
+
+        Returns
+        ----------
+        int
+            0 at zoom 1 or above, otherwise the deepest
+            level still at least as detailed as the view
+        """
+        if self.zoom >= 1:
+            return 0
+        return min(int(math.floor(math.log2(1 / self.zoom))), MAX_LEVEL)